@@ -0,0 +1,251 @@
+"""
+Prometheus metrics
+Request latency, database pool, outbound provider calls, scheduled jobs and
+event-loop lag
+"""
+import asyncio
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+# ===========================================
+# Metric definitions
+# ===========================================
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0
+)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "fitclean_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+
+HTTP_REQUESTS = Counter(
+    "fitclean_http_requests_total",
+    "HTTP requests by route template and status code",
+    ["method", "route", "status"],
+)
+
+DB_POOL_WAIT = Histogram(
+    "fitclean_db_pool_wait_seconds",
+    "Time spent waiting to check a connection out of the pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+
+OUTBOUND_DURATION = Histogram(
+    "fitclean_outbound_request_duration_seconds",
+    "Latency of calls to external providers",
+    ["provider", "operation"],
+    buckets=LATENCY_BUCKETS,
+)
+
+OUTBOUND_ERRORS = Counter(
+    "fitclean_outbound_request_errors_total",
+    "Failed calls to external providers",
+    ["provider", "operation"],
+)
+
+OUTBOUND_RETRIES = Counter(
+    "fitclean_outbound_request_retries_total",
+    "Retried calls to external providers",
+    ["provider", "operation"],
+)
+
+CIRCUIT_BREAKER_STATE = Gauge(
+    "fitclean_circuit_breaker_state",
+    "Circuit breaker state per provider (0 closed, 1 half-open, 2 open)",
+    ["provider"],
+)
+
+CIRCUIT_BREAKER_REJECTIONS = Counter(
+    "fitclean_circuit_breaker_rejections_total",
+    "Calls failed fast because the provider's circuit breaker was open",
+    ["provider"],
+)
+
+RATE_LIMIT_WAIT = Histogram(
+    "fitclean_outbound_rate_limit_wait_seconds",
+    "Time outbound calls waited for a rate-limit token",
+    ["limiter", "priority"],
+    buckets=(0.0, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+RATE_LIMIT_QUEUED = Gauge(
+    "fitclean_outbound_rate_limit_queued",
+    "Outbound calls waiting for a rate-limit token",
+    ["limiter"],
+)
+
+RATE_LIMIT_TIMEOUTS = Counter(
+    "fitclean_outbound_rate_limit_timeouts_total",
+    "Outbound calls dropped after waiting too long for a rate-limit token",
+    ["limiter"],
+)
+
+NOTIFICATIONS_COALESCED = Counter(
+    "fitclean_notifications_coalesced_total",
+    "Notifications folded into a pending message to the same recipient",
+    ["outcome"],  # merged (new order) or superseded (later status of the same order)
+)
+
+NOTIFICATION_LOG_RECORDS = Counter(
+    "fitclean_notification_log_records_total",
+    "Notification log records handled by the write-behind buffer (written, rejected or dropped)",
+    ["outcome"],
+)
+
+NOTIFICATION_LOG_PENDING = Gauge(
+    "fitclean_notification_log_pending",
+    "Notification log records buffered in memory, not yet written",
+)
+
+WEBHOOK_EVENTS = Counter(
+    "fitclean_whatsapp_webhook_events_total",
+    "UltraMsg webhook events by type and outcome (queued, ignored, rejected, applied, unmatched, dropped)",
+    ["event", "outcome"],
+)
+
+JOB_RUN_DURATION = Histogram(
+    "fitclean_job_run_duration_seconds",
+    "Duration of scheduled job runs",
+    ["job"],
+    buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0),
+)
+
+JOB_RUNS = Counter(
+    "fitclean_job_runs_total",
+    "Scheduled job runs by outcome (success, error, cancelled, or skipped while the previous run is still going)",
+    ["job", "outcome"],
+)
+
+SCHEDULER_LEADER = Gauge(
+    "fitclean_scheduler_leader",
+    "1 while this process holds the scheduler lock and runs scheduled jobs",
+)
+
+EVENT_LOOP_LAG = Histogram(
+    "fitclean_event_loop_lag_seconds",
+    "Delay between scheduled and actual wake-up of the event loop monitor",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+
+EVENT_LOOP_LAG_LAST = Gauge(
+    "fitclean_event_loop_lag_last_seconds",
+    "Most recent event loop lag sample",
+)
+
+
+class DatabasePoolCollector:
+    """Reports SQLAlchemy pool state at scrape time"""
+
+    GAUGES = (
+        ("fitclean_db_pool_size", "Configured pool size", lambda pool: pool.size()),
+        ("fitclean_db_pool_checked_out", "Connections currently checked out", lambda pool: pool.checkedout()),
+        ("fitclean_db_pool_checked_in", "Idle connections in the pool", lambda pool: pool.checkedin()),
+        ("fitclean_db_pool_overflow", "Connections opened beyond pool size", lambda pool: max(0, pool.overflow())),
+    )
+
+    def describe(self):
+        # Lets the registry check names without touching the engine at import time
+        for name, documentation, _ in self.GAUGES:
+            yield GaugeMetricFamily(name, documentation)
+
+    def collect(self):
+        from .database import engine
+
+        for name, documentation, read in self.GAUGES:
+            gauge = GaugeMetricFamily(name, documentation)
+            gauge.add_metric([], read(engine.pool))
+            yield gauge
+
+
+REGISTRY.register(DatabasePoolCollector())
+
+
+# ===========================================
+# Instrumentation helpers
+# ===========================================
+
+@contextmanager
+def track_outbound(provider: str, operation: str):
+    """
+    Time an outbound call; exceptions are counted as errors and re-raised
+    Callers that signal failure by return value should call record_outbound_error
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        OUTBOUND_ERRORS.labels(provider, operation).inc()
+        raise
+    finally:
+        OUTBOUND_DURATION.labels(provider, operation).observe(time.perf_counter() - start)
+
+
+def record_outbound_error(provider: str, operation: str):
+    """Count a provider call that completed but reported failure"""
+    OUTBOUND_ERRORS.labels(provider, operation).inc()
+
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+
+def metrics_response_body() -> bytes:
+    """Render all registered metrics in the Prometheus text format"""
+    return generate_latest(REGISTRY)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency and status per route template
+    (e.g. /api/v1/orders/{order_id}, so path parameters don't explode cardinality)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.labels(method, route_path).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(method, route_path, str(status_code)).inc()
+
+
+async def monitor_event_loop_lag(interval: float = 0.5):
+    """Sample event-loop lag until cancelled"""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - expected)
+        EVENT_LOOP_LAG.observe(lag)
+        EVENT_LOOP_LAG_LAST.set(lag)
+
+
+def start_event_loop_monitor(interval: float = 0.5) -> asyncio.Task:
+    """Start the event-loop lag monitor as a background task"""
+    return asyncio.create_task(monitor_event_loop_lag(interval))
@@ -0,0 +1,210 @@
+"""
+On-demand sampling profiler
+Samples the Python stacks of the current worker process for a fixed time and
+writes a speedscope profile (https://www.speedscope.app) to local disk
+"""
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .config import settings
+
+Frame = Tuple[str, str, int]  # function, file, line
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler running in a background thread
+
+    Every interval it captures the stack of each thread in the process
+    (the event loop and the threadpool running sync handlers). With a
+    route_prefix, samples are only taken while at least one request whose
+    path starts with the prefix is in flight.
+    """
+
+    def __init__(self, output_dir: str, interval: float = 0.005):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.route_prefix: Optional[str] = None
+        self.active_requests = 0
+        self.last_output: Optional[str] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._ends_at = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration: float, route_prefix: Optional[str] = None) -> str:
+        """
+        Start profiling in the background
+
+        Args:
+            duration: Seconds to sample for
+            route_prefix: Only sample while matching requests are in flight
+
+        Returns:
+            Path the profile will be written to
+
+        Raises:
+            RuntimeError: If a profile is already running
+        """
+        with self._lock:
+            if self.running:
+                raise RuntimeError("Profiler is already running")
+            os.makedirs(self.output_dir, exist_ok=True)
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            path = os.path.join(
+                self.output_dir, f"profile-{os.getpid()}-{stamp}.speedscope.json"
+            )
+            self.route_prefix = route_prefix
+            self.active_requests = 0
+            self._ends_at = time.monotonic() + duration
+            self._thread = threading.Thread(
+                target=self._run, args=(duration, path), name="sampling-profiler", daemon=True
+            )
+            self._thread.start()
+            return path
+
+    def status(self) -> dict:
+        return {
+            "running": self.running,
+            "pid": os.getpid(),
+            "route_prefix": self.route_prefix if self.running else None,
+            "seconds_left": max(0.0, self._ends_at - time.monotonic()) if self.running else 0.0,
+            "last_output": self.last_output,
+        }
+
+    # ===========================================
+    # Request scoping (called by ProfilerMiddleware)
+    # ===========================================
+
+    def matches(self, path: str) -> bool:
+        return self.running and self.route_prefix is not None and path.startswith(self.route_prefix)
+
+    def request_started(self):
+        with self._lock:
+            self.active_requests += 1
+
+    def request_finished(self):
+        with self._lock:
+            self.active_requests = max(0, self.active_requests - 1)
+
+    # ===========================================
+    # Sampling
+    # ===========================================
+
+    def _run(self, duration: float, path: str):
+        own_thread = threading.get_ident()
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        samples: Dict[str, Counter] = {}
+        deadline = time.monotonic() + duration
+
+        while time.monotonic() < deadline:
+            if self.route_prefix is None or self.active_requests > 0:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_thread:
+                        continue
+                    name = thread_names.get(thread_id)
+                    if name is None:
+                        thread_names = {t.ident: t.name for t in threading.enumerate()}
+                        name = thread_names.get(thread_id, str(thread_id))
+                    samples.setdefault(name, Counter())[self._stack(frame)] += 1
+            time.sleep(self.interval)
+
+        self._write(path, samples, duration)
+        self.last_output = path
+
+    @staticmethod
+    def _stack(frame) -> Tuple[Frame, ...]:
+        """Stack from outermost to innermost frame"""
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_name, code.co_filename, frame.f_lineno))
+            frame = frame.f_back
+        return tuple(reversed(stack))
+
+    def _write(self, path: str, samples: Dict[str, Counter], duration: float):
+        frame_index: Dict[Frame, int] = {}
+        frames: List[dict] = []
+        profiles = []
+
+        for thread_name, stacks in samples.items():
+            profile_samples = []
+            weights = []
+            for stack, count in stacks.items():
+                indexes = []
+                for frame in stack:
+                    if frame not in frame_index:
+                        frame_index[frame] = len(frames)
+                        frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                    indexes.append(frame_index[frame])
+                profile_samples.append(indexes)
+                weights.append(count * self.interval)
+            profiles.append({
+                "type": "sampled",
+                "name": thread_name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": profile_samples,
+                "weights": weights,
+            })
+
+        document = {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"FitClean worker {os.getpid()} ({duration:g}s"
+                    + (f", {self.route_prefix}" if self.route_prefix else "") + ")",
+            "exporter": "fitclean-sampling-profiler",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+        with open(path, "w") as f:
+            json.dump(document, f)
+
+
+class ProfilerMiddleware:
+    """ASGI middleware counting in-flight requests for route-scoped profiles"""
+
+    def __init__(self, app, profiler: SamplingProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.matches(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        self.profiler.request_started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.request_finished()
+
+
+profiler = SamplingProfiler(
+    output_dir=settings.PROFILER_OUTPUT_DIR,
+    interval=settings.PROFILER_INTERVAL,
+)
+
+
+def install_signal_handler(profiler: SamplingProfiler, duration: float, signum: int = signal.SIGUSR2):
+    """Start a profile of this worker when it receives signum (kill -USR2 <pid>)"""
+    if threading.current_thread() is not threading.main_thread():
+        return  # signal handlers can only be installed from the main thread
+
+    def handler(received_signum, frame):
+        try:
+            profiler.start(duration)
+        except RuntimeError:
+            pass
+
+    signal.signal(signum, handler)
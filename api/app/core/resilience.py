@@ -0,0 +1,247 @@
+"""
+Outbound call resilience
+Circuit breakers, retry budgets, jittered backoff and rate limiters for
+external providers
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from .metrics import (
+    CIRCUIT_BREAKER_REJECTIONS, CIRCUIT_BREAKER_STATE,
+    RATE_LIMIT_QUEUED, RATE_LIMIT_TIMEOUTS, RATE_LIMIT_WAIT,
+)
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Breakers and rate limiters by name, for health checks
+circuit_breakers: Dict[str, "CircuitBreaker"] = {}
+rate_limiters: Dict[str, "AsyncTokenBucket"] = {}
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    Opens after failure_threshold consecutive failures and rejects calls for
+    reset_timeout seconds. It then lets up to half_open_max_calls probe
+    calls through: a success closes it, a failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self.times_opened = 0
+        self.last_error: Optional[str] = None
+        circuit_breakers[name] = self
+        CIRCUIT_BREAKER_STATE.labels(name).set(STATE_VALUES[CLOSED])
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            logger.log(logging.WARNING if state == OPEN else logging.INFO,
+                       "Circuit breaker %s: %s -> %s", self.name, self.state, state)
+        self.state = state
+        CIRCUIT_BREAKER_STATE.labels(self.name).set(STATE_VALUES[state])
+
+    def allow(self) -> bool:
+        """Whether a call may proceed now (counts a half-open probe if so)"""
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now - self.opened_at < self.reset_timeout:
+                CIRCUIT_BREAKER_REJECTIONS.labels(self.name).inc()
+                return False
+            self._set_state(HALF_OPEN)
+            self.opened_at = now
+            self.half_open_calls = 0
+        if self.state == HALF_OPEN:
+            if now - self.opened_at >= self.reset_timeout:
+                # Probes that never reported back (e.g. cancelled) don't block forever
+                self.opened_at = now
+                self.half_open_calls = 0
+            if self.half_open_calls >= self.half_open_max_calls:
+                CIRCUIT_BREAKER_REJECTIONS.labels(self.name).inc()
+                return False
+            self.half_open_calls += 1
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.last_error = None
+        if self.state != CLOSED:
+            self._set_state(CLOSED)
+
+    def record_failure(self, error: Optional[str] = None):
+        self.failures += 1
+        self.last_error = error
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.times_opened += 1
+            self.opened_at = time.monotonic()
+            self._set_state(OPEN)
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets a probe through"""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "retry_after_seconds": round(self.retry_after(), 1),
+            "last_error": self.last_error,
+        }
+
+
+class RetryBudget:
+    """
+    Caps retries at a share of recent calls
+
+    Over a sliding window of window seconds, retries are allowed while they
+    stay below min_retries + ratio * calls, so a provider outage cannot
+    multiply outbound traffic by the per-call retry limit.
+    """
+
+    def __init__(self, ratio: float = 0.1, min_retries: int = 3, window: float = 10.0):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._calls = deque()
+        self._retries = deque()
+
+    def _trim(self, now: float):
+        for events in (self._calls, self._retries):
+            while events and now - events[0] > self.window:
+                events.popleft()
+
+    def record_call(self):
+        now = time.monotonic()
+        self._trim(now)
+        self._calls.append(now)
+
+    def try_retry(self) -> bool:
+        """Spend a retry from the budget if one is available"""
+        now = time.monotonic()
+        self._trim(now)
+        if len(self._retries) >= self.min_retries + self.ratio * len(self._calls):
+            return False
+        self._retries.append(now)
+        return True
+
+
+def backoff_delay(attempt: int, base: float, cap: float, rng: random.Random = random) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2^attempt)]"""
+    return rng.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class AsyncTokenBucket:
+    """
+    Token bucket with a priority queue of waiting callers
+
+    Refills at rate tokens per second up to burst. Callers that find the
+    bucket empty queue up and are released in (priority, arrival) order as
+    tokens accrue, so bursts are smoothed instead of rejected. Lower
+    priority numbers go first. A rate of 0 disables limiting.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int = 1):
+        self.name = name
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._waiters = []  # heap of (priority, sequence, future)
+        self._sequence = itertools.count()
+        self._drainer: Optional[asyncio.Task] = None
+
+    def _refill(self, now: float):
+        # updated may lie in the future after pause()
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    async def acquire(self, priority: int = 1, timeout: Optional[float] = None) -> float:
+        """
+        Wait for a token
+
+        Returns:
+            Seconds waited
+
+        Raises:
+            asyncio.TimeoutError: If no token was granted within timeout
+        """
+        if self.rate <= 0:
+            return 0.0
+        start = time.monotonic()
+        self._refill(start)
+        if not self._waiters and self.tokens >= 1:
+            self.tokens -= 1
+            RATE_LIMIT_WAIT.labels(self.name, str(priority)).observe(0.0)
+            return 0.0
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        RATE_LIMIT_QUEUED.labels(self.name).set(len(self._waiters))
+        if self._drainer is None or self._drainer.done():
+            self._drainer = asyncio.create_task(self._drain())
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            RATE_LIMIT_TIMEOUTS.labels(self.name).inc()
+            raise
+        waited = time.monotonic() - start
+        RATE_LIMIT_WAIT.labels(self.name, str(priority)).observe(waited)
+        return waited
+
+    async def _drain(self):
+        while self._waiters:
+            now = time.monotonic()
+            self._refill(now)
+            if self.tokens < 1:
+                await asyncio.sleep(max(0.0, self.updated - now) + (1 - self.tokens) / self.rate)
+                continue
+            _, _, future = heapq.heappop(self._waiters)
+            RATE_LIMIT_QUEUED.labels(self.name).set(len(self._waiters))
+            if not future.done():  # skip callers that timed out or were cancelled
+                self.tokens -= 1
+                future.set_result(None)
+
+    def pause(self, seconds: float):
+        """Stop granting tokens for seconds (e.g. after the provider answered 429)"""
+        self.tokens = min(self.tokens, 0.0)
+        self.updated = max(self.updated, time.monotonic() + seconds)
+
+    def status(self) -> dict:
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "tokens": round(min(self.tokens, self.burst), 2),
+            "queued": sum(1 for _, _, future in self._waiters if not future.done()),
+        }
+
+
+def get_rate_limiter(name: str, rate: float, burst: int) -> AsyncTokenBucket:
+    """Shared limiter for name (e.g. one per provider account), created on first use"""
+    if name not in rate_limiters:
+        rate_limiters[name] = AsyncTokenBucket(name, rate, burst)
+    return rate_limiters[name]
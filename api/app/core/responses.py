@@ -0,0 +1,54 @@
+"""
+Fast JSON responses
+orjson-backed default response class and pre-validated serializers for hot list routes
+"""
+from typing import Any, Iterable, List, Type
+
+import orjson
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson instead of the stdlib json module"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ListSerializer:
+    """
+    Serializer for routes returning lists of a single response model
+
+    Validates rows once through a TypeAdapter and dumps them straight to JSON
+    bytes. Returning the resulting Response from a route bypasses FastAPI's
+    response_model re-validation and jsonable_encoder pass, while the
+    response_model on the decorator still documents the schema.
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self.adapter = TypeAdapter(List[model])
+
+    def dump(self, items: Iterable[Any]) -> bytes:
+        """
+        Serialize items to JSON bytes
+
+        Args:
+            items: Model instances, dicts or row mappings
+
+        Returns:
+            JSON array bytes
+        """
+        items = list(items)
+        if not all(isinstance(item, self.model) for item in items):
+            items = self.adapter.validate_python(items, from_attributes=True)
+        return self.adapter.dump_json(items)
+
+    def response(self, items: Iterable[Any], status_code: int = 200) -> Response:
+        """Build a ready-to-send JSON response from items"""
+        return Response(
+            content=self.dump(items),
+            status_code=status_code,
+            media_type="application/json",
+        )
@@ -105,3 +105,17 @@ async def get_current_user(
         )
     
     return user
+
+
+# Roles allowed to use admin-only tooling (debug endpoints)
+ADMIN_ROLES = ("admin", "super")
+
+
+async def get_current_admin(current_user=Depends(get_current_user)):
+    """Get current user and require an admin role"""
+    if current_user.role not in ADMIN_ROLES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin role required",
+        )
+    return current_user
@@ -0,0 +1,214 @@
+"""
+Slow-query log
+Records statements slower than a threshold with their normalized SQL,
+parameter shapes and originating route, and captures their query plan
+with EXPLAIN (FORMAT JSON) on a background thread
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import settings
+from .sql_timing import current_query_stats
+
+logger = logging.getLogger(__name__)
+
+_explain_thread = threading.local()
+
+_PARAM_SUFFIX = re.compile(r"%\((\w+?)(?:_\d+)+\)s")
+_PARAM_LIST = re.compile(r"(%\(\w+\)s(?:::\w+)?)(?:, \1)+")
+_WHITESPACE = re.compile(r"\s+")
+
+# EXPLAIN ANALYZE executes the statement; only plain reads are re-run
+_LOCKING_CLAUSE = re.compile(r"\bFOR\s+(?:NO\s+KEY\s+)?(?:UPDATE|SHARE|KEY\s+SHARE)\b", re.IGNORECASE)
+_FUNCTION_CALL = re.compile(r"\b(\w+)\s*\(")
+# Keywords followed by "(" and side-effect-free builtins the ORM emits
+_SAFE_CALLS = {
+    "select", "in", "any", "all", "exists", "values", "as", "and", "or", "not", "on", "from",
+    "join", "where", "over", "filter", "using", "cast", "coalesce", "nullif", "greatest", "least",
+    "count", "sum", "avg", "min", "max", "lower", "upper", "length", "trim", "substring",
+    "date_trunc", "extract", "tuple", "array_position", "array_agg", "row", "to_char", "date",
+}
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Normalize a statement for grouping
+    Collapses whitespace, drops numeric suffixes from bind names and
+    folds expanded IN lists, so the same query shape has the same text
+    """
+    normalized = _WHITESPACE.sub(" ", statement).strip()
+    normalized = _PARAM_SUFFIX.sub(r"%(\1)s", normalized)
+    return _PARAM_LIST.sub(r"\1, ...", normalized)
+
+
+def can_analyze(statement: str) -> bool:
+    """
+    Whether EXPLAIN ANALYZE may run a statement again
+
+    Only SELECTs without row-locking clauses that call no functions beyond
+    known side-effect-free builtins; the run is also read-only and rolled back.
+    """
+    if not statement.lstrip().upper().startswith("SELECT") or _LOCKING_CLAUSE.search(statement):
+        return False
+    return all(name.lower() in _SAFE_CALLS for name in _FUNCTION_CALL.findall(statement))
+
+
+def parameter_shapes(parameters: Any) -> Any:
+    """Type names of bound parameters (values are not kept)"""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+class SlowQueryLog:
+    """
+    Bounded in-memory log of slow statements
+
+    Each distinct statement shape is EXPLAINed at most once per
+    explain_interval seconds; plans are captured on a single background
+    thread with its own connection, so requests never wait for them.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float,
+        size: int = 200,
+        explain: bool = True,
+        explain_analyze: bool = False,
+        explain_interval: float = 300.0,
+    ):
+        self.threshold = threshold_ms / 1000
+        self.entries: deque = deque(maxlen=size)
+        self.explain = explain
+        self.explain_analyze = explain_analyze
+        self.explain_interval = explain_interval
+        self._last_explained: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._engine: Optional[Engine] = None
+        self._pending_explains = 0
+
+    def install(self, engine: Engine):
+        """Attach to an engine's cursor events (idempotent)"""
+        self._engine = engine
+        if not event.contains(engine, "before_cursor_execute", self._before_cursor_execute):
+            event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+            event.listen(engine, "handle_error", self._handle_error)
+
+    def get_entries(self, limit: Optional[int] = None) -> List[dict]:
+        """Entries, slowest first"""
+        with self._lock:
+            entries = sorted(self.entries, key=lambda e: e["duration_ms"], reverse=True)
+        return entries[:limit] if limit else entries
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self._last_explained.clear()
+
+    # ===========================================
+    # Event hooks
+    # ===========================================
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+        if context is not None:
+            context._slow_query_timed = True
+
+    def _handle_error(self, context):
+        # Failed statements get no after_cursor_execute; drop their start time
+        if getattr(context.execution_context, "_slow_query_timed", False) and context.connection is not None:
+            context.connection.info["slow_query_start"].pop()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["slow_query_start"].pop()
+        if duration < self.threshold or getattr(_explain_thread, "active", False):
+            return
+
+        normalized = normalize_sql(statement)
+        fingerprint = hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+        stats = current_query_stats()
+        entry = {
+            "fingerprint": fingerprint,
+            "sql": normalized,
+            "parameters": parameter_shapes(parameters),
+            "duration_ms": round(duration * 1000, 1),
+            "route": stats.route if stats else None,
+            "executemany": executemany,
+            "recorded_at": datetime.utcnow().isoformat(),
+            "plan": None,
+        }
+        with self._lock:
+            self.entries.append(entry)
+
+        logger.warning(
+            "Slow query %s (%.1f ms) from %s: %s",
+            fingerprint, entry["duration_ms"], entry["route"], normalized[:500],
+        )
+
+        if self.explain and not executemany:
+            self._schedule_explain(entry, statement, parameters)
+
+    # ===========================================
+    # Plan capture
+    # ===========================================
+
+    def _schedule_explain(self, entry: dict, statement: str, parameters: Any):
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_explained.get(entry["fingerprint"])
+            if last is not None and now - last < self.explain_interval:
+                return
+            if self._pending_explains >= 10:
+                return  # plan capture is falling behind; skip rather than queue
+            self._last_explained[entry["fingerprint"]] = now
+            self._pending_explains += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="slow-query-explain"
+                )
+        self._executor.submit(self._explain, entry, statement, parameters)
+
+    def _explain(self, entry: dict, statement: str, parameters: Any):
+        _explain_thread.active = True
+        analyze = self.explain_analyze and can_analyze(statement)
+        options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+        try:
+            with self._engine.connect() as connection:
+                if analyze:
+                    # Writes (and row locks) fail in a read-only transaction
+                    connection.exec_driver_sql("SET TRANSACTION READ ONLY")
+                try:
+                    result = connection.exec_driver_sql(
+                        f"EXPLAIN ({options}) {statement}", parameters
+                    )
+                    entry["plan"] = result.scalar()
+                finally:
+                    connection.rollback()
+        except Exception as e:
+            entry["plan_error"] = str(e)
+        finally:
+            _explain_thread.active = False
+            with self._lock:
+                self._pending_explains -= 1
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    size=settings.SLOW_QUERY_LOG_SIZE,
+    explain=settings.SLOW_QUERY_EXPLAIN,
+    explain_analyze=settings.SLOW_QUERY_EXPLAIN_ANALYZE,
+)
@@ -0,0 +1,140 @@
+"""
+Per-request SQL instrumentation
+Counts queries and database time for each request via SQLAlchemy cursor
+events and reports them in Server-Timing headers and the request log
+"""
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class RequestQueryStats:
+    """Query statistics for a single request"""
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.query_count = 0
+        self.db_time = 0.0  # seconds
+
+    @property
+    def route(self) -> str:
+        """Route template once routing has happened, raw path before that"""
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or self.scope.get("path", "")
+
+
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar(
+    "request_query_stats", default=None
+)
+
+
+def current_query_stats() -> Optional[RequestQueryStats]:
+    """Stats of the request being handled, None outside of a request"""
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+    if context is not None:
+        context._query_timed = True
+
+
+def _record_query(conn):
+    start = conn.info["query_start_time"].pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.query_count += 1
+        stats.db_time += time.perf_counter() - start
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record_query(conn)
+
+
+def _handle_error(context):
+    # A failed statement gets no after_cursor_execute; pop its start time so
+    # it doesn't skew later timings on this pooled connection
+    execution = context.execution_context
+    if getattr(execution, "_query_timed", False) and context.connection is not None:
+        _record_query(context.connection)
+
+
+def install_query_listeners(engine: Engine):
+    """Attach the cursor timing hooks to an engine (idempotent)"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+class SQLTimingMiddleware:
+    """
+    ASGI middleware exposing per-request query count and DB time
+
+    Adds a Server-Timing header (visible in browser devtools), logs one line
+    per request and warns when a request runs more queries than query_budget
+    (0 disables the warning). Queries issued after the response has started,
+    e.g. while streaming a body, are logged but not in the header.
+    """
+
+    def __init__(self, app, query_budget: int = 0):
+        self.app = app
+        self.query_budget = query_budget
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats(scope)
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                total_ms = (time.perf_counter() - start) * 1000
+                db_ms = stats.db_time * 1000
+                server_timing = (
+                    f'db;dur={db_ms:.1f};desc="{stats.query_count} queries", '
+                    f"total;dur={total_ms:.1f}"
+                )
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_stats.reset(token)
+            total_ms = (time.perf_counter() - start) * 1000
+            log_fields = {
+                "method": scope["method"],
+                "route": stats.route,
+                "status": status_code,
+                "query_count": stats.query_count,
+                "db_ms": round(stats.db_time * 1000, 1),
+                "total_ms": round(total_ms, 1),
+            }
+            logger.info(
+                "request %s %s status=%s queries=%d db_ms=%.1f total_ms=%.1f",
+                log_fields["method"], log_fields["route"], status_code,
+                stats.query_count, log_fields["db_ms"], log_fields["total_ms"],
+                extra=log_fields,
+            )
+            if self.query_budget and stats.query_count > self.query_budget:
+                logger.warning(
+                    "Query budget exceeded: %s %s ran %d queries (budget %d)",
+                    log_fields["method"], log_fields["route"],
+                    stats.query_count, self.query_budget,
+                    extra=log_fields,
+                )
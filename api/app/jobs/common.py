@@ -0,0 +1,103 @@
+"""
+Shared steps of notification sweeps
+Claiming notifications in notification_logs, sending with bounded
+concurrency and recording the outcome.
+"""
+import asyncio
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List
+
+from sqlalchemy import text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from ..core.database import SessionLocal
+from ..models import NotificationLog
+
+
+def _in_session(func: Callable[..., Any], args: tuple) -> Any:
+    db = SessionLocal()
+    try:
+        return func(db, *args)
+    finally:
+        db.close()
+
+
+async def run_db(func: Callable[..., Any], *args) -> Any:
+    """
+    Run func(db, *args) in a worker thread, with a session of its own
+
+    The session is opened and closed in the thread that uses it. If the
+    calling task is cancelled (the scheduler stepping down), cancellation
+    waits for the thread to finish first: the thread can't be interrupted,
+    and the run must count as running until it has stopped writing.
+    """
+    future = asyncio.ensure_future(asyncio.to_thread(_in_session, func, args))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        while not future.done():
+            try:
+                await asyncio.wait([future])
+            except asyncio.CancelledError:
+                pass
+        raise
+
+
+def claim_notifications(db: Session, records: List[dict], index_elements: List[str],
+                        index_where: str) -> Dict[uuid.UUID, uuid.UUID]:
+    """
+    Insert notification_logs rows unless an equal one exists
+
+    index_elements and index_where name the partial unique index that
+    defines "equal" (its predicate must be given literally: a bound
+    parameter can't be matched to it). Rows are committed before anything
+    is sent, so a notification is never delivered twice, even by
+    overlapping sweeps.
+
+    Returns:
+        {record[index_elements[0]]: log_id} for newly claimed records
+    """
+    if not records:
+        return {}
+    key = getattr(NotificationLog, index_elements[0])
+    claimed = db.execute(
+        insert(NotificationLog)
+        .values([
+            {"id": uuid.uuid4(), "channel": "whatsapp", "whatsapp_sent": False, **record}
+            for record in records
+        ])
+        .on_conflict_do_nothing(index_elements=index_elements, index_where=text(index_where))
+        .returning(key, NotificationLog.id)
+    ).all()
+    db.commit()
+    return {claimed_key: log_id for claimed_key, log_id in claimed}
+
+
+async def send_bounded(calls: List[Callable[[], Awaitable[dict]]],
+                       semaphore: asyncio.Semaphore) -> List[dict]:
+    """Run send calls with at most the semaphore's concurrency; exceptions become failed results"""
+    async def send(call) -> dict:
+        async with semaphore:
+            try:
+                return await call()
+            except Exception as e:
+                return {"success": False, "error": str(e)}
+
+    return await asyncio.gather(*(send(call) for call in calls))
+
+
+def record_results(db: Session, log_ids: List[uuid.UUID], results: List[dict]):
+    """Store whatsapp_sent, error_message and the provider message ID of claimed notifications"""
+    if not log_ids:
+        return
+    db.execute(update(NotificationLog), [
+        {
+            "id": log_id,
+            "whatsapp_sent": bool(result.get("success")),
+            "error_message": None if result.get("success") else str(result.get("error")),
+            "provider_message_id": result.get("message_id"),
+        }
+        for log_id, result in zip(log_ids, results)
+    ])
+    db.commit()
@@ -0,0 +1,140 @@
+"""
+Pickup reminders
+Reminds clients whose clean items have waited in a locker past each of
+PICKUP_REMINDER_HOURS (24h and 48h by default).
+
+Ready orders are walked in keyset batches over (status_id, ready_at, id),
+so every batch costs the same however many orders the table holds. Each
+reminder is claimed in notification_logs (unique per order and threshold)
+before it is sent, so nobody is reminded twice, even by overlapping sweeps,
+and sends run with bounded concurrency.
+
+Usage (one sweep):
+    python -m app.jobs.pickup_reminders
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models import Order, User
+from ..services.whatsapp import whatsapp_service
+from .common import claim_notifications, record_results, run_db, send_bounded
+
+logger = logging.getLogger(__name__)
+
+STATUS_READY_FOR_PICKUP = 3
+
+ZERO_UUID = uuid.UUID(int=0)
+
+# Partial unique index making reminders one per order and threshold
+CLAIM_INDEX = (["order_id", "notification_type"], "notification_type LIKE 'pickup_reminder_%'")
+
+
+def reminder_type(hours: int) -> str:
+    return f"pickup_reminder_{hours}h"
+
+
+def reminder_windows(now: datetime, thresholds: List[int], lookback_hours: int) -> List[tuple]:
+    """
+    (hours, ready_after, ready_before) per threshold
+
+    An order gets the reminder of the latest threshold it has passed: the
+    24h one while ready 24-48h, the 48h one after that (up to lookback_hours
+    more, so orders abandoned for weeks don't keep every sweep busy).
+    """
+    thresholds = sorted(thresholds)
+    windows = []
+    for index, hours in enumerate(thresholds):
+        next_hours = thresholds[index + 1] if index + 1 < len(thresholds) else hours + lookback_hours
+        windows.append((hours, now - timedelta(hours=next_hours), now - timedelta(hours=hours)))
+    return windows
+
+
+def fetch_batch(db: Session, ready_after: datetime, ready_before: datetime,
+                cursor: tuple, batch_size: int) -> list:
+    """Next batch of ready orders in the window after the (ready_at, id) cursor"""
+    return db.execute(
+        select(
+            Order.id, Order.ready_at, Order.order_number, Order.locker_cell_number,
+            Order.locker_cell_id, Order.user_id, User.phone, User.notify_on_pickup_ready,
+        )
+        .outerjoin(User, User.id == Order.user_id)
+        .where(
+            Order.status_id == STATUS_READY_FOR_PICKUP,
+            Order.ready_at > ready_after,
+            Order.ready_at <= ready_before,
+            tuple_(Order.ready_at, Order.id) > tuple_(*cursor),
+        )
+        .order_by(Order.ready_at, Order.id)
+        .limit(batch_size)
+    ).all()
+
+
+async def run_pickup_reminders(now: Optional[datetime] = None) -> dict:
+    """
+    One sweep over all reminder thresholds
+
+    Returns:
+        {"<type>": {"scanned", "claimed", "sent", "failed"}} per threshold
+    """
+    now = now or datetime.now(timezone.utc)
+    semaphore = asyncio.Semaphore(settings.PICKUP_REMINDER_CONCURRENCY)
+    stats = {}
+    for hours, ready_after, ready_before in reminder_windows(
+        now, settings.PICKUP_REMINDER_HOURS, settings.PICKUP_REMINDER_LOOKBACK_HOURS
+    ):
+        notification_type = reminder_type(hours)
+        counts = stats[notification_type] = {"scanned": 0, "claimed": 0, "sent": 0, "failed": 0}
+        cursor = (ready_after, ZERO_UUID)
+        while True:
+            rows = await run_db(
+                fetch_batch, ready_after, ready_before, cursor, settings.PICKUP_REMINDER_BATCH_SIZE
+            )
+            if not rows:
+                break
+            cursor = (rows[-1].ready_at, rows[-1].id)
+            counts["scanned"] += len(rows)
+
+            eligible = [row for row in rows if row.phone and row.notify_on_pickup_ready is not False]
+            claimed = await run_db(claim_notifications, [
+                {
+                    "user_id": row.user_id,
+                    "order_id": row.id,
+                    "notification_type": notification_type,
+                    "message": f"Pickup reminder, order {row.order_number or str(row.id)[:8]}",
+                }
+                for row in eligible
+            ], *CLAIM_INDEX)
+            to_send = [row for row in eligible if row.id in claimed]
+            counts["claimed"] += len(to_send)
+
+            results = await send_bounded([
+                lambda row=row: whatsapp_service.notify_pickup_reminder(
+                    phone=row.phone,
+                    order_number=row.order_number or str(row.id)[:8],
+                    cell_number=str(row.locker_cell_number or row.locker_cell_id or "—"),
+                    coalesce=False,
+                )
+                for row in to_send
+            ], semaphore)
+            await run_db(record_results, [claimed[row.id] for row in to_send], results)
+            sent = sum(1 for result in results if result.get("success"))
+            counts["sent"] += sent
+            counts["failed"] += len(results) - sent
+
+            if len(rows) < settings.PICKUP_REMINDER_BATCH_SIZE:
+                break
+
+    if any(counts["claimed"] for counts in stats.values()):
+        logger.info("Pickup reminders: %s", stats)
+    return stats
+
+
+if __name__ == "__main__":
+    print(asyncio.run(run_pickup_reminders()))
@@ -0,0 +1,247 @@
+"""
+Job scheduler
+Runs periodic jobs inside the API process, in exactly one process across
+all uvicorn workers and nodes.
+
+Every process runs a Scheduler, but only the leader runs jobs: the one
+holding the session-level Postgres advisory lock SCHEDULER_LOCK_KEY on a
+dedicated connection. The others retry the lock every
+SCHEDULER_ELECTION_INTERVAL seconds. The leader checks its connection just
+as often; when the connection dies, Postgres drops the lock and another
+process takes over, so losing a worker or node never stops the jobs.
+Stepping down cancels the runs in progress and waits for them to end
+(including database work already handed to a thread) before releasing
+the lock, and a process doesn't take the lock while a run of its own is
+still finishing, so runs of two leaders don't overlap. (The lock connection is opened outside the
+application's pool, and needs a direct or session-pooled connection: a
+transaction-mode pooler would hand it to someone else.)
+
+Job intervals are jittered so jobs don't keep firing together, and a run
+is skipped while the previous run of the same job is still going.
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from ..core.config import settings
+from ..core.metrics import JOB_RUN_DURATION, JOB_RUNS, SCHEDULER_LEADER
+from .pickup_reminders import run_pickup_reminders
+from .subscription_expiry import run_subscription_expiry
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """A coroutine function run every interval seconds (± jitter)"""
+
+    def __init__(self, name: str, func: Callable[[], Awaitable], interval: float, jitter: float):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.task: Optional[asyncio.Task] = None  # current run
+        self.runs = 0
+        self.skipped = 0
+        self.last_started: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def next_delay(self) -> float:
+        return self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def run(self):
+        """One run; errors are logged and counted, never raised"""
+        self.last_started = time.time()
+        start = time.perf_counter()
+        outcome = "success"
+        try:
+            result = await self.func()
+            self.last_error = None
+            logger.debug("Job %s finished: %s", self.name, result)
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except Exception as e:
+            outcome = "error"
+            self.last_error = str(e)
+            logger.exception("Job %s failed", self.name)
+        finally:
+            self.last_duration = time.perf_counter() - start
+            self.runs += 1
+            JOB_RUN_DURATION.labels(self.name).observe(self.last_duration)
+            JOB_RUNS.labels(self.name, outcome).inc()
+
+    def status(self) -> dict:
+        return {
+            "interval_seconds": self.interval,
+            "running": self.running,
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "last_started": self.last_started,
+            "last_duration_seconds": None if self.last_duration is None else round(self.last_duration, 3),
+            "last_error": self.last_error,
+        }
+
+
+class Scheduler:
+    """Leader-elected periodic job runner (see module docstring)"""
+
+    def __init__(self, lock_key: int, election_interval: float, jitter: float):
+        self.lock_key = lock_key
+        self.election_interval = election_interval
+        self.jitter = jitter
+        self.jobs: Dict[str, Job] = {}
+        self.is_leader = False
+        self._lock_engine = None
+        self._lock_conn = None
+        self._election_task: Optional[asyncio.Task] = None
+        self._job_loops: list = []
+
+    def add(self, name: str, func: Callable[[], Awaitable], interval: float):
+        """Register func to run every interval seconds (0 disables the job)"""
+        if interval > 0:
+            self.jobs[name] = Job(name, func, interval, self.jitter)
+
+    # ===========================================
+    # Leader election
+    # ===========================================
+
+    def _try_lock(self) -> bool:
+        if self._lock_engine is None:
+            # Held for as long as this process leads; kept out of the request pool
+            self._lock_engine = create_engine(
+                settings.DATABASE_URL, poolclass=NullPool, isolation_level="AUTOCOMMIT"
+            )
+        conn = self._lock_engine.connect()
+        try:
+            acquired = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.lock_key}).scalar()
+        except Exception:
+            conn.invalidate()
+            conn.close()
+            raise
+        if acquired:
+            self._lock_conn = conn
+        else:
+            conn.close()
+        return bool(acquired)
+
+    def _lock_alive(self) -> bool:
+        try:
+            self._lock_conn.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            return False
+
+    def _release_lock(self):
+        conn, self._lock_conn = self._lock_conn, None
+        if conn is None:
+            return
+        try:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.lock_key})
+            conn.close()
+        except Exception:
+            # The lock went with the connection
+            conn.invalidate()
+            conn.close()
+
+    async def _elect(self):
+        while True:
+            try:
+                if not self.is_leader:
+                    # Not while runs of an earlier term are still winding down
+                    if not self._runs_active() and await asyncio.to_thread(self._try_lock):
+                        self._become_leader()
+                elif not await asyncio.to_thread(self._lock_alive):
+                    logger.warning("Scheduler lock connection lost, stepping down")
+                    await self._step_down()
+            except Exception as e:
+                logger.warning("Scheduler election failed: %s", e)
+            await asyncio.sleep(self.election_interval)
+
+    def _become_leader(self):
+        logger.info("Scheduler lock acquired, running %d jobs", len(self.jobs))
+        self.is_leader = True
+        SCHEDULER_LEADER.set(1)
+        self._job_loops = [asyncio.create_task(self._job_loop(job)) for job in self.jobs.values()]
+
+    async def _step_down(self):
+        """Stop the job loops and the runs in progress, then release the lock"""
+        self.is_leader = False
+        SCHEDULER_LEADER.set(0)
+        for task in self._job_loops:
+            task.cancel()
+        self._job_loops = []
+        await self._cancel_runs()
+        await asyncio.to_thread(self._release_lock)
+
+    def _runs_active(self) -> bool:
+        return any(job.running for job in self.jobs.values())
+
+    async def _cancel_runs(self):
+        running = [job.task for job in self.jobs.values() if job.running]
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+    # ===========================================
+    # Job runs
+    # ===========================================
+
+    async def _job_loop(self, job: Job):
+        # Spread the first runs over the first jitter share of the interval
+        await asyncio.sleep(random.uniform(0, job.interval * self.jitter))
+        while True:
+            if job.running:
+                job.skipped += 1
+                JOB_RUNS.labels(job.name, "skipped").inc()
+                logger.warning("Job %s still running, skipping this run", job.name)
+            else:
+                # A separate task, so a run that outlasts the interval is skipped, not queued
+                job.task = asyncio.create_task(job.run())
+            await asyncio.sleep(job.next_delay())
+
+    # ===========================================
+    # Lifecycle
+    # ===========================================
+
+    def start(self):
+        if self._election_task is None and self.jobs:
+            self._election_task = asyncio.create_task(self._elect())
+
+    async def stop(self):
+        """Stop electing, cancel runs in progress and release the lock"""
+        if self._election_task is not None:
+            self._election_task.cancel()
+            self._election_task = None
+        if self.is_leader:
+            await self._step_down()
+        else:
+            await self._cancel_runs()
+        if self._lock_engine is not None:
+            self._lock_engine.dispose()
+            self._lock_engine = None
+
+    def status(self) -> dict:
+        return {
+            "enabled": self._election_task is not None,
+            "leader": self.is_leader,
+            "jobs": {name: job.status() for name, job in self.jobs.items()},
+        }
+
+
+scheduler = Scheduler(
+    lock_key=settings.SCHEDULER_LOCK_KEY,
+    election_interval=settings.SCHEDULER_ELECTION_INTERVAL,
+    jitter=settings.SCHEDULER_JITTER,
+)
+scheduler.add("pickup_reminders", run_pickup_reminders, settings.PICKUP_REMINDER_INTERVAL)
+scheduler.add("subscription_expiry", run_subscription_expiry, settings.SUBSCRIPTION_EXPIRY_INTERVAL)
@@ -0,0 +1,111 @@
+"""
+Subscription expiry notices
+Tells members whose subscription period ends within
+SUBSCRIPTION_EXPIRY_NOTICE_DAYS to renew.
+
+Members are walked in keyset batches over the indexed, generated
+users.subscription_expires_at, so a sweep scales with the number of
+upcoming expiries rather than with every club's member base. Each notice
+is claimed in notification_logs (unique per user and expiry date) before
+it is sent, so a member hears about each period once.
+
+Usage (one sweep):
+    python -m app.jobs.subscription_expiry
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models import User
+from ..services.whatsapp import whatsapp_service
+from .common import claim_notifications, record_results, run_db, send_bounded
+
+logger = logging.getLogger(__name__)
+
+ZERO_UUID = uuid.UUID(int=0)
+
+# Partial unique index making notices one per user and subscription period
+CLAIM_INDEX = (["user_id", "notification_type"], "notification_type LIKE 'subscription_expiring:%'")
+
+
+def notice_type(expires_at: datetime) -> str:
+    return f"subscription_expiring:{expires_at:%Y-%m-%d}"
+
+
+def fetch_batch(db: Session, now: datetime, until: datetime, cursor: tuple, batch_size: int) -> list:
+    """Next batch of members expiring in (now, until] after the (expires_at, id) cursor"""
+    return db.execute(
+        select(User.id, User.phone, User.subscription_expires_at)
+        .where(
+            User.subscription_expires_at > now,
+            User.subscription_expires_at <= until,
+            tuple_(User.subscription_expires_at, User.id) > tuple_(*cursor),
+        )
+        .order_by(User.subscription_expires_at, User.id)
+        .limit(batch_size)
+    ).all()
+
+
+async def run_subscription_expiry(now: Optional[datetime] = None) -> dict:
+    """
+    One sweep over upcoming subscription expiries
+
+    Returns:
+        {"scanned", "claimed", "sent", "failed"}
+    """
+    now = now or datetime.utcnow()
+    until = now + timedelta(days=settings.SUBSCRIPTION_EXPIRY_NOTICE_DAYS)
+    semaphore = asyncio.Semaphore(settings.SUBSCRIPTION_EXPIRY_CONCURRENCY)
+    counts = {"scanned": 0, "claimed": 0, "sent": 0, "failed": 0}
+    cursor = (now, ZERO_UUID)
+    while True:
+        rows = await run_db(
+            fetch_batch, now, until, cursor, settings.SUBSCRIPTION_EXPIRY_BATCH_SIZE
+        )
+        if not rows:
+            break
+        cursor = (rows[-1].subscription_expires_at, rows[-1].id)
+        counts["scanned"] += len(rows)
+
+        eligible = [row for row in rows if row.phone]
+        claimed = await run_db(claim_notifications, [
+            {
+                "user_id": row.id,
+                "notification_type": notice_type(row.subscription_expires_at),
+                "message": f"Subscription expires {row.subscription_expires_at:%Y-%m-%d}",
+            }
+            for row in eligible
+        ], *CLAIM_INDEX)
+        to_send = [row for row in eligible if row.id in claimed]
+        counts["claimed"] += len(to_send)
+
+        results = await send_bounded([
+            lambda row=row: whatsapp_service.notify_subscription_expiring(
+                phone=row.phone,
+                expires_on=row.subscription_expires_at.date(),
+                payment_link=settings.SUBSCRIPTION_PAYMENT_LINK or None,
+                coalesce=False,
+            )
+            for row in to_send
+        ], semaphore)
+        await run_db(record_results, [claimed[row.id] for row in to_send], results)
+        sent = sum(1 for result in results if result.get("success"))
+        counts["sent"] += sent
+        counts["failed"] += len(results) - sent
+
+        if len(rows) < settings.SUBSCRIPTION_EXPIRY_BATCH_SIZE:
+            break
+
+    if counts["claimed"]:
+        logger.info("Subscription expiry notices: %s", counts)
+    return counts
+
+
+if __name__ == "__main__":
+    print(asyncio.run(run_subscription_expiry()))
@@ -1,12 +1,53 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .core.config import settings
+from .core.database import engine
+from .core.metrics import MetricsMiddleware, start_event_loop_monitor
+from .core.profiling import ProfilerMiddleware, install_signal_handler, profiler
+from .core.responses import FastJSONResponse
+from .core.slow_queries import slow_query_log
+from .core.sql_timing import SQLTimingMiddleware, install_query_listeners
+from .jobs.scheduler import scheduler
+from .services.notification_log import notification_log_writer
+from .services.whatsapp import whatsapp_service
+from .services.whatsapp_webhooks import webhook_ingestor
 from .routes import (
     health, users, orders, clubs, subscriptions, 
     statuses, ratings, photos, notifications,
-    whatsapp, laundry, courier, admin, tablet
+    whatsapp, laundry, courier, admin, tablet, metrics, debug
 )
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background tasks with the application"""
+    install_signal_handler(profiler, settings.PROFILER_SIGNAL_SECONDS)
+    
+    background_tasks = []
+    if settings.METRICS_ENABLED:
+        background_tasks.append(start_event_loop_monitor())
+    
+    # Periodic jobs, run by whichever worker wins the scheduler lock
+    if settings.SCHEDULER_ENABLED:
+        scheduler.start()
+    
+    yield
+    
+    for task in background_tasks:
+        task.cancel()
+    
+    await scheduler.stop()
+    
+    # Send notifications still held in the coalescing window
+    await whatsapp_service.coalescer.flush_all()
+    
+    # Write buffered notification logs, then apply buffered webhook events
+    # (acks may be for messages whose logs were just written)
+    await notification_log_writer.close()
+    await webhook_ingestor.close()
+
+
 # Create FastAPI application
 app = FastAPI(
     title=settings.API_TITLE,
@@ -14,6 +55,8 @@ app = FastAPI(
     description="Unified backend API for FitClean laundry management system",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -25,6 +68,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# In-flight request tracking for route-scoped profiles
+app.add_middleware(ProfilerMiddleware, profiler=profiler)
+
+# Per-request query count and DB time (Server-Timing header)
+if settings.SQL_TIMING_ENABLED:
+    install_query_listeners(engine)
+    app.add_middleware(SQLTimingMiddleware, query_budget=settings.SQL_QUERY_BUDGET)
+
+# Slow-query log with captured plans (browsable at /admin/debug/slow-queries)
+if settings.SLOW_QUERY_THRESHOLD_MS > 0:
+    slow_query_log.install(engine)
+
+# Request metrics (outermost, so latency covers the whole stack)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(health.router, prefix=settings.API_PREFIX)
 app.include_router(users.router, prefix=settings.API_PREFIX)
@@ -40,6 +99,11 @@ app.include_router(laundry.router, prefix=settings.API_PREFIX)
 app.include_router(courier.router, prefix=settings.API_PREFIX)
 app.include_router(admin.router, prefix=settings.API_PREFIX)
 app.include_router(tablet.router, prefix=settings.API_PREFIX)
+app.include_router(debug.router, prefix=settings.API_PREFIX)
+
+# Prometheus scrape endpoint (outside the API prefix)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
 
 
 @app.get("/")
@@ -38,13 +38,15 @@ class NotificationLog(Base):
     order_id = Column(UUID(as_uuid=True), ForeignKey("orders.id", ondelete="CASCADE"), nullable=True)
     notification_type = Column(String(50), nullable=False)  # order_accepted, order_ready, etc
     channel = Column(String(20), nullable=False)  # telegram, whatsapp
-    message = Column(Text, nullable=True)
+    message = Column(Text, nullable=False)
     telegram_sent = Column(Boolean, default=False)
     whatsapp_sent = Column(Boolean, default=False)
     sent_at = Column(DateTime, server_default=func.now())
     error_message = Column(Text, nullable=True)
+    provider_message_id = Column(Text, nullable=True)  # UltraMsg message ID, matched by delivery acks
+    delivery_status = Column(String(20), nullable=True)  # sent, delivered, read (from acks)
+    delivery_updated_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     # Relationships
     user = relationship("User")
@@ -18,6 +18,7 @@ class Order(Base):
     status_id = Column(Integer, ForeignKey("dim_status_types.id"), nullable=True)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    ready_at = Column(DateTime(timezone=True), nullable=True)  # set by trigger on entering READY_FOR_PICKUP
     
     # High priority features
     pickup_code = Column(String(4), nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, BigInteger, Integer, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, String, BigInteger, Integer, DateTime, Boolean, ForeignKey, Computed
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -29,6 +29,22 @@ class User(Base):
     bag_number = Column(String(50), nullable=True)
     role = Column(String(20), default='client')
     
+    # Digits-only phone for trigram search (generated column)
+    phone_digits = Column(
+        String,
+        Computed("regexp_replace(coalesce(phone, ''), '\\D', '', 'g')", persisted=True),
+    )
+    
+    # End of the current subscription period (generated; 2 = weekly, 3 = monthly)
+    subscription_expires_at = Column(
+        DateTime,
+        Computed(
+            "CASE subscription_id WHEN 2 THEN subscription_date + interval '7 days' "
+            "WHEN 3 THEN subscription_date + interval '1 month' END",
+            persisted=True,
+        ),
+    )
+    
     # Relationships
     club = relationship("Club", back_populates="users")
     subscription_type = relationship("DimSubscriptionType", back_populates="users")
@@ -0,0 +1,8 @@
+# Repositories (PostgreSQL with PostgREST failover)
+from .base import Repositories, OrderRepository, UserRepository, ClubRepository
+from .failover import DatabaseFailover, database_failover, get_repositories
+
+__all__ = [
+    "Repositories", "OrderRepository", "UserRepository", "ClubRepository",
+    "DatabaseFailover", "database_failover", "get_repositories",
+]
@@ -0,0 +1,116 @@
+"""
+Repository interfaces
+Backend-agnostic data access for orders, users and clubs.
+Records are plain dicts keyed by column name with Python-typed values
+(UUID, datetime, date), whichever backend produced them.
+"""
+import uuid
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Date, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+
+Record = Dict[str, Any]
+
+
+def model_to_record(instance) -> Record:
+    """Convert an ORM instance to a record dict"""
+    return {
+        column.key: getattr(instance, column.key)
+        for column in instance.__table__.columns
+    }
+
+
+def coerce_record(model, row: Dict[str, Any]) -> Record:
+    """
+    Convert a JSON row (e.g. from PostgREST) to a record dict
+    Values are parsed according to the model's column types
+    """
+    record = {}
+    for column in model.__table__.columns:
+        if column.key not in row:
+            continue
+        value = row[column.key]
+        if isinstance(value, str):
+            if isinstance(column.type, UUID):
+                value = uuid.UUID(value)
+            elif isinstance(column.type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif isinstance(column.type, Date):
+                value = date.fromisoformat(value)
+        record[column.key] = value
+    return record
+
+
+def encode_record(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert record values to JSON-compatible values"""
+    encoded = {}
+    for key, value in data.items():
+        if isinstance(value, uuid.UUID):
+            value = str(value)
+        elif isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        encoded[key] = value
+    return encoded
+
+
+class OrderRepository(ABC):
+    """Order data access"""
+
+    @abstractmethod
+    async def get(self, order_id: uuid.UUID) -> Optional[Record]:
+        ...
+
+    @abstractmethod
+    async def count_created_on(self, club_id: int, day: date) -> int:
+        """Count a club's orders created on a given day (for daily sequence)"""
+
+    @abstractmethod
+    async def list_for_user(self, user_id: uuid.UUID, status_id: int) -> List[Record]:
+        ...
+
+    @abstractmethod
+    async def create(self, data: Dict[str, Any]) -> Record:
+        ...
+
+    @abstractmethod
+    async def update(self, order_id: uuid.UUID, data: Dict[str, Any]) -> Optional[Record]:
+        ...
+
+
+class UserRepository(ABC):
+    """User data access"""
+
+    @abstractmethod
+    async def get(self, user_id: uuid.UUID) -> Optional[Record]:
+        ...
+
+    @abstractmethod
+    async def get_by_phone(self, phone: str) -> Optional[Record]:
+        ...
+
+
+class ClubRepository(ABC):
+    """Club data access"""
+
+    @abstractmethod
+    async def get(self, club_id: int) -> Optional[Record]:
+        ...
+
+
+class Repositories:
+    """Repositories of one backend, as injected into routes"""
+
+    def __init__(
+        self,
+        orders: OrderRepository,
+        users: UserRepository,
+        clubs: ClubRepository,
+        backend: str,
+    ):
+        self.orders = orders
+        self.users = users
+        self.clubs = clubs
+        self.backend = backend
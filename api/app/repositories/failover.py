@@ -0,0 +1,178 @@
+"""
+Database failover
+Routes repository calls to PostgreSQL and falls back to PostgREST while the
+connection pool cannot reach the database, switching back once it recovers.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from fastapi import Depends
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, DisconnectionError, InterfaceError, OperationalError, SQLAlchemyError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.database import engine, get_db
+from .base import Repositories
+from .rest import rest_repositories
+from .sql import sql_repositories
+
+logger = logging.getLogger(__name__)
+
+# SQLSTATEs of a lost or refused connection: class 08 and server shutdown
+DISCONNECT_SQLSTATES = ("08", "57P01", "57P02", "57P03")
+
+# Repository methods that only read, and so may be replayed on the fallback
+READ_METHODS = frozenset({"get", "count_created_on", "list_for_user", "get_by_phone"})
+
+# Errors a call can fail with before reaching the database: the DBAPI's,
+# and the pool's own (no connection free within pool_timeout, or none
+# that survives pre-ping)
+CONNECT_ERRORS = (DBAPIError, PoolTimeoutError, DisconnectionError)
+
+
+def is_connection_error(error: Exception) -> bool:
+    """
+    Whether error means "database unreachable", as opposed to a failed statement
+
+    OperationalError also covers statement timeouts, deadlocks and
+    serialization failures, which must not switch the worker to PostgREST.
+    Disconnects are recognized by SQLAlchemy's invalidation of the connection
+    or by their SQLSTATE; errors that never reached a server have none. Pool
+    exhaustion and pool-level disconnects count as unreachable too.
+    """
+    if isinstance(error, (PoolTimeoutError, DisconnectionError)):
+        return True
+    if not isinstance(error, (OperationalError, InterfaceError)):
+        return False
+    if error.connection_invalidated:
+        return True
+    sqlstate = getattr(error.orig, "pgcode", None) or getattr(error.orig, "sqlstate", None)
+    return sqlstate is None or sqlstate.startswith(DISCONNECT_SQLSTATES)
+
+
+class DatabaseFailover:
+    """
+    Health-driven switch between the primary and fallback backends
+    
+    The primary is marked down when a call fails with a connection error.
+    While down, calls go to the fallback and the primary is probed with
+    SELECT 1 at most once per probe_interval seconds; the first successful
+    probe switches traffic back.
+    """
+    
+    def __init__(self, probe_interval: float, enabled: bool = True):
+        self.probe_interval = probe_interval
+        self.enabled = enabled
+        self.primary_healthy = True
+        self.last_probe = 0.0
+        self.last_error: Optional[str] = None
+        self.failovers = 0
+    
+    @property
+    def active_backend(self) -> str:
+        return "postgresql" if self.primary_healthy else "postgrest"
+    
+    def mark_down(self, error: Exception):
+        """Switch to the fallback backend"""
+        if self.primary_healthy:
+            logger.warning("Database unreachable, failing over to PostgREST: %s", error)
+            self.failovers += 1
+        self.primary_healthy = False
+        self.last_error = str(error)
+        self.last_probe = time.monotonic()
+    
+    async def probe(self) -> bool:
+        """Check the primary if it is down and the probe interval has elapsed"""
+        if self.primary_healthy:
+            return True
+        now = time.monotonic()
+        if now - self.last_probe < self.probe_interval:
+            return False
+        self.last_probe = now
+        try:
+            # Connecting to a dead host can block for the connect timeout
+            await asyncio.to_thread(self._ping)
+        except CONNECT_ERRORS as e:
+            self.last_error = str(e)
+            return False
+        logger.info("Database reachable again, switching back from PostgREST")
+        self.primary_healthy = True
+        self.last_error = None
+        return True
+    
+    @staticmethod
+    def _ping():
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    
+    def status(self) -> dict:
+        return {
+            "active_backend": self.active_backend,
+            "failover_enabled": self.enabled,
+            "failovers": self.failovers,
+            "last_error": self.last_error,
+        }
+
+
+class _FailoverRepository:
+    """
+    Proxy calling the primary repository, or the fallback when it is down
+    
+    A read that fails with a connection error is replayed on the fallback. A
+    write is not: it may have been committed before the connection was lost
+    (e.g. while refreshing the row), and replaying it would apply it twice.
+    The error is raised, and later writes go to the fallback directly.
+    """
+    
+    def __init__(self, primary, fallback, failover: DatabaseFailover, db: Session):
+        self._primary = primary
+        self._fallback = fallback
+        self._failover = failover
+        self._db = db
+    
+    def __getattr__(self, name):
+        primary_method = getattr(self._primary, name)
+        fallback_method = getattr(self._fallback, name)
+        
+        async def call(*args, **kwargs):
+            if await self._failover.probe():
+                try:
+                    return await primary_method(*args, **kwargs)
+                except CONNECT_ERRORS as e:
+                    if not is_connection_error(e):
+                        raise
+                    self._failover.mark_down(e)
+                    try:
+                        self._db.rollback()
+                    except SQLAlchemyError:
+                        pass
+                    if name not in READ_METHODS:
+                        raise
+            return await fallback_method(*args, **kwargs)
+        
+        return call
+
+
+database_failover = DatabaseFailover(
+    probe_interval=settings.DB_FAILOVER_PROBE_INTERVAL,
+    enabled=settings.DB_FAILOVER_ENABLED,
+)
+
+
+def get_repositories(db: Session = Depends(get_db)) -> Repositories:
+    """Dependency providing order, user and club repositories with failover"""
+    primary = sql_repositories(db)
+    if not database_failover.enabled:
+        return primary
+    
+    fallback = rest_repositories()
+    return Repositories(
+        orders=_FailoverRepository(primary.orders, fallback.orders, database_failover, db),
+        users=_FailoverRepository(primary.users, fallback.users, database_failover, db),
+        clubs=_FailoverRepository(primary.clubs, fallback.clubs, database_failover, db),
+        backend=database_failover.active_backend,
+    )
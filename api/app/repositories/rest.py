@@ -0,0 +1,97 @@
+"""
+PostgREST repositories
+Fallback backend: Supabase REST API, used while direct PostgreSQL is unreachable
+"""
+import uuid
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from ..models.club import Club
+from ..models.order import Order
+from ..models.user import User
+from ..services.supabase_client import SupabaseClient, SupabaseError, supabase_client
+from .base import (
+    ClubRepository, OrderRepository, Record, Repositories, UserRepository,
+    coerce_record, encode_record,
+)
+
+
+async def _select_one(
+    client: SupabaseClient, model, filters: Dict[str, Any]
+) -> Optional[Record]:
+    """Fetch a single row as a record, None if missing"""
+    result = await client.select(
+        model.__tablename__, filters=encode_record(filters), limit=1
+    )
+    if not result.get("success"):
+        raise SupabaseError(result.get("error"))
+    rows = result.get("data") or []
+    return coerce_record(model, rows[0]) if rows else None
+
+
+class RestOrderRepository(OrderRepository):
+    def __init__(self, client: SupabaseClient):
+        self.client = client
+
+    async def get(self, order_id: uuid.UUID) -> Optional[Record]:
+        return await _select_one(self.client, Order, {"id": order_id})
+
+    async def count_created_on(self, club_id: int, day: date) -> int:
+        total = await self.client.count(
+            "orders", filters={"created_date": day.isoformat(), "club_id": club_id}
+        )
+        if total is None:
+            raise SupabaseError("Failed to count orders")
+        return total
+
+    async def list_for_user(self, user_id: uuid.UUID, status_id: int) -> List[Record]:
+        result = await self.client.select(
+            "orders", filters={"user_id": str(user_id), "status_id": status_id}
+        )
+        if not result.get("success"):
+            raise SupabaseError(result.get("error"))
+        return [coerce_record(Order, row) for row in result.get("data") or []]
+
+    async def create(self, data: Dict[str, Any]) -> Record:
+        result = await self.client.insert("orders", encode_record(data))
+        if not result.get("success"):
+            raise SupabaseError(result.get("error"))
+        return coerce_record(Order, result["data"][0])
+
+    async def update(self, order_id: uuid.UUID, data: Dict[str, Any]) -> Optional[Record]:
+        result = await self.client.update(
+            "orders", encode_record(data), {"id": str(order_id)}
+        )
+        if not result.get("success"):
+            raise SupabaseError(result.get("error"))
+        rows = result.get("data") or []
+        return coerce_record(Order, rows[0]) if rows else None
+
+
+class RestUserRepository(UserRepository):
+    def __init__(self, client: SupabaseClient):
+        self.client = client
+
+    async def get(self, user_id: uuid.UUID) -> Optional[Record]:
+        return await _select_one(self.client, User, {"id": user_id})
+
+    async def get_by_phone(self, phone: str) -> Optional[Record]:
+        return await _select_one(self.client, User, {"phone": phone})
+
+
+class RestClubRepository(ClubRepository):
+    def __init__(self, client: SupabaseClient):
+        self.client = client
+
+    async def get(self, club_id: int) -> Optional[Record]:
+        return await _select_one(self.client, Club, {"id": club_id})
+
+
+def rest_repositories(client: SupabaseClient = supabase_client) -> Repositories:
+    """Repositories backed by the Supabase REST API"""
+    return Repositories(
+        orders=RestOrderRepository(client),
+        users=RestUserRepository(client),
+        clubs=RestClubRepository(client),
+        backend="postgrest",
+    )
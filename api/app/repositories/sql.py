@@ -0,0 +1,88 @@
+"""
+SQLAlchemy repositories
+Primary backend: direct PostgreSQL through the request's Session
+"""
+import uuid
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from ..models.club import Club
+from ..models.order import Order
+from ..models.user import User
+from .base import (
+    ClubRepository, OrderRepository, Record, Repositories, UserRepository,
+    model_to_record,
+)
+
+
+class SqlOrderRepository(OrderRepository):
+    def __init__(self, db: Session):
+        self.db = db
+
+    async def get(self, order_id: uuid.UUID) -> Optional[Record]:
+        order = self.db.query(Order).filter(Order.id == order_id).first()
+        return model_to_record(order) if order else None
+
+    async def count_created_on(self, club_id: int, day: date) -> int:
+        return self.db.query(Order).filter(
+            Order.created_date == day,
+            Order.club_id == club_id
+        ).count()
+
+    async def list_for_user(self, user_id: uuid.UUID, status_id: int) -> List[Record]:
+        orders = self.db.query(Order).filter(
+            Order.user_id == user_id,
+            Order.status_id == status_id
+        ).all()
+        return [model_to_record(order) for order in orders]
+
+    async def create(self, data: Dict[str, Any]) -> Record:
+        order = Order(**data)
+        self.db.add(order)
+        self.db.commit()
+        self.db.refresh(order)
+        return model_to_record(order)
+
+    async def update(self, order_id: uuid.UUID, data: Dict[str, Any]) -> Optional[Record]:
+        order = self.db.query(Order).filter(Order.id == order_id).first()
+        if not order:
+            return None
+        for field, value in data.items():
+            setattr(order, field, value)
+        self.db.commit()
+        self.db.refresh(order)
+        return model_to_record(order)
+
+
+class SqlUserRepository(UserRepository):
+    def __init__(self, db: Session):
+        self.db = db
+
+    async def get(self, user_id: uuid.UUID) -> Optional[Record]:
+        user = self.db.query(User).filter(User.id == user_id).first()
+        return model_to_record(user) if user else None
+
+    async def get_by_phone(self, phone: str) -> Optional[Record]:
+        user = self.db.query(User).filter(User.phone == phone).first()
+        return model_to_record(user) if user else None
+
+
+class SqlClubRepository(ClubRepository):
+    def __init__(self, db: Session):
+        self.db = db
+
+    async def get(self, club_id: int) -> Optional[Record]:
+        club = self.db.query(Club).filter(Club.id == club_id).first()
+        return model_to_record(club) if club else None
+
+
+def sql_repositories(db: Session) -> Repositories:
+    """Repositories backed by a SQLAlchemy session"""
+    return Repositories(
+        orders=SqlOrderRepository(db),
+        users=SqlUserRepository(db),
+        clubs=SqlClubRepository(db),
+        backend="postgresql",
+    )
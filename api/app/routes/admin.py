@@ -2,15 +2,20 @@
 Admin Panel Routes
 Endpoints for admin dashboard and management
 """
+import csv
+import io
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, union
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Iterator
 from uuid import UUID
 from datetime import datetime, date
 
-from ..core.database import get_db
-from ..core.security import get_current_user
+from ..core.database import get_db, SessionLocal
+from ..core.responses import ListSerializer
+from ..core.security import get_current_admin, get_current_user
 from ..models.user import User
 from ..models.order import Order
 from ..models.club import Club
@@ -21,6 +26,23 @@ from ..services.supabase_client import supabase_client
 router = APIRouter(prefix="/admin", tags=["Admin Panel"])
 
 
+# Trigram indexes can't serve substring matches shorter than a trigram
+MIN_PHONE_SEARCH_DIGITS = 3
+
+
+def phone_search_digits(search: str) -> str:
+    """
+    Digits of a phone-like search term, matched against users.phone_digits
+    Returns an empty string for terms containing letters (names, order
+    numbers) or fewer than MIN_PHONE_SEARCH_DIGITS digits, which would
+    scan every user
+    """
+    if any(ch.isalpha() for ch in search):
+        return ""
+    digits = ''.join(filter(str.isdigit, search))
+    return digits if len(digits) >= MIN_PHONE_SEARCH_DIGITS else ""
+
+
 # ===========================================
 # Dashboard Stats
 # ===========================================
@@ -124,6 +146,9 @@ class OrderListItem(BaseModel):
     created_at: Optional[datetime]
 
 
+order_list_serializer = ListSerializer(OrderListItem)
+
+
 @router.get("/orders", response_model=List[OrderListItem])
 async def list_orders_admin(
     club_id: Optional[int] = None,
@@ -143,11 +168,18 @@ async def list_orders_admin(
         query = query.filter(Order.status_id == status_id)
     
     if search:
-        # Search by order number or user phone
-        query = query.filter(
-            (Order.order_number.ilike(f"%{search}%")) |
-            (Order.user.has(User.phone.ilike(f"%{search}%")))
-        )
+        # Search by order number or user phone; each branch is served by its
+        # own trigram index and the matching ids are unioned
+        matches = select(Order.id).where(Order.order_number.ilike(f"%{search}%"))
+        digits = phone_search_digits(search)
+        if digits:
+            matches = union(
+                matches,
+                select(Order.id).join(User, Order.user_id == User.id).where(
+                    User.phone_digits.like(f"%{digits}%")
+                ),
+            )
+        query = query.filter(Order.id.in_(matches))
     
     orders = query.order_by(Order.created_at.desc()).offset(skip).limit(limit).all()
     
@@ -155,7 +187,7 @@ async def list_orders_admin(
     statuses = db.query(DimStatusType).all()
     status_map = {s.id: s.name for s in statuses}
     
-    return [
+    return order_list_serializer.response(
         OrderListItem(
             id=order.id,
             order_number=order.order_number,
@@ -168,7 +200,7 @@ async def list_orders_admin(
             created_at=order.created_at
         )
         for order in orders
-    ]
+    )
 
 
 @router.post("/orders/{order_id}/update-status")
@@ -241,10 +273,11 @@ async def list_users_admin(
         query = query.filter(User.club_id == club_id)
     
     if search:
-        query = query.filter(
-            (User.username.ilike(f"%{search}%")) |
-            (User.phone.ilike(f"%{search}%"))
-        )
+        condition = User.username.ilike(f"%{search}%")
+        digits = phone_search_digits(search)
+        if digits:
+            condition = condition | User.phone_digits.like(f"%{digits}%")
+        query = query.filter(condition)
     
     results = query.offset(skip).limit(limit).all()
     
@@ -323,24 +356,122 @@ async def list_statuses_admin(db: Session = Depends(get_db)):
 # ===========================================
 
 @router.get("/reports/orders-summary")
-async def get_orders_summary_from_supabase():
-    """Get orders summary from production Supabase"""
-    orders = await supabase_client.get_orders()
-    statuses = await supabase_client.get_statuses()
+async def get_orders_summary_from_supabase(club_id: Optional[int] = None):
+    """Get orders summary from production Supabase (aggregated in the database)"""
+    rows = await supabase_client.get_orders_summary(club_id)
     
-    status_map = {s["id"]: s["name"] for s in statuses}
-    
-    # Group by status
     summary = {}
-    for order in orders:
-        status_name = status_map.get(order["status_id"], "Unknown")
-        if status_name not in summary:
-            summary[status_name] = {"count": 0, "total_revenue": 0}
-        summary[status_name]["count"] += 1
-        summary[status_name]["total_revenue"] += order.get("price", 0) or 0
+    for row in rows:
+        entry = summary.setdefault(
+            row["status_name"], {"count": 0, "total_revenue": 0}
+        )
+        entry["count"] += row["order_count"]
+        entry["total_revenue"] += row["total_revenue"] or 0
     
     return {
-        "total_orders": len(orders),
+        "total_orders": sum(row["order_count"] for row in rows),
         "by_status": summary,
         "source": "production_supabase"
     }
+
+
+# ===========================================
+# Exports (streamed for accounting)
+# ===========================================
+
+EXPORT_BATCH_SIZE = 1000
+
+ORDER_EXPORT_HEADER = [
+    "order_number", "created_at", "created_date", "club_code", "club_name",
+    "status", "username", "phone", "price", "is_tariff_based", "tariff_price",
+    "package_id",
+]
+
+
+# Leading characters that make spreadsheets evaluate a cell as a formula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_cell(value):
+    """Neutralize user-controlled text a spreadsheet would run as a formula"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _iter_orders_csv(
+    club_id: Optional[int],
+    status_id: Optional[int],
+    date_from: Optional[date],
+    date_to: Optional[date],
+) -> Iterator[str]:
+    """
+    Yield CSV chunks for orders matching the filters
+    Rows come from a server-side cursor, so memory stays constant
+    regardless of how many orders are exported
+    """
+    # Own session: the response body is produced after the route has returned
+    db = SessionLocal()
+    try:
+        query = db.query(
+            Order.order_number,
+            Order.created_at,
+            Order.created_date,
+            Club.code,
+            Club.name,
+            DimStatusType.name,
+            User.username,
+            User.phone,
+            Order.price,
+            Order.is_tariff_based,
+            Order.tariff_price,
+            Order.package_id,
+        ).outerjoin(
+            Club, Order.club_id == Club.id
+        ).outerjoin(
+            DimStatusType, Order.status_id == DimStatusType.id
+        ).outerjoin(
+            User, Order.user_id == User.id
+        )
+        
+        if club_id:
+            query = query.filter(Order.club_id == club_id)
+        if status_id:
+            query = query.filter(Order.status_id == status_id)
+        if date_from:
+            query = query.filter(Order.created_date >= date_from)
+        if date_to:
+            query = query.filter(Order.created_date <= date_to)
+        
+        rows = query.order_by(Order.created_at).yield_per(EXPORT_BATCH_SIZE)
+        
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(ORDER_EXPORT_HEADER)
+        
+        for count, row in enumerate(rows, start=1):
+            writer.writerow([_csv_cell(value) for value in row])
+            if count % EXPORT_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        
+        yield buffer.getvalue()
+    finally:
+        db.close()
+
+
+@router.get("/exports/orders.csv", dependencies=[Depends(get_current_admin)])
+async def export_orders_csv(
+    club_id: Optional[int] = None,
+    status_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+):
+    """Export orders with club, status and client names as streamed CSV"""
+    filename = f"orders_{date_from or 'all'}_{date_to or 'all'}.csv"
+    return StreamingResponse(
+        _iter_orders_csv(club_id, status_id, date_from, date_to),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
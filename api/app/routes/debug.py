@@ -0,0 +1,87 @@
+"""
+Debug Routes
+Admin-only diagnostics for live workers
+"""
+import os
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from typing import Optional
+
+from ..core.config import settings
+from ..core.profiling import profiler
+from ..core.slow_queries import slow_query_log
+from ..core.security import get_current_admin
+
+router = APIRouter(
+    prefix="/admin/debug",
+    tags=["Debug"],
+    dependencies=[Depends(get_current_admin)],
+)
+
+
+@router.post("/profile")
+async def start_profile(seconds: float = 10, route: Optional[str] = None):
+    """
+    Start a wall-clock sampling profile of the worker handling this request
+    
+    Args:
+        seconds: How long to sample
+        route: Only sample while requests under this path prefix are running
+               (e.g. /api/v1/laundry)
+    """
+    if not 0 < seconds <= settings.PROFILER_MAX_SECONDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"seconds must be between 0 and {settings.PROFILER_MAX_SECONDS:g}"
+        )
+    
+    try:
+        path = profiler.start(seconds, route_prefix=route)
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    
+    return {
+        "success": True,
+        "pid": os.getpid(),
+        "seconds": seconds,
+        "route": route,
+        "output": os.path.basename(path)
+    }
+
+
+@router.get("/profile")
+async def get_profile_status():
+    """Status of the profiler in this worker"""
+    return profiler.status()
+
+
+@router.get("/profiles/{name}")
+async def download_profile(name: str):
+    """Download a speedscope profile written by this host"""
+    path = os.path.join(settings.PROFILER_OUTPUT_DIR, os.path.basename(name))
+    if not name.endswith(".speedscope.json") or not os.path.isfile(path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return FileResponse(path, media_type="application/json", filename=os.path.basename(path))
+
+
+@router.get("/slow-queries")
+async def list_slow_queries(limit: int = 50, with_plans: bool = True):
+    """Slow statements recorded by this worker, slowest first"""
+    entries = slow_query_log.get_entries(limit)
+    if not with_plans:
+        entries = [{k: v for k, v in e.items() if k != "plan"} for e in entries]
+    return {
+        "threshold_ms": settings.SLOW_QUERY_THRESHOLD_MS,
+        "pid": os.getpid(),
+        "entries": entries
+    }
+
+
+@router.delete("/slow-queries")
+async def clear_slow_queries():
+    """Clear the slow-query log of this worker"""
+    slow_query_log.clear()
+    return {"success": True}
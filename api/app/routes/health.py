@@ -2,6 +2,9 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from ..core.database import get_db
+from ..core.resilience import OPEN, circuit_breakers, rate_limiters
+from ..jobs.scheduler import scheduler
+from ..repositories import database_failover
 
 router = APIRouter(tags=["Health"])
 
@@ -17,6 +20,29 @@ async def database_health(db: Session = Depends(get_db)):
     """Database connection health check"""
     try:
         db.execute(text("SELECT 1"))
-        return {"status": "healthy", "database": "connected"}
+        return {"status": "healthy", "database": "connected", "failover": database_failover.status()}
     except Exception as e:
-        return {"status": "unhealthy", "database": "disconnected", "error": str(e)}
+        return {
+            "status": "unhealthy",
+            "database": "disconnected",
+            "error": str(e),
+            "failover": database_failover.status()
+        }
+
+
+@router.get("/health/providers")
+async def providers_health():
+    """Circuit breaker and rate-limiter state of external providers (degraded while a breaker is open)"""
+    providers = {name: breaker.status() for name, breaker in circuit_breakers.items()}
+    degraded = any(provider["state"] == OPEN for provider in providers.values())
+    return {
+        "status": "degraded" if degraded else "healthy",
+        "providers": providers,
+        "rate_limiters": {name: limiter.status() for name, limiter in rate_limiters.items()},
+    }
+
+
+@router.get("/health/scheduler")
+async def scheduler_health():
+    """Whether this process is the scheduler leader, and the state of its jobs"""
+    return scheduler.status()
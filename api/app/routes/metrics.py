@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Response
+
+from ..core.metrics import METRICS_CONTENT_TYPE, metrics_response_body
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(content=metrics_response_body(), media_type=METRICS_CONTENT_TYPE)
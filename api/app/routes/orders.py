@@ -1,16 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select, true
+from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
 
 from ..core.database import get_db
+from ..core.responses import ListSerializer
 from ..core.security import get_current_user
 from ..models.order import Order
 from ..models.user import User
+from ..models.club import Club
+from ..models.status import DimStatusType
+from ..models.subscription import DimSubscriptionType
+from ..models.rating import ClientRating
 from ..schemas.order import OrderCreate, OrderUpdate, OrderResponse, OrderWithDetails, PickupCodeVerify
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
+order_details_serializer = ListSerializer(OrderWithDetails)
+
 
 @router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
 async def create_order(
@@ -57,10 +65,37 @@ async def list_orders_with_details(
     db: Session = Depends(get_db)
 ):
     """List orders with user and status details"""
-    query = db.query(Order).options(
-        joinedload(Order.user),
-        joinedload(Order.club),
-        joinedload(Order.status_type)
+    # Latest rating per order, evaluated once per selected row
+    latest_rating = (
+        select(ClientRating.rating, ClientRating.comment)
+        .where(ClientRating.order_id == Order.id)
+        .order_by(ClientRating.created_at.desc())
+        .limit(1)
+        .lateral("latest_rating")
+    )
+    
+    # Select exactly the OrderWithDetails columns in a single statement
+    query = db.query(
+        *[getattr(Order, field) for field in OrderResponse.model_fields],
+        User.username,
+        User.phone,
+        DimSubscriptionType.name.label("subscription_type"),
+        DimStatusType.name.label("status_name"),
+        DimStatusType.code.label("status_code"),
+        Club.name.label("club_name"),
+        Club.code.label("club_code"),
+        latest_rating.c.rating,
+        latest_rating.c.comment.label("rating_comment"),
+    ).outerjoin(
+        User, Order.user_id == User.id
+    ).outerjoin(
+        DimSubscriptionType, User.subscription_id == DimSubscriptionType.id
+    ).outerjoin(
+        DimStatusType, Order.status_id == DimStatusType.id
+    ).outerjoin(
+        Club, Order.club_id == Club.id
+    ).outerjoin(
+        latest_rating, true()
     )
     
     if club_id:
@@ -68,21 +103,9 @@ async def list_orders_with_details(
     if status_id:
         query = query.filter(Order.status_id == status_id)
     
-    orders = query.order_by(Order.created_at.desc()).offset(skip).limit(limit).all()
-    
-    result = []
-    for order in orders:
-        order_dict = OrderResponse.model_validate(order).model_dump()
-        order_dict["username"] = order.user.username if order.user else None
-        order_dict["phone"] = order.user.phone if order.user else None
-        order_dict["subscription_type"] = order.user.subscription_type.name if order.user and order.user.subscription_type else None
-        order_dict["status_name"] = order.status_type.name if order.status_type else None
-        order_dict["status_code"] = order.status_type.code if order.status_type else None
-        order_dict["club_name"] = order.club.name if order.club else None
-        order_dict["club_code"] = order.club.code if order.club else None
-        result.append(OrderWithDetails(**order_dict))
+    rows = query.order_by(Order.created_at.desc()).offset(skip).limit(limit).all()
     
-    return result
+    return order_details_serializer.response(row._mapping for row in rows)
 
 
 @router.get("/{order_id}", response_model=OrderResponse)
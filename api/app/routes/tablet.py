@@ -18,9 +18,9 @@ from ..core.security import get_password_hash, verify_password, create_access_to
 from ..core.utils import generate_verification_code, generate_order_number, generate_pickup_code
 from ..models.user import User
 from ..models.order import Order
-from ..models.club import Club
 from ..models.rating import ClientRating
 from ..models.subscription import DimSubscriptionType
+from ..repositories import Repositories, get_repositories
 from ..services.whatsapp import whatsapp_service
 
 router = APIRouter(prefix="/tablet", tags=["Tablet App"])
@@ -96,18 +96,18 @@ _verification_codes: dict = {}
 # ===========================================
 
 @router.post("/check-phone")
-async def check_phone(request: PhoneCheckRequest, db: Session = Depends(get_db)):
+async def check_phone(request: PhoneCheckRequest, repos: Repositories = Depends(get_repositories)):
     """
     Check if phone is registered
     Returns whether user exists and has PIN set
     """
     phone = request.phone.strip()
-    user = db.query(User).filter(User.phone == phone).first()
+    user = await repos.users.get_by_phone(phone)
     
     return {
         "exists": user is not None,
-        "has_pin": user.pin_code is not None if user else False,
-        "username": user.username if user else None
+        "has_pin": user["pin_code"] is not None if user else False,
+        "username": user["username"] if user else None
     }
 
 
@@ -212,13 +212,13 @@ async def register_user(request: RegisterRequest, db: Session = Depends(get_db))
 
 
 @router.post("/login")
-async def login_user(request: LoginRequest, db: Session = Depends(get_db)):
+async def login_user(request: LoginRequest, repos: Repositories = Depends(get_repositories)):
     """
     Login with phone and PIN
     """
     phone = request.phone.strip()
     
-    user = db.query(User).filter(User.phone == phone).first()
+    user = await repos.users.get_by_phone(phone)
     
     if not user:
         raise HTTPException(
@@ -226,27 +226,27 @@ async def login_user(request: LoginRequest, db: Session = Depends(get_db)):
             detail="Неверные данные"
         )
     
-    if not user.pin_code:
+    if not user["pin_code"]:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="PIN не установлен"
         )
     
-    if not verify_password(request.pin_code, user.pin_code):
+    if not verify_password(request.pin_code, user["pin_code"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверный PIN"
         )
     
     # Create token
-    token = create_access_token(data={"sub": str(user.id)})
+    token = create_access_token(data={"sub": str(user["id"])})
     
     return {
         "success": True,
-        "user_id": str(user.id),
-        "username": user.username,
-        "club_id": user.club_id,
-        "subscription_id": user.subscription_id,
+        "user_id": str(user["id"]),
+        "username": user["username"],
+        "club_id": user["club_id"],
+        "subscription_id": user["subscription_id"],
         "access_token": token
     }
 
@@ -313,7 +313,7 @@ async def get_available_subscriptions(db: Session = Depends(get_db)):
 
 
 @router.post("/drop-off")
-async def create_drop_off_order(request: DropOffRequest, db: Session = Depends(get_db)):
+async def create_drop_off_order(request: DropOffRequest, repos: Repositories = Depends(get_repositories)):
     """
     Create order when client drops off dirty items
     Called after tablet app opens locker and client closes it
@@ -327,7 +327,7 @@ async def create_drop_off_order(request: DropOffRequest, db: Session = Depends(g
     6. WhatsApp notification sent to client
     """
     # Verify user exists
-    user = db.query(User).filter(User.id == request.user_id).first()
+    user = await repos.users.get(request.user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -335,15 +335,12 @@ async def create_drop_off_order(request: DropOffRequest, db: Session = Depends(g
         )
     
     # Get club for order number generation
-    club = db.query(Club).filter(Club.id == request.club_id).first()
-    club_code = club.code.upper() if club else "UNK"
+    club = await repos.clubs.get(request.club_id)
+    club_code = club["code"].upper() if club else "UNK"
     
     # Get today's sequence number
     today = date.today()
-    today_orders = db.query(Order).filter(
-        Order.created_date == today,
-        Order.club_id == request.club_id
-    ).count()
+    today_orders = await repos.orders.count_created_on(request.club_id, today)
     sequence = today_orders + 1
     
     # Generate order number
@@ -353,34 +350,31 @@ async def create_drop_off_order(request: DropOffRequest, db: Session = Depends(g
     pickup_code = generate_pickup_code()
     
     # Create order
-    order = Order(
-        user_id=request.user_id,
-        club_id=request.club_id,
-        status_id=STATUS_PENDING,  # Waiting for courier
-        order_number=order_number,
-        daily_sequence=sequence,
-        created_date=today,
-        locker_cell_id=request.locker_cell_id,
-        locker_device_id=request.locker_device_id,
-        comment=request.comment,
-        is_tariff_based=request.is_tariff_based,
-        price=request.price or 0,
-        pickup_code=pickup_code
-    )
-    db.add(order)
-    db.commit()
-    db.refresh(order)
+    order = await repos.orders.create({
+        "user_id": request.user_id,
+        "club_id": request.club_id,
+        "status_id": STATUS_PENDING,  # Waiting for courier
+        "order_number": order_number,
+        "daily_sequence": sequence,
+        "created_date": today,
+        "locker_cell_id": request.locker_cell_id,
+        "locker_device_id": request.locker_device_id,
+        "comment": request.comment,
+        "is_tariff_based": request.is_tariff_based,
+        "price": request.price or 0,
+        "pickup_code": pickup_code
+    })
     
     # Send WhatsApp notification
-    if user.phone:
+    if user["phone"]:
         await whatsapp_service.notify_order_accepted(
-            phone=user.phone,
+            phone=user["phone"],
             order_number=order_number
         )
     
     return {
         "success": True,
-        "order_id": str(order.id),
+        "order_id": str(order["id"]),
         "order_number": order_number,
         "pickup_code": pickup_code,
         "status": "pending",
@@ -393,28 +387,25 @@ async def create_drop_off_order(request: DropOffRequest, db: Session = Depends(g
 # ===========================================
 
 @router.get("/user/{user_id}/ready-orders")
-async def get_ready_orders(user_id: UUID, db: Session = Depends(get_db)):
+async def get_ready_orders(user_id: UUID, repos: Repositories = Depends(get_repositories)):
     """
     Get orders ready for pickup for this user
     """
-    orders = db.query(Order).filter(
-        Order.user_id == user_id,
-        Order.status_id == STATUS_READY_FOR_PICKUP
-    ).all()
+    orders = await repos.orders.list_for_user(user_id, STATUS_READY_FOR_PICKUP)
     
     return [
         {
-            "id": str(order.id),
-            "order_number": order.order_number,
-            "locker_cell_id": order.locker_cell_id,
-            "created_at": order.created_at.isoformat() if order.created_at else None
+            "id": str(order["id"]),
+            "order_number": order["order_number"],
+            "locker_cell_id": order["locker_cell_id"],
+            "created_at": order["created_at"].isoformat() if order["created_at"] else None
         }
         for order in orders
     ]
 
 
 @router.post("/pickup")
-async def complete_pickup(request: PickupRequest, db: Session = Depends(get_db)):
+async def complete_pickup(request: PickupRequest, repos: Repositories = Depends(get_repositories)):
     """
     Complete order pickup
     Called after client retrieves items from locker
@@ -428,36 +419,37 @@ async def complete_pickup(request: PickupRequest, db: Session = Depends(get_db))
     6. Rating prompt shown
     7. WhatsApp notification sent
     """
-    order = db.query(Order).filter(Order.id == request.order_id).first()
+    order = await repos.orders.get(request.order_id)
     if not order:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Заказ не найден"
         )
     
-    if order.user_id != request.user_id:
+    if order["user_id"] != request.user_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Это не ваш заказ"
         )
     
-    if order.status_id != STATUS_READY_FOR_PICKUP:
+    if order["status_id"] != STATUS_READY_FOR_PICKUP:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Заказ не готов к выдаче"
         )
     
     # Update status
-    order.status_id = STATUS_COMPLETED
-    order.locker_cell_id = None  # Cell is now free
-    db.commit()
+    await repos.orders.update(request.order_id, {
+        "status_id": STATUS_COMPLETED,
+        "locker_cell_id": None  # Cell is now free
+    })
     
     # Send completion notification
-    user = db.query(User).filter(User.id == request.user_id).first()
-    if user and user.phone:
+    user = await repos.users.get(request.user_id)
+    if user and user["phone"]:
         await whatsapp_service.notify_order_completed(
-            phone=user.phone,
-            order_number=order.order_number or str(order.id)[:8]
+            phone=user["phone"],
+            order_number=order["order_number"] or str(order["id"])[:8]
         )
     
     # Check if user is running low on subscription
@@ -466,8 +458,8 @@ async def complete_pickup(request: PickupRequest, db: Session = Depends(get_db))
     
     return {
         "success": True,
-        "order_id": str(order.id),
-        "order_number": order.order_number,
+        "order_id": str(order["id"]),
+        "order_number": order["order_number"],
         "status": "completed",
         "show_rating_prompt": True,
         "subscription_warning": remaining_washes is not None and remaining_washes <= 1,
@@ -561,11 +553,11 @@ async def report_issue(request: IssueReportRequest, db: Session = Depends(get_db
 # ===========================================
 
 @router.get("/club/{club_id}")
-async def get_club_info(club_id: int, db: Session = Depends(get_db)):
+async def get_club_info(club_id: int, repos: Repositories = Depends(get_repositories)):
     """
     Get club information for tablet display
     """
-    club = db.query(Club).filter(Club.id == club_id).first()
+    club = await repos.clubs.get(club_id)
     if not club:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -573,7 +565,7 @@ async def get_club_info(club_id: int, db: Session = Depends(get_db)):
         )
     
     return {
-        "id": club.id,
-        "code": club.code,
-        "name": club.name
+        "id": club["id"],
+        "code": club["code"],
+        "name": club["name"]
     }
@@ -63,7 +63,8 @@ async def create_user(user_data: UserCreate, db: Session = Depends(get_db)):
         chat_id=user_data.chat_id,
         club_id=user_data.club_id,
         subscription_id=user_data.subscription_id,
-        role=user_data.role or 'client',
+        # Unauthenticated endpoint: roles are never taken from the request
+        role='client',
     )
     
     # Hash PIN if provided
@@ -97,7 +98,8 @@ async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
         chat_id=user_data.chat_id,
         club_id=user_data.club_id,
         subscription_id=user_data.subscription_id,
-        role=user_data.role or 'client',
+        # Unauthenticated endpoint: roles are never taken from the request
+        role='client',
     )
     
     # Hash PIN if provided
@@ -2,18 +2,22 @@
 WhatsApp Notification Routes
 Endpoints for sending WhatsApp notifications and verification codes
 """
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+import hmac
+
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Request
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional
 from uuid import UUID
 
+from ..core.config import settings
 from ..core.database import get_db
 from ..core.utils import generate_verification_code
+from ..services.notification_log import notification_log_writer
 from ..services.whatsapp import whatsapp_service
+from ..services.whatsapp_webhooks import webhook_ingestor
 from ..models.order import Order
 from ..models.user import User
-from ..models.notification import NotificationLog
 
 router = APIRouter(prefix="/whatsapp", tags=["WhatsApp"])
 
@@ -108,15 +112,31 @@ async def send_order_notification(
     cell_number = order.locker_cell_id or "N/A"
     bag_number = order.package_id or "N/A"
     
+    # Logged once the (possibly coalesced) message has actually been sent
+    def log_result(result: dict, message: str):
+        notification_log_writer.add(
+            user_id=user.id,
+            order_id=order.id,
+            notification_type=f"order_{request.notification_type}",
+            result=result,
+            message=message,
+        )
+    
     # Send appropriate notification based on type
     notification_map = {
-        "accepted": lambda: whatsapp_service.notify_order_accepted(user.phone, order_number),
-        "received": lambda: whatsapp_service.notify_items_received_at_laundry(user.phone, order_number, bag_number),
-        "washed": lambda: whatsapp_service.notify_items_washed(user.phone, order_number),
-        "ready": lambda: whatsapp_service.notify_ready_for_pickup(user.phone, order_number, club_name, cell_number),
-        "completed": lambda: whatsapp_service.notify_order_completed(user.phone, order_number),
-        "reminder": lambda: whatsapp_service.notify_pickup_reminder(user.phone, order_number, cell_number),
-        "issue": lambda: whatsapp_service.notify_issue_reported(user.phone, order_number),
+        "accepted": lambda: whatsapp_service.notify_order_accepted(user.phone, order_number, log_result),
+        "received": lambda: whatsapp_service.notify_items_received_at_laundry(
+            user.phone, order_number, bag_number, log_result
+        ),
+        "washed": lambda: whatsapp_service.notify_items_washed(user.phone, order_number, log_result),
+        "ready": lambda: whatsapp_service.notify_ready_for_pickup(
+            user.phone, order_number, club_name, cell_number, log_result
+        ),
+        "completed": lambda: whatsapp_service.notify_order_completed(user.phone, order_number, log_result),
+        "reminder": lambda: whatsapp_service.notify_pickup_reminder(
+            user.phone, order_number, cell_number, on_result=log_result
+        ),
+        "issue": lambda: whatsapp_service.notify_issue_reported(user.phone, order_number, log_result),
     }
     
     if request.notification_type not in notification_map:
@@ -125,21 +145,7 @@ async def send_order_notification(
             detail=f"Invalid notification type: {request.notification_type}"
         )
     
-    result = await notification_map[request.notification_type]()
-    
-    # Log notification
-    log = NotificationLog(
-        user_id=user.id,
-        order_id=order.id,
-        notification_type=f"order_{request.notification_type}",
-        channel="whatsapp",
-        whatsapp_sent=result.get("success", False),
-        error_message=result.get("error")
-    )
-    db.add(log)
-    db.commit()
-    
-    return result
+    return await notification_map[request.notification_type]()
 
 
 @router.post("/report-issue")
@@ -170,25 +176,46 @@ async def notify_subscription_expiring(
     remaining_washes: int,
     user_id: Optional[UUID] = None,
     payment_link: Optional[str] = None,
-    db: Session = Depends(get_db)
 ):
     """Notify user about expiring subscription"""
-    result = await whatsapp_service.notify_subscription_expiring(
-        phone=phone,
-        remaining_washes=remaining_washes,
-        payment_link=payment_link
-    )
-    
-    # Log notification if user_id provided
-    if user_id:
-        log = NotificationLog(
+    def log_result(result: dict, message: str):
+        notification_log_writer.add(
             user_id=user_id,
             notification_type="subscription_expiring",
-            channel="whatsapp",
-            whatsapp_sent=result.get("success", False),
-            error_message=result.get("error")
+            result=result,
+            message=message,
         )
-        db.add(log)
-        db.commit()
     
-    return result
+    # Logged (if user_id provided) once the message has actually been sent
+    return await whatsapp_service.notify_subscription_expiring(
+        phone=phone,
+        remaining_washes=remaining_washes,
+        payment_link=payment_link,
+        on_result=log_result if user_id else None,
+    )
+
+
+@router.post("/webhook")
+async def ultramsg_webhook(request: Request, token: Optional[str] = None):
+    """
+    UltraMsg webhook: delivery acks and incoming client messages
+    
+    Events are only queued here and applied in batches in the background.
+    Configure the instance's webhook URL with ?token=ULTRAMSG_WEBHOOK_TOKEN;
+    without a configured token every call is refused.
+    """
+    if not settings.ULTRAMSG_WEBHOOK_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Webhook not configured")
+    if not hmac.compare_digest(token or "", settings.ULTRAMSG_WEBHOOK_TOKEN):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid webhook token")
+    
+    try:
+        event = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON")
+    if not isinstance(event, dict):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Expected a JSON object")
+    
+    if not webhook_ingestor.submit(event):
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Webhook queue full")
+    return {"success": True}
@@ -0,0 +1,120 @@
+"""
+Notification coalescing
+Holds customer notifications per recipient for a short window and sends
+them as one WhatsApp message, so quick successive status changes (received
+at laundry, then washed) or a batch of deliveries don't spam the client.
+"""
+import asyncio
+import itertools
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from ..core.metrics import NOTIFICATIONS_COALESCED
+
+logger = logging.getLogger(__name__)
+
+SendFunction = Callable[[str, str, int], Awaitable[dict]]
+# Called with the send result and the message it was given for
+ResultCallback = Callable[[dict, str], None]
+
+SUPERSEDED = {"success": False, "superseded": True, "error": "Superseded by a later notification"}
+
+
+class _PendingBatch:
+    """Messages waiting for one recipient, by supersede key"""
+
+    def __init__(self, priority: int):
+        self.messages: Dict[str, str] = {}
+        self.callbacks: Dict[str, ResultCallback] = {}
+        self.priority = priority
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class NotificationCoalescer:
+    """
+    Per-recipient coalescing window in front of a send function
+
+    The first message to a phone opens a window of window seconds; messages
+    to the same phone within it join the batch. A message with the same key
+    as a pending one (e.g. a later status of the same order) replaces it;
+    different keys are merged into one message. The batch is sent when the
+    window closes, at the most urgent priority it contains; with a window of
+    0 it is sent on the next loop iteration, so callers never wait for it.
+
+    submit() returns at once; the outcome of the send (including UltraMsg's
+    message_id) is reported to each message's on_result callback.
+    """
+
+    def __init__(self, send: SendFunction, window: float, separator: str = "\n\n"):
+        self.send = send
+        self.window = window
+        self.separator = separator
+        self._pending: Dict[str, _PendingBatch] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._unkeyed = itertools.count()
+
+    async def submit(
+        self, phone: str, message: str, key: Optional[str] = None, priority: int = 1,
+        on_result: Optional[ResultCallback] = None,
+    ) -> dict:
+        """Queue a message; returns immediately with a queued result"""
+        batch = self._pending.get(phone)
+        if batch is None:
+            batch = self._pending[phone] = _PendingBatch(priority)
+            batch.timer = asyncio.get_running_loop().call_later(max(self.window, 0), self._start_flush, phone)
+        else:
+            NOTIFICATIONS_COALESCED.labels("superseded" if key in batch.messages else "merged").inc()
+            batch.priority = min(batch.priority, priority)
+
+        key = key if key is not None else f"_{next(self._unkeyed)}"
+        superseded = batch.messages.pop(key, None)  # a superseding message moves to the end
+        replaced_callback = batch.callbacks.pop(key, None)
+        if replaced_callback is not None:
+            self._report(replaced_callback, dict(SUPERSEDED), superseded)
+        batch.messages[key] = message
+        if on_result is not None:
+            batch.callbacks[key] = on_result
+        return {"success": True, "queued": True, "coalesce_window": self.window}
+
+    def _start_flush(self, phone: str):
+        task = asyncio.create_task(self.flush(phone))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self, phone: str) -> Optional[dict]:
+        """Send the pending batch for phone now"""
+        batch = self._pending.pop(phone, None)
+        if batch is None:
+            return None
+        if batch.timer is not None:
+            batch.timer.cancel()
+        try:
+            result = await self.send(phone, self.separator.join(batch.messages.values()), batch.priority)
+        except Exception as e:
+            result = {"success": False, "error": f"{type(e).__name__}: {e}"}
+        if not result.get("success"):
+            logger.warning(
+                "Coalesced WhatsApp message to %s (%d parts) failed: %s",
+                phone, len(batch.messages), result.get("error"),
+            )
+        for key, callback in batch.callbacks.items():
+            self._report(callback, result, batch.messages[key])
+        return result
+
+    @staticmethod
+    def _report(callback: ResultCallback, result: dict, message: str):
+        try:
+            callback(result, message)
+        except Exception:
+            logger.exception("Coalesced notification result callback failed")
+
+    async def flush_all(self):
+        """Send every pending batch (on shutdown) and wait for in-flight flushes"""
+        await asyncio.gather(
+            *(self.flush(phone) for phone in list(self._pending)),
+            *list(self._tasks),
+            return_exceptions=True,
+        )
+
+    def pending_count(self) -> int:
+        return sum(len(batch.messages) for batch in self._pending.values())
@@ -0,0 +1,148 @@
+"""
+Notification log write-behind
+Buffers notification_logs rows in memory and writes them in multi-row
+inserts, so logging a sent notification costs the request no transaction
+of its own.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import List, Optional, Set
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+from ..core.config import settings
+from ..core.database import engine
+from ..core.metrics import NOTIFICATION_LOG_PENDING, NOTIFICATION_LOG_RECORDS
+from ..models import NotificationLog
+
+logger = logging.getLogger(__name__)
+
+# Errors caused by the rows themselves; retrying the same rows can't succeed
+REJECTED_ERRORS = (IntegrityError, DataError)
+
+
+class NotificationLogWriter:
+    """
+    Write-behind buffer for notification_logs
+
+    Records are written when batch_size of them are buffered, or
+    flush_interval seconds after the first one, whichever comes first, and
+    on close(). Timestamps are taken when a record is added, not written.
+    If a write fails the rows are kept for the next flush, up to
+    max_pending rows; beyond that the oldest are dropped. A batch the
+    database rejects (e.g. a row whose user_id doesn't exist) is split until
+    the offending rows are isolated; those are dropped and the rest written.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_pending: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._buffer: List[dict] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._write_lock = asyncio.Lock()
+
+    def add(
+        self, user_id: uuid.UUID, notification_type: str, result: dict, message: str,
+        order_id: Optional[uuid.UUID] = None, channel: str = "whatsapp",
+    ):
+        """Buffer a log record for a send result ({"success", "error", "message_id"}); never blocks"""
+        now = datetime.now(timezone.utc)
+        self._buffer.append({
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "order_id": order_id,
+            "notification_type": notification_type,
+            "channel": channel,
+            "message": message,
+            "whatsapp_sent": channel == "whatsapp" and bool(result.get("success")),
+            "telegram_sent": channel == "telegram" and bool(result.get("success")),
+            "error_message": result.get("error"),
+            "provider_message_id": result.get("message_id"),
+            "sent_at": now,
+            "created_at": now,
+        })
+        NOTIFICATION_LOG_PENDING.set(len(self._buffer))
+        if len(self._buffer) >= self.batch_size:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.flush_interval, self._start_flush)
+
+    def _start_flush(self):
+        task = asyncio.create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _write(self, records: List[dict]) -> int:
+        """Write records, dropping those the database rejects; returns how many were rejected"""
+        try:
+            with engine.begin() as conn:
+                # executemany: multi-row INSERT ... VALUES with psycopg2, one pipelined round trip with psycopg 3
+                conn.execute(insert(NotificationLog), records)
+            return 0
+        except REJECTED_ERRORS as e:
+            if len(records) == 1:
+                logger.warning("Notification log row rejected (%s): %s", records[0]["notification_type"], e.orig)
+                return 1
+        middle = len(records) // 2
+        return self._write(records[:middle]) + self._write(records[middle:])
+
+    async def flush(self):
+        """Write everything buffered so far"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # Writes are serialized so a slow database holds one connection, not one per batch
+        async with self._write_lock:
+            while self._buffer:
+                records, self._buffer = self._buffer[:self.batch_size], self._buffer[self.batch_size:]
+                try:
+                    rejected = await asyncio.to_thread(self._write, records)
+                except Exception as e:
+                    # Connection trouble: keep the rows (a row written before the error
+                    # is rejected as a duplicate id on the retry)
+                    self._requeue(records, e)
+                    break
+                NOTIFICATION_LOG_RECORDS.labels("written").inc(len(records) - rejected)
+                if rejected:
+                    NOTIFICATION_LOG_RECORDS.labels("rejected").inc(rejected)
+        NOTIFICATION_LOG_PENDING.set(len(self._buffer))
+
+    def _requeue(self, records: List[dict], error: Exception):
+        self._buffer[:0] = records
+        dropped = len(self._buffer) - self.max_pending
+        if dropped > 0:
+            del self._buffer[:dropped]
+            NOTIFICATION_LOG_RECORDS.labels("dropped").inc(dropped)
+        logger.warning(
+            "Notification log write failed (%s); %d rows pending, %d dropped",
+            error, len(self._buffer), max(dropped, 0),
+        )
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.flush_interval, self._start_flush)
+
+    async def close(self):
+        """Write what is buffered (on shutdown)"""
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.flush()
+        if self._timer is not None:
+            # The last write failed; nothing will retry it any more
+            self._timer.cancel()
+            self._timer = None
+            NOTIFICATION_LOG_RECORDS.labels("dropped").inc(len(self._buffer))
+            logger.error("Notification log: %d rows lost on shutdown", len(self._buffer))
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._buffer)
+
+
+notification_log_writer = NotificationLogWriter(
+    batch_size=settings.NOTIFICATION_LOG_BATCH_SIZE,
+    flush_interval=settings.NOTIFICATION_LOG_FLUSH_MS / 1000,
+    max_pending=settings.NOTIFICATION_LOG_MAX_PENDING,
+)
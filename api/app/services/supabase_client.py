@@ -2,9 +2,15 @@
 Supabase Client Service
 Uses Supabase REST API for database operations when direct PostgreSQL is not available
 """
+import asyncio
 import httpx
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, AsyncIterator
 from ..core.config import settings
+from ..core.metrics import track_outbound, record_outbound_error
+
+
+class SupabaseError(Exception):
+    """Raised by streaming operations when a PostgREST request fails"""
 
 
 class SupabaseClient:
@@ -24,26 +30,67 @@ class SupabaseClient:
         method: str, 
         endpoint: str, 
         data: Optional[Dict] = None,
-        params: Optional[Dict] = None
+        params: Optional[Dict] = None,
+        headers: Optional[Dict] = None,
+        client: Optional[httpx.AsyncClient] = None
     ) -> Dict:
-        """Make HTTP request to Supabase"""
+        """Make HTTP request to Supabase (reusing client if given)"""
+        if client is None:
+            async with httpx.AsyncClient() as own_client:
+                return await self._request(
+                    method, endpoint, data=data, params=params,
+                    headers=headers, client=own_client
+                )
+        
         url = f"{self.base_url}/{endpoint}"
+        request_headers = {**self.headers, **headers} if headers else self.headers
         
-        async with httpx.AsyncClient() as client:
-            try:
+        operation = f"{method} {endpoint}"
+        try:
+            with track_outbound("supabase", operation):
                 response = await client.request(
                     method=method,
                     url=url,
-                    headers=self.headers,
+                    headers=request_headers,
                     json=data,
                     params=params
                 )
-                response.raise_for_status()
-                return {"success": True, "data": response.json()}
-            except httpx.HTTPStatusError as e:
-                return {"success": False, "error": str(e), "status_code": e.response.status_code}
-            except Exception as e:
-                return {"success": False, "error": str(e)}
+            if response.is_error:
+                record_outbound_error("supabase", operation)
+            response.raise_for_status()
+            result = {"success": True, "data": response.json() if response.content else None}
+            if "content-range" in response.headers:
+                result["content_range"] = response.headers["content-range"]
+            return result
+        except httpx.HTTPStatusError as e:
+            return {"success": False, "error": str(e), "status_code": e.response.status_code}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    @staticmethod
+    def _filter_params(filters: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """
+        Convert filters to PostgREST query params
+        
+        Plain values become equality filters; (operator, value) tuples use
+        any PostgREST operator:
+            {"status_id": 3}                  -> status_id=eq.3
+            {"status_id": ("in", [1, 2])}     -> status_id=in.(1,2)
+            {"created_at": ("gte", "2026-01-01")} -> created_at=gte.2026-01-01
+            {"user_id": ("is", None)}         -> user_id=is.null
+        """
+        params = {}
+        for key, value in (filters or {}).items():
+            if isinstance(value, tuple):
+                operator, operand = value
+                if isinstance(operand, (list, set)):
+                    operand = "(" + ",".join(str(item) for item in operand) + ")"
+                elif operand is None:
+                    operand = "null"
+                params[key] = f"{operator}.{operand}"
+            else:
+                params[key] = f"eq.{value}"
+        return params
     
     # ===========================================
     # Generic CRUD operations
@@ -54,24 +101,237 @@ class SupabaseClient:
         table: str, 
         columns: str = "*",
         filters: Optional[Dict[str, Any]] = None,
-        limit: Optional[int] = None
+        limit: Optional[int] = None,
+        order: Optional[str] = None
     ) -> Dict:
         """Select from table"""
-        params = {"select": columns}
+        params = {"select": columns, **self._filter_params(filters)}
         
-        if filters:
-            for key, value in filters.items():
-                params[key] = f"eq.{value}"
+        if order:
+            params["order"] = order
         
         if limit:
             params["limit"] = str(limit)
         
         return await self._request("GET", table, params=params)
     
+    async def count(self, table: str, filters: Optional[Dict[str, Any]] = None) -> Optional[int]:
+        """Count rows matching filters without downloading them"""
+        params = {"select": "*", **self._filter_params(filters)}
+        headers = {"Prefer": "count=exact", "Range-Unit": "items", "Range": "0-0"}
+        result = await self._request("GET", table, params=params, headers=headers)
+        if not result.get("success") or "content_range" not in result:
+            return None
+        total = result["content_range"].split("/")[-1]
+        return int(total) if total.isdigit() else None
+    
+    async def iter_select(
+        self,
+        table: str,
+        columns: str = "*",
+        filters: Optional[Dict[str, Any]] = None,
+        order: str = "id",
+        page_size: int = 1000
+    ) -> AsyncIterator[Dict]:
+        """
+        Iterate over table rows page by page
+        
+        Pages are requested with Range headers over a stable ordering, and
+        the next page is fetched while the caller consumes the current one,
+        so large tables are processed in constant memory.
+        
+        Args:
+            table: Table name
+            columns: PostgREST select expression
+            filters: Filters (see _filter_params for operators)
+            order: PostgREST order expression, must be deterministic
+            page_size: Rows per request
+            
+        Yields:
+            Row dicts
+            
+        Raises:
+            SupabaseError: If a page request fails
+        """
+        params = {"select": columns, "order": order, **self._filter_params(filters)}
+        
+        async with httpx.AsyncClient() as client:
+            def fetch(offset: int) -> asyncio.Task:
+                headers = {
+                    "Range-Unit": "items",
+                    "Range": f"{offset}-{offset + page_size - 1}",
+                }
+                return asyncio.create_task(self._request(
+                    "GET", table, params=params, headers=headers, client=client
+                ))
+            
+            offset = 0
+            pending = fetch(offset)
+            try:
+                while pending is not None:
+                    result = await pending
+                    pending = None
+                    if result.get("status_code") == 416:
+                        break  # offset past the last row
+                    if not result.get("success"):
+                        raise SupabaseError(result.get("error"))
+                    
+                    rows = result.get("data") or []
+                    if len(rows) == page_size:
+                        offset += page_size
+                        pending = fetch(offset)
+                    
+                    for row in rows:
+                        yield row
+            finally:
+                if pending is not None:
+                    pending.cancel()
+    
     async def insert(self, table: str, data: Dict) -> Dict:
         """Insert into table"""
         return await self._request("POST", table, data=data)
     
+    async def bulk_insert(
+        self,
+        table: str,
+        records: List[Dict],
+        batch_size: int = 500,
+        concurrency: int = 4,
+        returning: bool = False
+    ) -> Dict:
+        """
+        Insert many records in chunked requests
+        
+        Args:
+            table: Table name
+            records: Rows to insert
+            batch_size: Rows per request
+            concurrency: Maximum chunks in flight at once
+            returning: Return inserted rows (otherwise return=minimal)
+            
+        Returns:
+            Summary dict with per-chunk results (see _bulk_write)
+        """
+        return await self._bulk_write(
+            table, records, batch_size, concurrency, returning
+        )
+    
+    async def bulk_upsert(
+        self,
+        table: str,
+        records: List[Dict],
+        on_conflict: Optional[str] = None,
+        batch_size: int = 500,
+        concurrency: int = 4,
+        returning: bool = False
+    ) -> Dict:
+        """
+        Insert or update many records in chunked requests
+        Existing rows (by primary key or on_conflict columns) are merged
+        
+        Args:
+            table: Table name
+            records: Rows to upsert
+            on_conflict: Comma-separated unique columns to match on
+            batch_size: Rows per request
+            concurrency: Maximum chunks in flight at once
+            returning: Return written rows (otherwise return=minimal)
+            
+        Returns:
+            Summary dict with per-chunk results (see _bulk_write)
+        """
+        return await self._bulk_write(
+            table, records, batch_size, concurrency, returning,
+            resolution="merge-duplicates", on_conflict=on_conflict
+        )
+    
+    async def _bulk_write(
+        self,
+        table: str,
+        records: List[Dict],
+        batch_size: int,
+        concurrency: int,
+        returning: bool,
+        resolution: Optional[str] = None,
+        on_conflict: Optional[str] = None
+    ) -> Dict:
+        """
+        POST records to a table in chunks with bounded concurrency
+        
+        Plain inserts send the union of all keys, and columns a record
+        lacks get their DEFAULT (missing=default). An upsert must not do
+        that: the missing column would be reset on the existing row too. So
+        upserts are grouped by key set, and each group is sent with its
+        own columns.
+        
+        Returns:
+            {
+                "success": True if every chunk succeeded,
+                "total": number of records,
+                "written": records in successful chunks,
+                "errors": [{"chunk", "offset" (index of the chunk's first record), "size",
+                            "error", "status_code"}],
+                "data": written rows (only when returning=True)
+            }
+        """
+        prefer = ["return=representation" if returning else "return=minimal"]
+        if resolution:
+            prefer.append(f"resolution={resolution}")
+        else:
+            prefer.append("missing=default")
+        headers = {"Prefer": ",".join(prefer)}
+        
+        # PostgREST needs a single column set per request
+        if resolution:
+            groups: Dict[tuple, List[int]] = {}
+            for index, record in enumerate(records):
+                groups.setdefault(tuple(sorted(record)), []).append(index)
+        else:
+            groups = {tuple(sorted({key for record in records for key in record})): list(range(len(records)))}
+        
+        # (params, original record indexes) per request
+        chunks = []
+        for columns, indexes in groups.items():
+            params = {"columns": ",".join(columns)}
+            if on_conflict:
+                params["on_conflict"] = on_conflict
+            chunks.extend(
+                (params, indexes[offset:offset + batch_size])
+                for offset in range(0, len(indexes), batch_size)
+            )
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async with httpx.AsyncClient() as client:
+            async def send(params: Dict, indexes: List[int]) -> Dict:
+                async with semaphore:
+                    return await self._request(
+                        "POST", table, data=[records[i] for i in indexes], params=params,
+                        headers=headers, client=client
+                    )
+            
+            results = await asyncio.gather(*(send(params, indexes) for params, indexes in chunks))
+        
+        summary = {"success": True, "total": len(records), "written": 0, "errors": []}
+        if returning:
+            summary["data"] = []
+        
+        for index, ((_, indexes), result) in enumerate(zip(chunks, results)):
+            if result.get("success"):
+                summary["written"] += len(indexes)
+                if returning:
+                    summary["data"].extend(result.get("data") or [])
+            else:
+                summary["success"] = False
+                summary["errors"].append({
+                    "chunk": index,
+                    "offset": indexes[0],
+                    "size": len(indexes),
+                    "error": result.get("error"),
+                    "status_code": result.get("status_code"),
+                })
+        
+        return summary
+    
     async def update(
         self, 
         table: str, 
@@ -79,17 +339,17 @@ class SupabaseClient:
         filters: Dict[str, Any]
     ) -> Dict:
         """Update records in table"""
-        params = {}
-        for key, value in filters.items():
-            params[key] = f"eq.{value}"
+        params = self._filter_params(filters)
         
         return await self._request("PATCH", table, data=data, params=params)
     
+    async def rpc(self, function: str, params: Optional[Dict] = None) -> Dict:
+        """Call a Postgres function exposed by PostgREST"""
+        return await self._request("POST", f"rpc/{function}", data=params or {})
+    
     async def delete(self, table: str, filters: Dict[str, Any]) -> Dict:
         """Delete from table"""
-        params = {}
-        for key, value in filters.items():
-            params[key] = f"eq.{value}"
+        params = self._filter_params(filters)
         
         return await self._request("DELETE", table, params=params)
     
@@ -145,6 +405,11 @@ class SupabaseClient:
         
         return await self.update("orders", data, {"id": order_id})
     
+    async def get_orders_summary(self, club_id: Optional[int] = None) -> List[Dict]:
+        """Get order count and revenue per status, aggregated server-side"""
+        result = await self.rpc("orders_summary_by_status", {"p_club_id": club_id})
+        return result.get("data", []) if result.get("success") else []
+    
     async def get_statuses(self) -> List[Dict]:
         """Get all status types"""
         result = await self.select("dim_status_types")
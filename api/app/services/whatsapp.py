@@ -2,9 +2,24 @@
 WhatsApp UltraMsg Integration Service
 Handles all WhatsApp notifications for order status updates
 """
+import asyncio
 import httpx
-from typing import Optional
+from datetime import date
+from typing import Optional, Tuple
 from ..core.config import settings
+from ..core.metrics import OUTBOUND_RETRIES, track_outbound, record_outbound_error
+from ..core.resilience import CircuitBreaker, RetryBudget, backoff_delay, get_rate_limiter
+from .coalescer import NotificationCoalescer, ResultCallback
+
+# Failures after which UltraMsg cannot have accepted the message, so a
+# retry won't send it twice (read timeouts are not retried for that reason)
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+RETRYABLE_STATUS = {429, 502, 503, 504}
+
+# Rate-limiter queue priorities (lower is sent first)
+PRIORITY_VERIFICATION = 0
+PRIORITY_TRANSACTIONAL = 1
+PRIORITY_REMINDER = 2
 
 
 class WhatsAppService:
@@ -14,20 +29,50 @@ class WhatsAppService:
         self.instance_id = settings.ULTRAMSG_INSTANCE_ID
         self.token = settings.ULTRAMSG_TOKEN
         self.base_url = settings.ULTRAMSG_API_URL
+        self.timeout = httpx.Timeout(
+            settings.ULTRAMSG_READ_TIMEOUT, connect=settings.ULTRAMSG_CONNECT_TIMEOUT
+        )
+        self.max_retries = settings.ULTRAMSG_MAX_RETRIES
+        self.breaker = CircuitBreaker(
+            "ultramsg",
+            failure_threshold=settings.ULTRAMSG_BREAKER_FAILURES,
+            reset_timeout=settings.ULTRAMSG_BREAKER_RESET_SECONDS,
+        )
+        self.retry_budget = RetryBudget(ratio=settings.ULTRAMSG_RETRY_BUDGET_RATIO)
+        # Shared per instance: UltraMsg limits are per instance, not per process object
+        self.rate_limiter = get_rate_limiter(
+            f"ultramsg:{self.instance_id}",
+            rate=settings.ULTRAMSG_RATE_LIMITS.get(self.instance_id, settings.ULTRAMSG_RATE_LIMIT),
+            burst=settings.ULTRAMSG_RATE_BURST,
+        )
+        self.coalescer = NotificationCoalescer(self.send_message, settings.NOTIFICATION_COALESCE_SECONDS)
+    
+    @staticmethod
+    def normalize_phone(phone: str) -> str:
+        """Strip formatting (UltraMsg expects digits with country code)"""
+        return phone.replace("+", "").replace(" ", "").replace("-", "")
     
-    async def send_message(self, phone: str, message: str) -> dict:
+    async def send_message(
+        self, phone: str, message: str, priority: int = PRIORITY_TRANSACTIONAL
+    ) -> dict:
         """
         Send a WhatsApp message to a phone number
         
+        Every attempt waits for a token from the instance's rate limiter, so
+        bursts are queued (by priority) and sent at the provider's pace.
+        Connection failures, 429 and 502-504 are retried with jittered
+        backoff while the retry budget allows; while the circuit breaker
+        is open the call fails fast without contacting UltraMsg.
+        
         Args:
             phone: Phone number in international format (e.g., +77001234567)
             message: Message text to send
+            priority: Queue priority (PRIORITY_VERIFICATION goes first)
             
         Returns:
-            API response dict
+            {"success": True, "response": ..., "message_id": ...} or {"success": False, "error": ...}
         """
-        # Format phone number (remove + if present, add country code if needed)
-        phone = phone.replace("+", "").replace(" ", "").replace("-", "")
+        phone = self.normalize_phone(phone)
         
         url = f"{self.base_url}/messages/chat"
         payload = {
@@ -36,18 +81,115 @@ class WhatsAppService:
             "body": message
         }
         
-        async with httpx.AsyncClient() as client:
-            try:
+        if not self.breaker.allow():
+            return self._circuit_open()
+        self.retry_budget.record_call()
+        
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            attempt = 0
+            while True:
+                try:
+                    await self.rate_limiter.acquire(priority, timeout=settings.ULTRAMSG_RATE_MAX_WAIT)
+                except asyncio.TimeoutError:
+                    return {"success": False, "error": "UltraMsg rate-limit queue timeout", "rate_limited": True}
+                
+                result, retryable, retry_after = await self._post(client, url, payload)
+                if result.get("status_code") == 429:
+                    # Back the whole instance off, not just this message
+                    self.rate_limiter.pause(retry_after or settings.ULTRAMSG_RETRY_BACKOFF_MAX)
+                if result["success"] or not retryable or attempt >= self.max_retries:
+                    return result
+                
+                delay = max(
+                    backoff_delay(attempt, settings.ULTRAMSG_RETRY_BACKOFF, settings.ULTRAMSG_RETRY_BACKOFF_MAX),
+                    retry_after,
+                )
+                if delay > settings.ULTRAMSG_RETRY_BACKOFF_MAX or not self.retry_budget.try_retry():
+                    return result
+                
+                OUTBOUND_RETRIES.labels("ultramsg", "send_message").inc()
+                await asyncio.sleep(delay)
+                attempt += 1
+                if not self.breaker.allow():
+                    return self._circuit_open()
+    
+    async def _post(self, client: httpx.AsyncClient, url: str, payload: dict) -> Tuple[dict, bool, float]:
+        """One send attempt: (result, retryable, Retry-After seconds)"""
+        try:
+            with track_outbound("ultramsg", "send_message"):
                 response = await client.post(url, data=payload)
-                return {"success": True, "response": response.json()}
-            except Exception as e:
-                return {"success": False, "error": str(e)}
+        except httpx.HTTPError as e:
+            error = f"{type(e).__name__}: {e}"
+            self.breaker.record_failure(error)
+            return {"success": False, "error": error}, isinstance(e, RETRYABLE_ERRORS), 0.0
+        
+        try:
+            body = response.json()
+        except ValueError:
+            body = {"error": response.text[:200]}
+        
+        # 4xx (including 429) means UltraMsg is up; only 5xx counts against the breaker
+        if response.status_code >= 500:
+            self.breaker.record_failure(f"HTTP {response.status_code}")
+        else:
+            self.breaker.record_success()
+        
+        error = body.get("error") if isinstance(body, dict) else None
+        if response.is_error or error:
+            record_outbound_error("ultramsg", "send_message")
+            try:
+                retry_after = float(response.headers.get("retry-after", 0))
+            except ValueError:
+                retry_after = 0.0
+            return (
+                {"success": False, "error": error or f"HTTP {response.status_code}",
+                 "status_code": response.status_code, "response": body},
+                response.status_code in RETRYABLE_STATUS,
+                retry_after,
+            )
+        result = {"success": True, "response": body}
+        if isinstance(body, dict) and body.get("id") is not None:
+            result["message_id"] = str(body["id"])  # echoed as "id" by delivery-ack webhooks
+        return result, False, 0.0
+    
+    def _circuit_open(self) -> dict:
+        return {
+            "success": False,
+            "error": "UltraMsg unavailable (circuit breaker open)",
+            "circuit_open": True,
+            "retry_after": round(self.breaker.retry_after(), 1),
+        }
+    
+    async def notify(
+        self, phone: str, message: str, key: Optional[str] = None,
+        priority: int = PRIORITY_TRANSACTIONAL, coalesce: bool = True,
+        on_result: Optional[ResultCallback] = None,
+    ) -> dict:
+        """
+        Send a customer notification through the coalescing window
+        
+        Notifications to the same phone within NOTIFICATION_COALESCE_SECONDS
+        go out as one message; a pending one with the same key (e.g. an
+        earlier status of the same order) is replaced. Returns a queued
+        result immediately (with a window of 0 the message is sent in the
+        background) and reports the send result to on_result(result, message).
+        coalesce=False sends directly and returns the result; it is for
+        callers that pace and record sends themselves.
+        """
+        if not coalesce:
+            result = await self.send_message(phone, message, priority)
+            if on_result is not None:
+                on_result(result, message)
+            return result
+        return await self.coalescer.submit(self.normalize_phone(phone), message, key, priority, on_result)
     
     # ===========================================
     # Order Status Notification Templates
     # ===========================================
     
-    async def notify_order_accepted(self, phone: str, order_number: str) -> dict:
+    async def notify_order_accepted(
+        self, phone: str, order_number: str, on_result: Optional[ResultCallback] = None
+    ) -> dict:
         """
         Status 1: Order accepted - items placed in locker
         Triggered: When client closes locker cell after placing items
@@ -56,10 +198,11 @@ class WhatsAppService:
             f"💬 Ваш заказ №{order_number} принят и отправится в прачечную "
             f"в ближайшее время. Мы сообщим, когда стирка начнётся."
         )
-        return await self.send_message(phone, message)
+        return await self.notify(phone, message, key=order_number, on_result=on_result)
     
     async def notify_items_received_at_laundry(
-        self, phone: str, order_number: str, bag_number: str
+        self, phone: str, order_number: str, bag_number: str,
+        on_result: Optional[ResultCallback] = None
     ) -> dict:
         """
         Status 2: Items received at laundry
@@ -69,9 +212,11 @@ class WhatsAppService:
             f"🧺 Ваши вещи поступили в прачечную и скоро будут постираны. "
             f"Номер мешка: {bag_number}."
         )
-        return await self.send_message(phone, message)
+        return await self.notify(phone, message, key=order_number, on_result=on_result)
     
-    async def notify_items_washed(self, phone: str, order_number: str) -> dict:
+    async def notify_items_washed(
+        self, phone: str, order_number: str, on_result: Optional[ResultCallback] = None
+    ) -> dict:
         """
         Status 3: Items washed (intermediate status)
         Triggered: When laundry staff marks bag as "washed"
@@ -80,10 +225,11 @@ class WhatsAppService:
             f"✨ Ваши вещи постираны и проходят финальную подготовку. "
             f"Вскоре они будут доступны к выдаче."
         )
-        return await self.send_message(phone, message)
+        return await self.notify(phone, message, key=order_number, on_result=on_result)
     
     async def notify_ready_for_pickup(
-        self, phone: str, order_number: str, club_name: str, cell_number: str
+        self, phone: str, order_number: str, club_name: str, cell_number: str,
+        on_result: Optional[ResultCallback] = None
     ) -> dict:
         """
         Status 4: Ready for pickup
@@ -93,9 +239,11 @@ class WhatsAppService:
             f"📦 Ваши вещи готовы к выдаче! Заберите их в клубе {club_name}. "
             f"Ячейка №{cell_number}. Спасибо, что выбираете FitClean!"
         )
-        return await self.send_message(phone, message)
+        return await self.notify(phone, message, key=order_number, on_result=on_result)
     
-    async def notify_order_completed(self, phone: str, order_number: str) -> dict:
+    async def notify_order_completed(
+        self, phone: str, order_number: str, on_result: Optional[ResultCallback] = None
+    ) -> dict:
         """
         Status 5: Order completed
         Triggered: When client picks up items from locker
@@ -104,10 +252,11 @@ class WhatsAppService:
             f"Ваш заказ №{order_number} завершён. "
             f"Спасибо, что воспользовались FitClean!"
         )
-        return await self.send_message(phone, message)
+        return await self.notify(phone, message, key=order_number, on_result=on_result)
     
     async def notify_pickup_reminder(
-        self, phone: str, order_number: str, cell_number: str, working_hours: str = "до 22:00"
+        self, phone: str, order_number: str, cell_number: str, working_hours: str = "до 22:00",
+        coalesce: bool = True, on_result: Optional[ResultCallback] = None
     ) -> dict:
         """
         Reminder: Items not picked up (24-48h)
@@ -117,16 +266,27 @@ class WhatsAppService:
             f"⏰ Напоминаем, что ваши вещи всё ещё ждут вас в ячейке №{cell_number}. "
             f"Постамат работает {working_hours}."
         )
-        return await self.send_message(phone, message)
+        return await self.notify(
+            phone, message, key=f"reminder:{order_number}", priority=PRIORITY_REMINDER,
+            coalesce=coalesce, on_result=on_result,
+        )
     
     async def notify_subscription_expiring(
-        self, phone: str, remaining_washes: int, payment_link: Optional[str] = None
+        self, phone: str, remaining_washes: Optional[int] = None, payment_link: Optional[str] = None,
+        expires_on: Optional[date] = None, coalesce: bool = True,
+        on_result: Optional[ResultCallback] = None
     ) -> dict:
         """
         Subscription expiring notification
-        Triggered: After last wash in subscription
+        Triggered: After last wash in subscription, or by the expiry sweep
+        (expires_on) shortly before the subscription period ends
         """
-        if remaining_washes == 0:
+        if expires_on is not None:
+            message = (
+                f"🔄 Ваша подписка действует до {expires_on:%d.%m.%Y}. "
+                f"Продлите её заранее, чтобы пользоваться без перерывов."
+            )
+        elif remaining_washes == 0:
             message = (
                 f"🔄 Вы использовали все стирки по тарифу. "
                 f"Продлите подписку, чтобы пользоваться без перерывов."
@@ -140,10 +300,13 @@ class WhatsAppService:
         if payment_link:
             message += f"\n\nОплатить: {payment_link}"
         
-        return await self.send_message(phone, message)
+        return await self.notify(
+            phone, message, key="subscription", priority=PRIORITY_REMINDER,
+            coalesce=coalesce, on_result=on_result,
+        )
     
     async def notify_issue_reported(
-        self, phone: str, order_number: str
+        self, phone: str, order_number: str, on_result: Optional[ResultCallback] = None
     ) -> dict:
         """
         Issue/incident notification
@@ -153,7 +316,7 @@ class WhatsAppService:
             f"⚠️ Ваш заказ №{order_number} требует уточнения. "
             f"Наш менеджер свяжется с вами для решения вопроса."
         )
-        return await self.send_message(phone, message)
+        return await self.notify(phone, message, key=f"issue:{order_number}", on_result=on_result)
     
     async def notify_admin_issue(
         self, admin_phone: str, client_name: str, client_phone: str, 
@@ -177,7 +340,7 @@ class WhatsAppService:
         Send SMS verification code for registration
         """
         message = f"Ваш код подтверждения FitClean: {code}"
-        return await self.send_message(phone, message)
+        return await self.send_message(phone, message, priority=PRIORITY_VERIFICATION)
 
 
 # Singleton instance
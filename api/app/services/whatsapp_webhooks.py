@@ -0,0 +1,275 @@
+"""
+UltraMsg webhook ingestion
+Delivery acks update the delivery_status of notification_logs rows; client
+replies become employee notifications for the client's club.
+
+The webhook only parses and buffers events, so it answers at once however
+fast UltraMsg calls it. Buffered events are applied in batches (one UPDATE
+for all acks, one INSERT for all replies) when batch_size are buffered or
+flush_interval seconds after the first one. Acks of one message collapse
+to the most advanced state before they reach the database.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import insert, text
+
+from ..core.config import settings
+from ..core.database import engine
+from ..core.metrics import WEBHOOK_EVENTS
+from ..models import EmployeeNotification
+
+logger = logging.getLogger(__name__)
+
+# UltraMsg ack values by delivery_status; later states outrank earlier ones
+ACK_STATUSES = {"server": "sent", "device": "delivered", "read": "read", "played": "read"}
+STATUS_RANK = {"sent": 1, "delivered": 2, "read": 3}
+
+APPLY_ACKS = text("""
+    UPDATE notification_logs AS n
+    SET delivery_status = CASE
+            WHEN coalesce(array_position(ARRAY['sent', 'delivered', 'read'], n.delivery_status::text), 0)
+                 < array_position(ARRAY['sent', 'delivered', 'read'], v.status)
+            THEN v.status ELSE n.delivery_status END,
+        delivery_updated_at = greatest(n.delivery_updated_at, v.at)
+    FROM unnest(CAST(:ids AS text[]), CAST(:statuses AS text[]), CAST(:ats AS timestamp[])) AS v(id, status, at)
+    WHERE n.provider_message_id = v.id
+    RETURNING n.provider_message_id
+""")
+
+# Replying clients with their club and latest order
+FIND_CLIENTS = text("""
+    SELECT DISTINCT ON (u.phone_digits)
+        u.phone_digits, u.username, coalesce(o.club_id, u.club_id) AS club_id,
+        o.id AS order_id, o.order_number
+    FROM users u
+    LEFT JOIN LATERAL (
+        SELECT id, club_id, order_number FROM orders
+        WHERE user_id = u.id ORDER BY created_at DESC LIMIT 1
+    ) o ON true
+    WHERE u.phone_digits = ANY(CAST(:phones AS text[]))
+    ORDER BY u.phone_digits, u.created_at
+""")
+
+
+class _Ack:
+    __slots__ = ("status", "at", "first_seen")
+
+    def __init__(self, status: str, at: datetime, first_seen: float):
+        self.status = status
+        self.at = at
+        self.first_seen = first_seen
+
+
+class WebhookIngestor:
+    """
+    Buffers UltraMsg webhook events and applies them in batches
+
+    Acks can arrive before the log row of their message is written (logs are
+    written behind, sweeps record results per batch). Unmatched acks are
+    retried every retry_interval seconds for up to ack_match_window seconds.
+    Replies of a failed batch are retried with the next one, up to
+    reply_max_attempts writes; then they are dropped.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_pending: int,
+                 ack_match_window: float, retry_interval: float = 10.0, reply_max_attempts: int = 5):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.ack_match_window = ack_match_window
+        self.retry_interval = retry_interval
+        self.reply_max_attempts = reply_max_attempts
+        self._acks: Dict[str, _Ack] = {}
+        self._replies: List[dict] = []
+        self._unmatched: Dict[str, _Ack] = {}
+        self._last_retry = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._apply_lock = asyncio.Lock()
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._acks) + len(self._replies)
+
+    # ===========================================
+    # Intake
+    # ===========================================
+
+    def submit(self, event: dict) -> bool:
+        """
+        Buffer one webhook event; never blocks
+
+        Returns:
+            False when the buffer is full (the caller should ask UltraMsg to retry)
+        """
+        event_type = event.get("event_type") or "unknown"
+        data = event.get("data") or {}
+        if self.pending_count >= self.max_pending:
+            WEBHOOK_EVENTS.labels(event_type, "rejected").inc()
+            return False
+
+        if event_type == "message_ack":
+            queued = self._add_ack(event.get("id"), data.get("ack"))
+        elif event_type == "message_received":
+            queued = self._add_reply(data)
+        else:
+            queued = False
+        WEBHOOK_EVENTS.labels(event_type, "queued" if queued else "ignored").inc()
+
+        if self.pending_count >= self.batch_size:
+            self._start_flush()
+        elif queued and self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.flush_interval, self._start_flush)
+        return True
+
+    def _add_ack(self, message_id, ack) -> bool:
+        status = ACK_STATUSES.get(ack)
+        if message_id in (None, "") or status is None:
+            return False
+        message_id = str(message_id)
+        current = self._acks.get(message_id)
+        if current is None:
+            self._acks[message_id] = _Ack(status, datetime.utcnow(), time.monotonic())
+        elif STATUS_RANK[status] > STATUS_RANK[current.status]:
+            current.status, current.at = status, datetime.utcnow()
+        return True
+
+    def _add_reply(self, data: dict) -> bool:
+        sender = str(data.get("from") or "")
+        # Only direct chats (groups are @g.us) and not our own messages
+        if data.get("fromMe") or not sender.endswith("@c.us"):
+            return False
+        body = data.get("body") or ""
+        if data.get("type") not in (None, "chat"):
+            body = body or f"[{data.get('type')}]"
+        if not body:
+            return False
+        self._replies.append({
+            "phone": sender.split("@")[0],
+            "name": data.get("pushname"),
+            "body": body,
+            "attempts": 0,
+        })
+        return True
+
+    # ===========================================
+    # Batched apply
+    # ===========================================
+
+    def _start_flush(self):
+        task = asyncio.create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self):
+        """Apply everything buffered so far"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        async with self._apply_lock:
+            acks, self._acks = self._acks, {}
+            replies, self._replies = self._replies, []
+            now = time.monotonic()
+            if self._unmatched and now - self._last_retry >= self.retry_interval:
+                self._last_retry = now
+                for message_id, ack in self._unmatched.items():
+                    fresh = acks.get(message_id)
+                    if fresh is None or STATUS_RANK[ack.status] > STATUS_RANK[fresh.status]:
+                        acks[message_id] = ack
+                self._unmatched = {}
+            if acks or replies:
+                try:
+                    unmatched = await asyncio.to_thread(self._apply, acks, replies)
+                except Exception as e:
+                    logger.warning("Applying %d acks / %d replies failed: %s", len(acks), len(replies), e)
+                    unmatched = acks
+                    self._retry_replies(replies)
+                self._hold_unmatched(acks, unmatched, now)
+        if (self._unmatched or self._replies) and self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.retry_interval, self._start_flush)
+
+    def _retry_replies(self, replies: List[dict]):
+        retry = []
+        for reply in replies:
+            reply["attempts"] += 1
+            if reply["attempts"] < self.reply_max_attempts:
+                retry.append(reply)
+        if len(retry) < len(replies):
+            WEBHOOK_EVENTS.labels("message_received", "dropped").inc(len(replies) - len(retry))
+        self._replies[:0] = retry
+
+    def _hold_unmatched(self, acks: Dict[str, _Ack], unmatched, now: float):
+        expired = 0
+        for message_id in unmatched:
+            ack = acks[message_id]
+            if now - ack.first_seen < self.ack_match_window:
+                self._unmatched[message_id] = ack
+            else:
+                expired += 1
+        if expired:
+            WEBHOOK_EVENTS.labels("message_ack", "unmatched").inc(expired)
+
+    def _apply(self, acks: Dict[str, _Ack], replies: List[dict]) -> Set[str]:
+        """Write one batch; returns the IDs of acks that matched no log row"""
+        matched = set()
+        with engine.begin() as conn:
+            if acks:
+                matched = set(conn.execute(APPLY_ACKS, {
+                    "ids": list(acks),
+                    "statuses": [ack.status for ack in acks.values()],
+                    "ats": [ack.at for ack in acks.values()],
+                }).scalars())
+                WEBHOOK_EVENTS.labels("message_ack", "applied").inc(len(matched))
+            if replies:
+                self._insert_replies(conn, replies)
+        return set(acks) - matched
+
+    def _insert_replies(self, conn, replies: List[dict]):
+        clients = {
+            row.phone_digits: row
+            for row in conn.execute(FIND_CLIENTS, {"phones": list({reply["phone"] for reply in replies})})
+        }
+        notifications = []
+        for reply in replies:
+            client = clients.get(reply["phone"])
+            if client is None or client.club_id is None:
+                # Employee notifications belong to a club; unknown senders have none
+                WEBHOOK_EVENTS.labels("message_received", "unmatched").inc()
+                continue
+            sender = client.username or reply["name"] or f"+{reply['phone']}"
+            title = "Ответ клиента"
+            if client.order_number:
+                title += f" (заказ {client.order_number})"
+            notifications.append({
+                "club_id": client.club_id,
+                "order_id": client.order_id,
+                "notification_type": "client_reply",
+                "title": title,
+                "message": f"{sender}: {reply['body']}",
+                "priority": "medium",
+            })
+        if notifications:
+            conn.execute(insert(EmployeeNotification), notifications)
+            WEBHOOK_EVENTS.labels("message_received", "applied").inc(len(notifications))
+
+    async def close(self):
+        """Apply what is buffered (on shutdown); acks still unmatched are dropped"""
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._last_retry = 0.0
+        await self.flush()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
+webhook_ingestor = WebhookIngestor(
+    batch_size=settings.ULTRAMSG_WEBHOOK_BATCH_SIZE,
+    flush_interval=settings.ULTRAMSG_WEBHOOK_FLUSH_MS / 1000,
+    max_pending=settings.ULTRAMSG_WEBHOOK_MAX_PENDING,
+    ack_match_window=settings.ULTRAMSG_ACK_MATCH_SECONDS,
+    reply_max_attempts=settings.ULTRAMSG_REPLY_MAX_ATTEMPTS,
+)
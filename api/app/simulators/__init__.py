@@ -0,0 +1,35 @@
+# Offline simulators of external providers (UltraMsg, Supabase REST, smart locker)
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from .behavior import BehaviorConfig, ProviderBehavior
+
+
+@contextmanager
+def run_simulator(app, host: str = "127.0.0.1", port: int = 0) -> Iterator[str]:
+    """
+    Serve a simulator app with uvicorn in a background thread
+
+    Yields the base URL; port 0 picks a free port.
+        with run_simulator(ultramsg.create_app()) as url: ...
+    """
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError(f"Simulator failed to start on {host}:{port}")
+        time.sleep(0.01)
+    bound_port = server.servers[0].sockets[0].getsockname()[1]
+    try:
+        yield f"http://{host}:{bound_port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+
+__all__ = ["BehaviorConfig", "ProviderBehavior", "run_simulator"]
@@ -0,0 +1,105 @@
+"""
+Run provider simulators locally
+Serves UltraMsg, Supabase REST and smart-locker simulators with configurable
+latency, error and hang rates and rate limits, so the API, load tests and
+failover paths can be exercised without the real providers.
+
+Usage:
+    python -m app.simulators ultramsg --port 9001 --latency-ms 80 --error-rate 0.02
+    python -m app.simulators supabase --port 9002 --fixture fixtures.json
+    python -m app.simulators all      # ultramsg 9001, supabase 9002, smartlocker 9003
+
+Then run the API with e.g.
+    ULTRAMSG_API_URL=http://127.0.0.1:9001/instance161302
+    SUPABASE_URL=http://127.0.0.1:9002
+    SMARTLOCKER_API_URL=http://127.0.0.1:9003
+
+Behaviour can be changed while running: PUT /__sim/behavior {"error_rate": 0.5}
+"""
+import argparse
+import json
+import threading
+
+from .behavior import BehaviorConfig, ProviderBehavior
+from . import smartlocker, supabase, ultramsg
+
+DEFAULT_PORTS = {"ultramsg": 9001, "supabase": 9002, "smartlocker": 9003}
+
+
+def build_app(name: str, args):
+    behavior = ProviderBehavior(
+        BehaviorConfig(
+            latency_ms=args.latency_ms,
+            latency_p99_ms=args.latency_p99_ms,
+            error_rate=args.error_rate,
+            error_status=args.error_status,
+            hang_rate=args.hang_rate,
+            hang_seconds=args.hang_seconds,
+            rate_limit=args.rate_limit,
+            rate_burst=args.rate_burst,
+        ),
+        seed=args.seed,
+    )
+    if name == "ultramsg":
+        return ultramsg.create_app(behavior, token=args.token, webhook_url=args.webhook_url)
+    if name == "supabase":
+        tables = None
+        if args.fixture:
+            with open(args.fixture) as f:
+                tables = json.load(f)
+        return supabase.create_app(behavior, tables=tables)
+    return smartlocker.create_app(
+        behavior,
+        smartlocker.LockerState(args.occupied_share, args.door_close_seconds, seed=args.seed),
+    )
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("provider", choices=[*DEFAULT_PORTS, "all"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="Port (single provider only)")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Median latency")
+    parser.add_argument("--latency-p99-ms", type=float, default=200.0, help="p99 latency (lognormal tail)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--hang-seconds", type=float, default=30.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Requests per second per key (0 = off)")
+    parser.add_argument("--rate-burst", type=int, default=10)
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible runs")
+    parser.add_argument("--token", help="UltraMsg: required token (any accepted by default)")
+    parser.add_argument("--webhook-url", help="UltraMsg: post acks and inbound messages here, "
+                        "e.g. http://127.0.0.1:8000/api/v1/whatsapp/webhook?token=<ULTRAMSG_WEBHOOK_TOKEN>")
+    parser.add_argument("--fixture", help="Supabase: JSON file of {table: [rows]}")
+    parser.add_argument("--occupied-share", type=float, default=0.0, help="Smart locker: initially occupied cells")
+    parser.add_argument("--door-close-seconds", type=float, default=30.0, help="Smart locker: door auto-close")
+    args = parser.parse_args()
+
+    names = list(DEFAULT_PORTS) if args.provider == "all" else [args.provider]
+    if args.port and len(names) > 1:
+        parser.error("--port needs a single provider")
+
+    servers = []
+    for name in names:
+        port = args.port or DEFAULT_PORTS[name]
+        config = uvicorn.Config(build_app(name, args), host=args.host, port=port, log_level="warning")
+        servers.append(uvicorn.Server(config))
+        print(f"{name:<12} http://{args.host}:{port}")
+
+    threads = [threading.Thread(target=server.run, daemon=True) for server in servers[1:]]
+    for thread in threads:
+        thread.start()
+    try:
+        servers[0].run()
+    finally:
+        for server in servers[1:]:
+            server.should_exit = True
+        for thread in threads:
+            thread.join(timeout=5)
+
+
+if __name__ == "__main__":
+    main()
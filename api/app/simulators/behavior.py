@@ -0,0 +1,160 @@
+"""
+Simulated provider behaviour
+Latency distribution, error and hang rates and rate limits shared by all
+provider simulators, applied by an ASGI middleware and adjustable at
+runtime through /__sim/behavior.
+"""
+import asyncio
+import json
+import math
+import random
+import time
+from typing import Callable, Dict, Optional
+
+from fastapi import APIRouter
+from pydantic import BaseModel
+
+Z_99 = 2.326  # standard normal quantile of the 99th percentile
+
+
+class BehaviorConfig(BaseModel):
+    """Knobs of a simulated provider (all optional on update)"""
+    latency_ms: float = 50.0          # median response latency
+    latency_p99_ms: float = 200.0     # 99th percentile (lognormal tail); <= median means fixed
+    error_rate: float = 0.0           # share of requests answered with error_status
+    error_status: int = 500
+    hang_rate: float = 0.0            # share of requests that stall for hang_seconds
+    hang_seconds: float = 30.0
+    rate_limit: float = 0.0           # requests per second per key (0 = unlimited)
+    rate_burst: int = 10
+
+
+class BehaviorUpdate(BaseModel):
+    latency_ms: Optional[float] = None
+    latency_p99_ms: Optional[float] = None
+    error_rate: Optional[float] = None
+    error_status: Optional[int] = None
+    hang_rate: Optional[float] = None
+    hang_seconds: Optional[float] = None
+    rate_limit: Optional[float] = None
+    rate_burst: Optional[int] = None
+
+
+class ProviderBehavior:
+    """Current behaviour of a simulator plus request statistics"""
+
+    def __init__(self, config: Optional[BehaviorConfig] = None, seed: Optional[int] = None):
+        self.config = config or BehaviorConfig()
+        self.random = random.Random(seed)
+        self._buckets: Dict[str, list] = {}  # key -> [tokens, last refill]
+        self.stats = {"requests": 0, "errors": 0, "hangs": 0, "rate_limited": 0}
+
+    def update(self, changes: BehaviorUpdate):
+        self.config = self.config.model_copy(update=changes.model_dump(exclude_none=True))
+        self._buckets.clear()
+
+    def latency(self) -> float:
+        """Seconds to delay the next response"""
+        median = self.config.latency_ms / 1000
+        p99 = self.config.latency_p99_ms / 1000
+        if median <= 0:
+            return 0.0
+        if p99 <= median:
+            return median
+        sigma = math.log(p99 / median) / Z_99
+        return self.random.lognormvariate(math.log(median), sigma)
+
+    def take_token(self, key: str) -> Optional[float]:
+        """None if the request may proceed, otherwise seconds until a token is available"""
+        rate = self.config.rate_limit
+        if rate <= 0:
+            return None
+        now = time.monotonic()
+        tokens, last = self._buckets.get(key, [float(self.config.rate_burst), now])
+        tokens = min(float(self.config.rate_burst), tokens + (now - last) * rate)
+        if tokens < 1:
+            self._buckets[key] = [tokens, now]
+            return (1 - tokens) / rate
+        self._buckets[key] = [tokens - 1, now]
+        return None
+
+
+class SimulatorMiddleware:
+    """
+    ASGI middleware applying a ProviderBehavior to every request
+
+    Requests under /__sim are passed through untouched. rate_key extracts
+    the rate-limit key from the scope (e.g. an instance ID or API key).
+    """
+
+    def __init__(self, app, behavior: ProviderBehavior,
+                 rate_key: Callable[[dict], str] = lambda scope: "global",
+                 error_body: Callable[[int], dict] = lambda status: {"error": "Simulated failure"}):
+        self.app = app
+        self.behavior = behavior
+        self.rate_key = rate_key
+        self.error_body = error_body
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/__sim"):
+            await self.app(scope, receive, send)
+            return
+
+        behavior = self.behavior
+        behavior.stats["requests"] += 1
+
+        retry_after = behavior.take_token(self.rate_key(scope))
+        if retry_after is not None:
+            behavior.stats["rate_limited"] += 1
+            await self._respond(send, 429, self.error_body(429),
+                                [(b"retry-after", str(max(1, math.ceil(retry_after))).encode())])
+            return
+
+        roll = behavior.random.random()
+        if roll < behavior.config.hang_rate:
+            behavior.stats["hangs"] += 1
+            await asyncio.sleep(behavior.config.hang_seconds)
+        else:
+            await asyncio.sleep(behavior.latency())
+
+        if behavior.random.random() < behavior.config.error_rate:
+            behavior.stats["errors"] += 1
+            status = behavior.config.error_status
+            await self._respond(send, status, self.error_body(status))
+            return
+
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _respond(send, status: int, body: dict, headers: Optional[list] = None):
+        payload = json.dumps(body).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(payload)).encode()),
+                *(headers or []),
+            ],
+        })
+        await send({"type": "http.response.body", "body": payload})
+
+
+def behavior_router(behavior: ProviderBehavior) -> APIRouter:
+    """/__sim endpoints to inspect and change a simulator's behaviour at runtime"""
+    router = APIRouter(prefix="/__sim", tags=["Simulator"])
+
+    @router.get("/behavior")
+    async def get_behavior():
+        return behavior.config
+
+    @router.put("/behavior")
+    async def update_behavior(changes: BehaviorUpdate):
+        behavior.update(changes)
+        return behavior.config
+
+    @router.get("/stats")
+    async def get_stats():
+        return behavior.stats
+
+    return router
@@ -0,0 +1,169 @@
+"""
+Smart-locker API simulator
+Serves the locker driver API of the tablet app (/api/locker/...) over an
+in-memory 16-cell KZ004 board, with the same cell sizes, size fallback and
+door auto-close as tablet-app/server/mock-locker.js but deterministic.
+
+Point clients at it with SMARTLOCKER_API_URL=http://127.0.0.1:<port>
+"""
+import asyncio
+import random
+from typing import Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from .behavior import ProviderBehavior, SimulatorMiddleware, behavior_router
+
+CELL_SIZES = {
+    1: "S", 2: "S", 3: "M", 4: "M",
+    5: "M", 6: "M", 7: "L", 8: "L",
+    9: "L", 10: "L", 11: "XL", 12: "XL",
+    13: "XL", 14: "XL", 15: "XL", 16: "XL",
+}
+SIZE_ORDER = ["S", "M", "L", "XL"]
+
+
+def locker_error(message: str, status: int = 500) -> JSONResponse:
+    return JSONResponse(status_code=status, content={"error": True, "message": message})
+
+
+class LockerState:
+    """Cells of one simulated locker board"""
+
+    def __init__(self, occupied_share: float = 0.0, door_close_seconds: float = 30.0,
+                 seed: Optional[int] = None):
+        self.door_close_seconds = door_close_seconds
+        rng = random.Random(seed)
+        self.cells: Dict[str, dict] = {}
+        for number, size in CELL_SIZES.items():
+            occupied = rng.random() < occupied_share
+            self.cells[f"cell-{number}"] = {
+                "id": f"cell-{number}",
+                "number": number,
+                "size": size,
+                "status": "occupied" if occupied else "available",
+                "doorOpen": False,
+                "hasItems": occupied,
+                "weight": 0,
+                "orderId": None,
+            }
+
+    def available(self, size: Optional[str] = None) -> list:
+        return [
+            cell for cell in self.cells.values()
+            if cell["status"] == "available" and (size is None or cell["size"] == size)
+        ]
+
+    def open(self, cell: dict) -> dict:
+        cell["status"] = "open"
+        cell["doorOpen"] = True
+        if self.door_close_seconds > 0:
+            asyncio.get_running_loop().call_later(self.door_close_seconds, self.close_door, cell["id"])
+        return {"success": True, "cellId": cell["id"], "cellNumber": cell["number"], "timeout": 60}
+
+    def close_door(self, cell_id: str):
+        cell = self.cells[cell_id]
+        if cell["doorOpen"]:
+            cell["doorOpen"] = False
+            cell["status"] = "occupied"
+            cell["hasItems"] = True
+
+
+def create_app(behavior: Optional[ProviderBehavior] = None,
+               state: Optional[LockerState] = None) -> FastAPI:
+    """
+    Args:
+        behavior: Latency, errors and rate limits (one global rate-limit key)
+        state: Initial cells; all 16 available when None
+    """
+    behavior = behavior or ProviderBehavior()
+    locker = state or LockerState()
+
+    app = FastAPI(title="Smart-locker simulator")
+    app.add_middleware(
+        SimulatorMiddleware,
+        behavior=behavior,
+        error_body=lambda status: {"error": True, "message": f"Simulated HTTP {status}"},
+    )
+    app.include_router(behavior_router(behavior))
+
+    async def body(request: Request) -> dict:
+        return await request.json() if await request.body() else {}
+
+    @app.post("/__sim/cells/{cell_id}/close")
+    async def close_door(cell_id: str):
+        if cell_id not in locker.cells:
+            return locker_error("Cell not found", 404)
+        locker.close_door(cell_id)
+        return locker.cells[cell_id]
+
+    @app.get("/api/locker/status")
+    async def get_status():
+        return {
+            "connected": True,
+            "address": 0x01,
+            "firmwareVersion": "1.0.0-sim",
+            "totalCells": len(locker.cells),
+            "cells": list(locker.cells.values()),
+        }
+
+    @app.get("/api/locker/cells")
+    async def get_cells():
+        return list(locker.cells.values())
+
+    @app.get("/api/locker/cells/available")
+    async def get_available(size: Optional[str] = None):
+        return locker.available(size)
+
+    @app.post("/api/locker/cells/open-available")
+    async def open_available(request: Request):
+        payload = await body(request)
+        size = payload.get("size") or "M"
+        start = SIZE_ORDER.index(size) if size in SIZE_ORDER else 0
+        for candidate in SIZE_ORDER[start:]:
+            cells = locker.available(candidate)
+            if cells:
+                return locker.open(cells[0])
+        return locker_error("No available cells")
+
+    @app.get("/api/locker/cells/{cell_id}")
+    async def get_cell(cell_id: str):
+        if cell_id not in locker.cells:
+            return locker_error("Cell not found", 404)
+        return locker.cells[cell_id]
+
+    @app.post("/api/locker/cells/{cell_id}/open")
+    async def open_cell(cell_id: str):
+        if cell_id not in locker.cells:
+            return locker_error("Cell not found")
+        return locker.open(locker.cells[cell_id])
+
+    @app.post("/api/locker/cells/{cell_id}/reserve")
+    async def reserve_cell(cell_id: str, request: Request):
+        cell = locker.cells.get(cell_id)
+        if cell is not None:
+            cell["status"] = "reserved"
+            cell["orderId"] = (await body(request)).get("orderId")
+        return {"success": cell is not None}
+
+    @app.post("/api/locker/cells/{cell_id}/release")
+    async def release_cell(cell_id: str):
+        cell = locker.cells.get(cell_id)
+        if cell is not None:
+            cell.update(status="available", orderId=None, hasItems=False, weight=0)
+        return {"success": cell is not None}
+
+    @app.post("/api/locker/cells/{cell_id}/led")
+    async def set_led(cell_id: str):
+        return {"success": cell_id in locker.cells}
+
+    @app.get("/api/locker/cells/{cell_id}/weight")
+    async def get_weight(cell_id: str):
+        cell = locker.cells.get(cell_id)
+        if cell is None:
+            return {"weight": 0}
+        cell["weight"] = behavior.random.randint(500, 5500) if cell["hasItems"] else 0
+        return {"weight": cell["weight"]}
+
+    return app
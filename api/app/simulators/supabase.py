@@ -0,0 +1,258 @@
+"""
+Supabase REST (PostgREST) simulator
+In-memory tables served under /rest/v1 with the subset of PostgREST that
+SupabaseClient uses: horizontal filters (eq, neq, gt, gte, lt, lte, in,
+is, like, ilike), select, order, limit/offset, Range pagination with
+Content-Range counts, inserts and upserts, PATCH, DELETE and the
+orders_summary_by_status RPC.
+
+Point the API at it with SUPABASE_URL=http://127.0.0.1:<port>
+"""
+import fnmatch
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+
+from .behavior import ProviderBehavior, SimulatorMiddleware, behavior_router
+
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "columns", "on_conflict"}
+
+Row = Dict[str, Any]
+
+
+def postgrest_error(status: int, message: str, code: str = "PGRST000") -> JSONResponse:
+    return JSONResponse(
+        status_code=status,
+        content={"code": code, "message": message, "details": None, "hint": None},
+    )
+
+
+# ===========================================
+# Filtering
+# ===========================================
+
+def _coerce(operand: str, value: Any) -> Any:
+    """Convert a query-string operand to the type of the stored value"""
+    if isinstance(value, bool):
+        return operand.lower() == "true"
+    if isinstance(value, (int, float)):
+        try:
+            return type(value)(float(operand)) if isinstance(value, float) else int(operand)
+        except ValueError:
+            return operand
+    return operand
+
+
+def _matches(row: Row, column: str, expression: str) -> bool:
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    operator, _, operand = expression.partition(".")
+    value = row.get(column)
+
+    if operator == "is":
+        result = value is None if operand == "null" else value is (operand == "true")
+    elif operator == "in":
+        items = [item.strip().strip('"') for item in operand.strip("()").split(",") if item]
+        result = value is not None and value in [_coerce(item, value) for item in items]
+    elif operator in ("like", "ilike"):
+        pattern = operand.replace("*", "%").replace("%", "*")
+        text = "" if value is None else str(value)
+        if operator == "ilike":
+            result = fnmatch.fnmatchcase(text.lower(), pattern.lower())
+        else:
+            result = fnmatch.fnmatchcase(text, pattern)
+    elif value is None:
+        result = False
+    else:
+        target = _coerce(operand, value)
+        try:
+            result = {
+                "eq": value == target,
+                "neq": value != target,
+                "gt": value > target,
+                "gte": value >= target,
+                "lt": value < target,
+                "lte": value <= target,
+            }[operator]
+        except (KeyError, TypeError):
+            result = False
+    return not result if negate else result
+
+
+def _filter(rows: List[Row], params) -> List[Row]:
+    filters = [(key, value) for key, value in params.multi_items() if key not in RESERVED_PARAMS]
+    return [row for row in rows if all(_matches(row, key, value) for key, value in filters)]
+
+
+def _order(rows: List[Row], order: Optional[str]) -> List[Row]:
+    if not order:
+        return rows
+    for term in reversed(order.split(",")):
+        column, *modifiers = term.split(".")
+        descending = "desc" in modifiers
+        present = [row for row in rows if row.get(column) is not None]
+        missing = [row for row in rows if row.get(column) is None]
+        present.sort(key=lambda row: row[column], reverse=descending)
+        rows = present + missing if not descending else missing + present
+    return rows
+
+
+def _project(rows: List[Row], select: Optional[str]) -> List[Row]:
+    if not select or select == "*":
+        return [dict(row) for row in rows]
+    columns = [column.strip() for column in select.split(",") if "(" not in column]
+    return [{column: row.get(column) for column in columns} for row in rows]
+
+
+def _prefer(request: Request) -> Dict[str, str]:
+    prefer = {}
+    for part in request.headers.get("prefer", "").split(","):
+        key, _, value = part.strip().partition("=")
+        if key:
+            prefer[key] = value
+    return prefer
+
+
+# ===========================================
+# App
+# ===========================================
+
+def create_app(behavior: Optional[ProviderBehavior] = None,
+               tables: Optional[Dict[str, List[Row]]] = None) -> FastAPI:
+    """
+    Args:
+        behavior: Latency, errors and rate limits (rate-limited per apikey)
+        tables: Initial rows per table, e.g. loaded from a JSON fixture
+    """
+    behavior = behavior or ProviderBehavior()
+    store: Dict[str, List[Row]] = {name: [dict(row) for row in rows] for name, rows in (tables or {}).items()}
+
+    app = FastAPI(title="Supabase REST simulator")
+    app.add_middleware(
+        SimulatorMiddleware,
+        behavior=behavior,
+        rate_key=lambda scope: dict(scope["headers"]).get(b"apikey", b"").decode(),
+        error_body=lambda status: {"code": "PGRST000", "message": f"Simulated HTTP {status}",
+                                   "details": None, "hint": None},
+    )
+    app.include_router(behavior_router(behavior))
+
+    @app.get("/__sim/tables")
+    async def table_sizes():
+        return {name: len(rows) for name, rows in store.items()}
+
+    @app.put("/__sim/tables/{table}")
+    async def load_table(table: str, rows: List[Row]):
+        store[table] = [dict(row) for row in rows]
+        return {"table": table, "rows": len(rows)}
+
+    @app.post("/rest/v1/rpc/{function}")
+    async def rpc(function: str, request: Request):
+        params = await request.json() if await request.body() else {}
+        if function != "orders_summary_by_status":
+            return postgrest_error(404, f"Could not find the function public.{function}", "PGRST202")
+        club_id = params.get("p_club_id")
+        statuses = {row["id"]: row.get("name") for row in store.get("dim_status_types", [])}
+        summary: Dict[Any, Row] = {}
+        for order in store.get("orders", []):
+            if club_id is not None and order.get("club_id") != club_id:
+                continue
+            status_id = order.get("status_id")
+            entry = summary.setdefault(status_id, {
+                "status_id": status_id,
+                "status_name": statuses.get(status_id) or "Unknown",
+                "order_count": 0,
+                "total_revenue": 0.0,
+            })
+            entry["order_count"] += 1
+            entry["total_revenue"] += order.get("price") or 0
+        return sorted(summary.values(), key=lambda entry: (entry["status_id"] is None, entry["status_id"] or 0))
+
+    @app.get("/rest/v1/{table}")
+    async def select(table: str, request: Request):
+        if table not in store:
+            return postgrest_error(404, f"relation \"public.{table}\" does not exist", "42P01")
+        params = request.query_params
+        rows = _order(_filter(store[table], params), params.get("order"))
+        total = len(rows)
+
+        start = int(params.get("offset", 0))
+        end = start + int(params["limit"]) - 1 if "limit" in params else total - 1
+        range_header = request.headers.get("range")
+        if range_header:
+            first, _, last = range_header.partition("-")
+            start = int(first)
+            end = min(end, int(last)) if last else end
+        if start > 0 and start >= total:
+            return Response(status_code=416, headers={"content-range": f"*/{total}"})
+
+        page = rows[start:end + 1]
+        headers = {}
+        if range_header or "count" in _prefer(request):
+            count = str(total) if _prefer(request).get("count") == "exact" else "*"
+            span = f"{start}-{start + len(page) - 1}" if page else "*"
+            headers["content-range"] = f"{span}/{count}"
+        return JSONResponse(
+            status_code=206 if range_header and len(page) < total else 200,
+            content=_project(page, params.get("select")),
+            headers=headers,
+        )
+
+    @app.post("/rest/v1/{table}")
+    async def insert(table: str, request: Request):
+        payload = json.loads(await request.body() or b"[]")
+        records = payload if isinstance(payload, list) else [payload]
+        prefer = _prefer(request)
+        rows = store.setdefault(table, [])
+        on_conflict = request.query_params.get("on_conflict", "id").split(",")
+        merge = prefer.get("resolution") == "merge-duplicates"
+
+        written = []
+        for record in records:
+            row = dict(record)
+            row.setdefault("id", str(uuid.uuid4()))
+            row.setdefault("created_at", datetime.utcnow().isoformat())
+            key = tuple(row.get(column) for column in on_conflict)
+            existing = next(
+                (r for r in rows if tuple(r.get(column) for column in on_conflict) == key), None
+            )
+            if existing is not None:
+                if not merge:
+                    return postgrest_error(
+                        409, f"duplicate key value violates unique constraint \"{table}_pkey\"", "23505"
+                    )
+                existing.update(record)
+                written.append(existing)
+            else:
+                rows.append(row)
+                written.append(row)
+
+        if prefer.get("return") == "representation":
+            return JSONResponse(status_code=201, content=written)
+        return Response(status_code=201)
+
+    @app.patch("/rest/v1/{table}")
+    async def update(table: str, request: Request):
+        changes = await request.json()
+        matched = _filter(store.get(table, []), request.query_params)
+        for row in matched:
+            row.update(changes)
+        if _prefer(request).get("return") == "representation":
+            return matched
+        return Response(status_code=204)
+
+    @app.delete("/rest/v1/{table}")
+    async def delete(table: str, request: Request):
+        matched = _filter(store.get(table, []), request.query_params)
+        ids = {id(row) for row in matched}
+        store[table] = [row for row in store.get(table, []) if id(row) not in ids]
+        if _prefer(request).get("return") == "representation":
+            return matched
+        return Response(status_code=204)
+
+    return app
@@ -0,0 +1,120 @@
+"""
+UltraMsg WhatsApp API simulator
+Accepts POST /{instance_id}/messages/chat like api.ultramsg.com and keeps
+the sent messages in memory (GET /__sim/messages).
+
+Point the API at it with ULTRAMSG_API_URL=http://127.0.0.1:<port>/<instance_id>
+
+With a webhook URL it also calls back like UltraMsg: message_ack events
+(server, then device) for every sent message, and message_received for
+client replies injected with POST /__sim/inbound {"from": "7707...", "body": "..."}.
+"""
+import asyncio
+import itertools
+from collections import deque
+from datetime import datetime
+from typing import Optional, Set
+from urllib.parse import parse_qs
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from .behavior import ProviderBehavior, SimulatorMiddleware, behavior_router
+
+
+def create_app(behavior: Optional[ProviderBehavior] = None, token: Optional[str] = None,
+               history: int = 10000, webhook_url: Optional[str] = None,
+               ack_delays: tuple = (0.1, 1.0)) -> FastAPI:
+    """
+    Args:
+        behavior: Latency, errors and rate limits (rate-limited per instance ID)
+        token: Required token; any token is accepted when None
+        history: Number of sent messages kept for inspection
+        webhook_url: Where to post webhook events (none when None)
+        ack_delays: Seconds after sending of the server and device acks
+    """
+    behavior = behavior or ProviderBehavior()
+    app = FastAPI(title="UltraMsg simulator")
+    app.add_middleware(
+        SimulatorMiddleware,
+        behavior=behavior,
+        rate_key=lambda scope: scope["path"].strip("/").split("/")[0],
+        error_body=lambda status: {"error": "Too many requests" if status == 429 else "Internal error"},
+    )
+    app.include_router(behavior_router(behavior))
+
+    messages = deque(maxlen=history)
+    message_ids = itertools.count(1)
+    callbacks: Set[asyncio.Task] = set()
+
+    async def post_webhook(instance_id: str, event: dict, delay: float = 0.0):
+        await asyncio.sleep(delay)
+        try:
+            async with httpx.AsyncClient(timeout=5.0) as client:
+                await client.post(webhook_url, json={"instanceId": instance_id, **event})
+        except httpx.HTTPError:
+            pass  # like UltraMsg, webhook failures are not the sender's problem
+
+    def schedule_webhook(instance_id: str, event: dict, delay: float = 0.0):
+        if webhook_url:
+            task = asyncio.create_task(post_webhook(instance_id, event, delay))
+            callbacks.add(task)
+            task.add_done_callback(callbacks.discard)
+
+    @app.post("/{instance_id}/messages/chat")
+    async def send_chat(instance_id: str, request: Request):
+        # Form-encoded like the real API (parsed here to avoid python-multipart)
+        form = {key: values[0] for key, values in parse_qs((await request.body()).decode()).items()}
+        form.update(request.query_params)
+        to, body = form.get("to", ""), form.get("body", "")
+        if token is not None and form.get("token") != token:
+            return JSONResponse(
+                status_code=401,
+                content={"error": "Wrong token. Please provide token as a GET parameter."},
+            )
+        if not to or not body:
+            return JSONResponse(status_code=400, content={"error": "to and body are required"})
+
+        message_id = next(message_ids)
+        messages.append({
+            "id": message_id,
+            "instance_id": instance_id,
+            "to": to,
+            "body": body,
+            "sent_at": datetime.utcnow().isoformat(),
+        })
+        for ack, delay in zip(("server", "device"), ack_delays):
+            schedule_webhook(instance_id, {
+                "event_type": "message_ack",
+                "id": str(message_id),
+                "data": {"to": f"{to}@c.us", "ack": ack, "fromMe": True, "type": "chat"},
+            }, delay)
+        return {"sent": "true", "message": "ok", "id": message_id}
+
+    @app.post("/__sim/inbound")
+    async def inbound_message(request: Request, instance_id: str = "instance1"):
+        message = await request.json()
+        schedule_webhook(instance_id, {
+            "event_type": "message_received",
+            "data": {
+                "from": f"{message['from'].lstrip('+')}@c.us",
+                "body": message.get("body", ""),
+                "type": message.get("type", "chat"),
+                "pushname": message.get("pushname"),
+                "fromMe": False,
+            },
+        })
+        return {"success": True, "webhook": webhook_url is not None}
+
+    @app.get("/__sim/messages")
+    async def list_messages(to: Optional[str] = None, limit: int = 100):
+        selected = [m for m in messages if to is None or m["to"] == to]
+        return selected[-limit:]
+
+    @app.delete("/__sim/messages")
+    async def clear_messages():
+        messages.clear()
+        return {"success": True}
+
+    return app
@@ -0,0 +1 @@
+# Developer tools (benchmarks, data generators)
@@ -0,0 +1,127 @@
+"""
+Response serialization benchmark
+Compares per-request CPU of the stdlib response path with the pre-validated
+orjson path for /orders/details and /admin/orders payloads.
+
+Usage:
+    python -m app.tools.bench_responses [--rows 100] [--iterations 500]
+"""
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime, date
+from typing import Callable, List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from ..core.responses import ListSerializer
+from ..routes.admin import OrderListItem
+from ..schemas.order import OrderWithDetails
+
+
+def make_order_details_rows(count: int) -> List[dict]:
+    """Build row mappings shaped like the /orders/details projection"""
+    now = datetime.now()
+    return [
+        {
+            "id": uuid.uuid4(),
+            "user_id": uuid.uuid4(),
+            "price": 2500.0,
+            "package_id": f"TEST-{i:04d}",
+            "club_id": 1,
+            "status_id": 1 + i % 5,
+            "is_tariff_based": bool(i % 2),
+            "tariff_price": None,
+            "locker_device_id": "device-1",
+            "locker_cell_id": str(i % 40),
+            "receipt_url": None,
+            "pickup_code": f"{i % 10000:04d}",
+            "order_number": f"{now:%Y%m%d}-TEST-{i:03d}",
+            "daily_sequence": i,
+            "created_date": date.today(),
+            "created_at": now,
+            "username": f"client{i}",
+            "phone": f"7700{i:07d}",
+            "subscription_type": "Безлимит",
+            "status_name": "Выполняется",
+            "status_code": "in_progress",
+            "club_name": "Test Club",
+            "club_code": "TEST",
+            "rating": 5,
+            "rating_comment": None,
+        }
+        for i in range(count)
+    ]
+
+
+def make_admin_order_rows(count: int) -> List[dict]:
+    """Build rows shaped like the /admin/orders list items"""
+    now = datetime.now()
+    return [
+        {
+            "id": uuid.uuid4(),
+            "order_number": f"{now:%Y%m%d}-TEST-{i:03d}",
+            "user_name": f"client{i}",
+            "user_phone": f"7700{i:07d}",
+            "club_name": "Test Club",
+            "status_id": 1 + i % 5,
+            "status_name": "Выполняется",
+            "price": 2500.0,
+            "created_at": now,
+        }
+        for i in range(count)
+    ]
+
+
+def stdlib_path(model) -> Callable[[List[dict]], bytes]:
+    """Model per row, response_model re-validation, jsonable_encoder, json.dumps"""
+    adapter = TypeAdapter(List[model])
+
+    def run(rows: List[dict]) -> bytes:
+        items = [model(**row) for row in rows]
+        validated = adapter.validate_python(
+            [item.model_dump() for item in items]
+        )
+        content = jsonable_encoder(validated)
+        return json.dumps(content, ensure_ascii=False).encode("utf-8")
+
+    return run
+
+
+def fast_path(model) -> Callable[[List[dict]], bytes]:
+    """Single TypeAdapter validation and direct JSON dump"""
+    serializer = ListSerializer(model)
+    return serializer.dump
+
+
+def measure(fn: Callable[[List[dict]], bytes], rows: List[dict], iterations: int) -> float:
+    """Return mean CPU milliseconds per call"""
+    fn(rows)  # warm-up
+    start = time.process_time()
+    for _ in range(iterations):
+        fn(rows)
+    return (time.process_time() - start) * 1000 / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    cases = [
+        ("/orders/details", OrderWithDetails, make_order_details_rows(args.rows)),
+        ("/admin/orders", OrderListItem, make_admin_order_rows(args.rows)),
+    ]
+
+    print(f"{'endpoint':<18} {'stdlib ms':>10} {'fast ms':>10} {'speedup':>8}")
+    for endpoint, model, rows in cases:
+        slow = measure(stdlib_path(model), rows, args.iterations)
+        fast = measure(fast_path(model), rows, args.iterations)
+        print(f"{endpoint:<18} {slow:>10.3f} {fast:>10.3f} {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""
+Load test with a gym-day traffic model
+Drives a running API with kiosk visits (check-phone, login, drop-off,
+pickup), courier visits, laundry stage transitions and admin dashboard
+polling, and reports throughput, p50/p99 latency and error rate per endpoint.
+
+Traffic follows an hourly gym-attendance profile (morning and evening
+peaks); --hours of simulated day are compressed into --duration seconds
+and --peak scales the busiest hours relative to the quietest.
+
+Load-test clubs, clients and a staff user are created in DATABASE_URL
+before the run (codes LT001..., phones +7999...). Start the API with
+ULTRAMSG_API_URL pointing at the simulator (python -m app.simulators
+ultramsg), not the real provider.
+
+Usage:
+    python -m app.tools.loadtest --base-url http://localhost:8000 \\
+        --clubs 10 --duration 120 --peak 3
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..core.security import create_access_token, get_password_hash
+from ..models import Club, User
+
+API = settings.API_PREFIX
+LOADTEST_PIN = "4321"
+
+# Relative visits per hour of day (0-23)
+GYM_DAY = [
+    0.02, 0.01, 0.01, 0.01, 0.02, 0.10, 0.45, 0.85, 0.90, 0.60, 0.40, 0.35,
+    0.45, 0.50, 0.35, 0.35, 0.50, 0.80, 1.00, 0.95, 0.75, 0.45, 0.20, 0.06,
+]
+
+
+# ===========================================
+# Fixtures
+# ===========================================
+
+def prepare_fixtures(club_count: int, clients_per_club: int) -> dict:
+    """Create (or reuse) load-test clubs, clients and a staff user"""
+    db = SessionLocal()
+    try:
+        pin_hash = get_password_hash(LOADTEST_PIN)  # bcrypt once, not per client
+        clubs = []
+        for n in range(1, club_count + 1):
+            code = f"LT{n:03d}"
+            club = db.query(Club).filter(Club.code == code).first()
+            if club is None:
+                club = Club(code=code, name=f"Load Test Club {n}")
+                db.add(club)
+                db.flush()
+
+            phones = [f"+7999{n:03d}{i:04d}" for i in range(clients_per_club)]
+            existing = {
+                phone for (phone,) in
+                db.query(User.phone).filter(User.phone.in_(phones)).all()
+            }
+            db.add_all(
+                User(username=f"loadtest-{n}-{i}", phone=phone, club_id=club.id,
+                     pin_code=pin_hash, role="client")
+                for i, phone in enumerate(phones) if phone not in existing
+            )
+            clubs.append({"id": club.id, "phones": phones})
+
+        staff = db.query(User).filter(User.username == "loadtest-staff").first()
+        if staff is None:
+            staff = User(username="loadtest-staff", role="admin")
+            db.add(staff)
+        db.commit()
+        return {
+            "clubs": clubs,
+            "staff_token": create_access_token({"sub": str(staff.id)}),
+        }
+    finally:
+        db.close()
+
+
+# ===========================================
+# Measurement
+# ===========================================
+
+class Stats:
+    """Latency samples and errors per endpoint"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, endpoint: str, seconds: float, ok: bool):
+        self.latencies[endpoint].append(seconds)
+        if not ok:
+            self.errors[endpoint] += 1
+
+    @staticmethod
+    def percentile(samples: List[float], q: float) -> float:
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def report(self, elapsed: float) -> List[dict]:
+        rows = []
+        for endpoint, samples in sorted(self.latencies.items()):
+            rows.append({
+                "endpoint": endpoint,
+                "requests": len(samples),
+                "rps": round(len(samples) / elapsed, 2),
+                "p50_ms": round(self.percentile(samples, 0.50) * 1000, 1),
+                "p99_ms": round(self.percentile(samples, 0.99) * 1000, 1),
+                "error_rate": round(self.errors[endpoint] / len(samples), 4),
+            })
+        return rows
+
+
+class Driver:
+    """Shared HTTP client, clock and stats for all actors"""
+
+    def __init__(self, client: httpx.AsyncClient, args, fixtures: dict):
+        self.client = client
+        self.args = args
+        self.fixtures = fixtures
+        self.stats = Stats()
+        self.started = time.monotonic()
+        self.deadline = self.started + args.duration
+        self.staff_headers = {"Authorization": f"Bearer {fixtures['staff_token']}"}
+
+    @property
+    def running(self) -> bool:
+        return time.monotonic() < self.deadline
+
+    def load_factor(self) -> float:
+        """Traffic multiplier for the current simulated hour"""
+        progress = (time.monotonic() - self.started) / self.args.duration
+        hour = int(self.args.start_hour + progress * self.args.hours) % 24
+        return 1 + (self.args.peak - 1) * GYM_DAY[hour]
+
+    async def think(self, mean_interval: float):
+        """Sleep an exponentially distributed time scaled by the load factor"""
+        await asyncio.sleep(random.expovariate(self.load_factor() / mean_interval))
+
+    async def call(self, endpoint: str, method: str, path: str,
+                   expected=(200,), **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, API + path, **kwargs)
+        except httpx.HTTPError:
+            self.stats.record(endpoint, time.perf_counter() - start, ok=False)
+            return None
+        self.stats.record(endpoint, time.perf_counter() - start,
+                          ok=response.status_code in expected)
+        return response
+
+
+# ===========================================
+# Actors
+# ===========================================
+
+async def kiosk(driver: Driver, club: dict):
+    """Clients at one club's tablet: drop off dirty items or pick up clean ones"""
+    while driver.running:
+        await driver.think(driver.args.kiosk_interval)
+        phone = random.choice(club["phones"])
+        await driver.call("tablet check-phone", "POST", "/tablet/check-phone",
+                          json={"phone": phone})
+        response = await driver.call("tablet login", "POST", "/tablet/login",
+                                     json={"phone": phone, "pin_code": LOADTEST_PIN})
+        if response is None or response.status_code != 200:
+            continue
+        user_id = response.json()["user_id"]
+
+        response = await driver.call("tablet ready-orders", "GET",
+                                     f"/tablet/user/{user_id}/ready-orders")
+        ready = response.json() if response is not None and response.status_code == 200 else []
+        if ready:
+            await driver.call("tablet pickup", "POST", "/tablet/pickup",
+                              json={"user_id": user_id, "order_id": ready[0]["id"]})
+        else:
+            await driver.call("tablet drop-off", "POST", "/tablet/drop-off", json={
+                "user_id": user_id,
+                "club_id": club["id"],
+                "locker_cell_id": str(random.randint(1, 40)),
+            })
+
+
+async def courier(driver: Driver, club: dict):
+    """Periodic courier visits collecting dirty bags and delivering clean ones"""
+    while driver.running:
+        await driver.think(driver.args.courier_interval)
+        club_id = club["id"]
+        await driver.call("courier start-visit", "POST", f"/courier/start-visit/{club_id}")
+
+        response = await driver.call("courier dirty-items", "GET", "/courier/dirty-items",
+                                     params={"club_id": club_id})
+        dirty = response.json() if response is not None and response.status_code == 200 else []
+        for order in dirty:
+            await driver.call("courier pickup-dirty", "POST", "/courier/pickup-dirty", json={
+                "order_id": order["id"],
+                "courier_bag_number": f"BAG-{random.randint(1, 9999):04d}",
+            })
+
+        response = await driver.call("courier clean-items", "GET", "/courier/clean-items",
+                                     params={"club_id": club_id})
+        clean = response.json() if response is not None and response.status_code == 200 else []
+        for order in clean:
+            await driver.call("courier deliver-clean", "POST", "/courier/deliver-clean", json={
+                "order_id": order["id"],
+                "locker_cell_id": str(random.randint(1, 40)),
+            })
+
+        await driver.call("courier end-visit", "POST", f"/courier/end-visit/{club_id}",
+                          params={"dirty_picked": len(dirty), "clean_delivered": len(clean)})
+
+
+async def laundry(driver: Driver):
+    """Laundry staff moving orders through receive, wash and pack"""
+    headers = driver.staff_headers
+    stages = [
+        ("/laundry/orders/pending-receipt", "/laundry/receive-item",
+         lambda order: {"order_id": order["id"], "photo_url": "https://example.com/received.jpg",
+                        "bag_number": order.get("package_id") or "BAG"}),
+        ("/laundry/orders/in-washing", "/laundry/mark-washed",
+         lambda order: {"order_id": order["id"]}),
+        ("/laundry/orders/ready-to-pack", "/laundry/pack-item",
+         lambda order: {"order_id": order["id"], "photo_url": "https://example.com/ready.jpg"}),
+    ]
+    while driver.running:
+        await driver.think(driver.args.laundry_interval)
+        for list_path, action_path, body in stages:
+            response = await driver.call(f"laundry {list_path.rsplit('/', 1)[-1]}", "GET",
+                                         list_path, headers=headers)
+            orders = response.json() if response is not None and response.status_code == 200 else []
+            for order in orders[:driver.args.laundry_batch]:
+                await driver.call(f"laundry {action_path.rsplit('/', 1)[-1]}", "POST",
+                                  action_path, json=body(order), headers=headers)
+
+
+async def admin_dashboard(driver: Driver):
+    """Admin panel polling dashboard widgets"""
+    club_ids = [club["id"] for club in driver.fixtures["clubs"]]
+    while driver.running:
+        await asyncio.sleep(driver.args.admin_interval)
+        club_id = random.choice(club_ids + [None])
+        params = {"club_id": club_id} if club_id else {}
+        await driver.call("admin dashboard/stats", "GET", "/admin/dashboard/stats", params=params)
+        await driver.call("admin orders-by-status", "GET", "/admin/dashboard/orders-by-status",
+                          params=params)
+        await driver.call("admin orders", "GET", "/admin/orders", params=params)
+
+
+# ===========================================
+# Entry point
+# ===========================================
+
+async def run(args) -> List[dict]:
+    fixtures = prepare_fixtures(args.clubs, args.clients_per_club)
+    limits = httpx.Limits(max_connections=args.connections)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30.0) as client:
+        driver = Driver(client, args, fixtures)
+        actors = []
+        for club in fixtures["clubs"]:
+            actors += [kiosk(driver, club) for _ in range(args.kiosks_per_club)]
+            actors.append(courier(driver, club))
+        actors += [laundry(driver)]
+        actors += [admin_dashboard(driver) for _ in range(args.admins)]
+        await asyncio.gather(*actors)
+        return driver.stats.report(time.monotonic() - driver.started)
+
+
+def print_report(rows: List[dict]):
+    print(f"{'endpoint':<30} {'requests':>9} {'rps':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for row in rows:
+        print(f"{row['endpoint']:<30} {row['requests']:>9} {row['rps']:>8.2f} "
+              f"{row['p50_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['error_rate']:>7.2%}")
+    total = sum(row["requests"] for row in rows)
+    print(f"{'total':<30} {total:>9} {sum(row['rps'] for row in rows):>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--duration", type=float, default=60.0, help="Test length in seconds")
+    parser.add_argument("--clubs", type=int, default=5)
+    parser.add_argument("--clients-per-club", type=int, default=200)
+    parser.add_argument("--kiosks-per-club", type=int, default=2)
+    parser.add_argument("--kiosk-interval", type=float, default=5.0,
+                        help="Mean seconds between visits per kiosk at base load")
+    parser.add_argument("--courier-interval", type=float, default=30.0)
+    parser.add_argument("--laundry-interval", type=float, default=5.0)
+    parser.add_argument("--laundry-batch", type=int, default=20)
+    parser.add_argument("--admins", type=int, default=2)
+    parser.add_argument("--admin-interval", type=float, default=10.0)
+    parser.add_argument("--peak", type=float, default=3.0,
+                        help="Load multiplier of the busiest hour")
+    parser.add_argument("--start-hour", type=int, default=6)
+    parser.add_argument("--hours", type=float, default=16.0,
+                        help="Simulated hours compressed into the test duration")
+    parser.add_argument("--connections", type=int, default=100)
+    parser.add_argument("--json", dest="json_path", help="Also write the report as JSON")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(args))
+    print_report(rows)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"args": vars(args), "endpoints": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
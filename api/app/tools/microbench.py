@@ -0,0 +1,157 @@
+"""
+Micro-benchmarks for hot in-process code paths
+Measures per-call CPU of response serialization, schema validation, order
+number and phone formatting and JWT handling, stores results as a JSON
+baseline and flags slowdowns against it.
+
+Usage:
+    python -m app.tools.microbench run [--save]     # measure (and store baseline)
+    python -m app.tools.microbench compare          # exit 1 on regressions
+    python -m app.tools.microbench compare --threshold 0.3 -k serialize
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import timeit
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+from ..core.security import create_access_token, decode_token
+from ..core.utils import format_phone_number, generate_order_number
+from ..routes.admin import order_list_serializer
+from ..routes.orders import order_details_serializer
+from ..schemas.order import OrderWithDetails
+from .bench_responses import make_admin_order_rows, make_order_details_rows
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "microbench_baseline.json")
+
+REPEAT = 7
+
+
+# ===========================================
+# Benchmarks
+# ===========================================
+
+def build_benchmarks() -> List[Tuple[str, Callable[[], object]]]:
+    """(name, zero-argument callable) pairs; inputs are built once up front"""
+    details_rows = make_order_details_rows(100)
+    admin_rows = make_admin_order_rows(50)
+    details_row = details_rows[0]
+    order_date = datetime(2026, 2, 16, 10, 30)
+    phones = ["+7 (700) 123-45-67", "87001234567", "7001234567"]
+    token = create_access_token({"sub": "8f14e45f-ceea-467e-a1b2-5f1c7bf6c0a1"})
+
+    return [
+        ("serialize.orders_details_100", lambda: order_details_serializer.dump(details_rows)),
+        ("serialize.admin_orders_50", lambda: order_list_serializer.dump(admin_rows)),
+        ("validate.order_with_details", lambda: OrderWithDetails.model_validate(details_row)),
+        ("utils.generate_order_number", lambda: generate_order_number("test", order_date, 42)),
+        ("utils.format_phone_number", lambda: [format_phone_number(phone) for phone in phones]),
+        ("security.jwt_encode", lambda: create_access_token({"sub": "8f14e45f-ceea-467e-a1b2-5f1c7bf6c0a1"})),
+        ("security.jwt_decode", lambda: decode_token(token)),
+    ]
+
+
+def measure(fn: Callable[[], object]) -> Dict[str, float]:
+    """Median and best microseconds per call over REPEAT timed batches"""
+    timer = timeit.Timer(fn, timer=time.process_time)
+    number, _ = timer.autorange()
+    per_call = [total / number * 1e6 for total in timer.repeat(REPEAT, number)]
+    return {
+        "median_us": round(statistics.median(per_call), 3),
+        "min_us": round(min(per_call), 3),
+        "calls": number * REPEAT,
+    }
+
+
+def run_benchmarks(keyword: str = None) -> Dict[str, dict]:
+    results = {}
+    for name, fn in build_benchmarks():
+        if keyword and keyword not in name:
+            continue
+        results[name] = measure(fn)
+    return results
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor() or platform.machine(),
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+# ===========================================
+# Reporting
+# ===========================================
+
+def print_results(results: Dict[str, dict]):
+    print(f"{'benchmark':<34} {'median us':>11} {'min us':>11}")
+    for name, result in results.items():
+        print(f"{name:<34} {result['median_us']:>11.3f} {result['min_us']:>11.3f}")
+
+
+def compare(baseline: Dict[str, dict], results: Dict[str, dict], threshold: float) -> List[str]:
+    """
+    Names of benchmarks more than threshold slower than baseline
+    Compares the best batch of each run, which is far less sensitive to
+    scheduler noise than the median
+    """
+    regressions = []
+    print(f"{'benchmark':<34} {'baseline us':>12} {'current us':>12} {'change':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:<34} {'-':>12} {result['min_us']:>12.3f} {'new':>8}")
+            continue
+        before = baseline[name]["min_us"]
+        change = result["min_us"] / before - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  SLOWER"
+        print(f"{name:<34} {before:>12.3f} {result['min_us']:>12.3f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=["run", "compare"])
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="Store results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.20,
+                        help="Allowed slowdown before a benchmark is flagged (0.20 = 20%%)")
+    parser.add_argument("-k", dest="keyword", help="Only run benchmarks containing this text")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.keyword)
+
+    if args.command == "run":
+        print_results(results)
+        if args.save:
+            with open(args.baseline, "w") as f:
+                json.dump({"environment": environment(), "benchmarks": results}, f, indent=2)
+                f.write("\n")
+            print(f"Baseline written to {args.baseline}")
+        return
+
+    with open(args.baseline) as f:
+        stored = json.load(f)
+    current = environment()
+    recorded = stored["environment"]
+    if (recorded["python"], recorded["machine"]) != (current["python"], current["machine"]):
+        print(f"note: baseline recorded on Python {recorded['python']} / {recorded['machine']}, "
+              f"running on Python {current['python']} / {current['machine']}")
+
+    regressions = compare(stored["benchmarks"], results, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower than baseline by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
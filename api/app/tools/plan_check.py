@@ -0,0 +1,327 @@
+"""
+Query-plan snapshot check
+Runs the main read paths of the API against a database, EXPLAINs every
+statement they issue and compares the plan shapes (scan types and index
+names) with the committed snapshot in plan_snapshots.json.
+
+Plans are taken with enable_seqscan off, so the planner uses an index
+whenever one can serve the statement and the shapes don't depend on table
+sizes. Statements are matched by their normalized SQL: one that gains a
+sequential scan or stops using an index it used (a dropped index, a
+non-sargable filter) fails the check, as does a new or rewritten statement
+that scans a table sequentially. A sequential scan of orders or users fails
+regardless of the snapshot unless the statement is on SEQ_SCAN_ALLOWLIST.
+Requests run inside a transaction that is rolled back. The snapshot must
+be taken on a database with every migration applied (--update refuses
+otherwise).
+
+Usage:
+    python -m app.tools.plan_check            # compare, exit 1 on regressions
+    python -m app.tools.plan_check --update   # rewrite the snapshot
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+from typing import Callable, Dict, List, Optional
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from ..core.database import engine, get_db
+from ..core.slow_queries import normalize_sql
+from ..main import app
+
+SNAPSHOT_PATH = os.path.join(os.path.dirname(__file__), "plan_snapshots.json")
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "..", "supabase", "migrations")
+
+_CREATE_INDEX = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s+ON\b",
+    re.IGNORECASE,
+)
+_DROP_INDEX = re.compile(r"DROP\s+INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+EXISTS\s+)?(\w+)", re.IGNORECASE)
+
+API = "/api/v1"
+
+# Tables big enough that a sequential scan of them is always a finding,
+# whatever the snapshot says
+LARGE_TABLES = ("orders", "users")
+
+# Statements allowed to scan a large table anyway: normalized SQL -> why
+SEQ_SCAN_ALLOWLIST: Dict[str, str] = {}
+
+
+# ===========================================
+# Cases
+# ===========================================
+
+class PlanCase:
+    """A request whose statements are checked"""
+
+    def __init__(self, name: str, method: str, path: str,
+                 params: Optional[Callable[[dict], dict]] = None,
+                 json_body: Optional[Callable[[dict], dict]] = None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.params = params
+        self.json_body = json_body
+
+
+CASES = [
+    # Orders
+    PlanCase("orders.list", "GET", "/orders/", lambda s: {"club_id": s["club_id"]}),
+    PlanCase("orders.details", "GET", "/orders/details", lambda s: {"club_id": s["club_id"], "status_id": 3}),
+    PlanCase("orders.get", "GET", "/orders/{order_id}"),
+    PlanCase("orders.user", "GET", "/orders/user/{user_id}"),
+    PlanCase("orders.verify_pickup", "POST", "/orders/verify-pickup",
+             json_body=lambda s: {"pickup_code": s["pickup_code"], "club_id": s["club_id"]}),
+    # Admin
+    PlanCase("admin.dashboard_stats", "GET", "/admin/dashboard/stats", lambda s: {"club_id": s["club_id"]}),
+    PlanCase("admin.orders_by_status", "GET", "/admin/dashboard/orders-by-status", lambda s: {"club_id": s["club_id"]}),
+    PlanCase("admin.orders", "GET", "/admin/orders", lambda s: {"club_id": s["club_id"], "status_id": 1}),
+    PlanCase("admin.orders_search", "GET", "/admin/orders", lambda s: {"search": s["phone"][-4:]}),
+    PlanCase("admin.users_search", "GET", "/admin/users", lambda s: {"search": s["phone"][-4:]}),
+    # Courier
+    PlanCase("courier.dirty_items", "GET", "/courier/dirty-items", lambda s: {"club_id": s["club_id"]}),
+    PlanCase("courier.clean_items", "GET", "/courier/clean-items", lambda s: {"club_id": s["club_id"]}),
+    # Laundry
+    PlanCase("laundry.pending_receipt", "GET", "/laundry/orders/pending-receipt", lambda s: {"club_id": s["club_id"]}),
+    PlanCase("laundry.in_washing", "GET", "/laundry/orders/in-washing", lambda s: {"club_id": s["club_id"]}),
+    PlanCase("laundry.ready_to_pack", "GET", "/laundry/orders/ready-to-pack", lambda s: {"club_id": s["club_id"]}),
+    PlanCase("laundry.order_photos", "GET", "/laundry/orders/{order_id}/photos"),
+    # Tablet
+    PlanCase("tablet.check_phone", "POST", "/tablet/check-phone", json_body=lambda s: {"phone": s["phone"]}),
+    PlanCase("tablet.ready_orders", "GET", "/tablet/user/{user_id}/ready-orders"),
+    PlanCase("tablet.subscription", "GET", "/tablet/user/{user_id}/subscription"),
+    PlanCase("tablet.club", "GET", "/tablet/club/{club_id}"),
+    # Users, ratings, photos, notifications
+    PlanCase("users.by_phone", "GET", "/users/phone/{phone}"),
+    PlanCase("users.get", "GET", "/users/{user_id}"),
+    PlanCase("ratings.order", "GET", "/ratings/order/{order_id}"),
+    PlanCase("ratings.average", "GET", "/ratings/average/{user_id}"),
+    PlanCase("photos.order", "GET", "/photos/order/{order_id}"),
+    PlanCase("notifications.list", "GET", "/notifications/", lambda s: {"club_id": s["club_id"], "is_read": False}),
+    PlanCase("notifications.unread_count", "GET", "/notifications/unread/count", lambda s: {"club_id": s["club_id"]}),
+    PlanCase("notifications.order", "GET", "/notifications/order/{order_id}"),
+    PlanCase("clubs.by_code", "GET", "/clubs/code/{club_code}"),
+]
+
+
+def load_sample() -> dict:
+    """Identifiers of existing rows used to fill in case paths"""
+    with engine.connect() as connection:
+        row = connection.execute(text(
+            "SELECT o.id AS order_id, o.club_id, o.pickup_code, u.id AS user_id, "
+            "u.phone, c.code AS club_code "
+            "FROM orders o JOIN users u ON u.id = o.user_id "
+            "JOIN clubs c ON c.id = o.club_id "
+            "WHERE u.phone IS NOT NULL AND o.pickup_code IS NOT NULL "
+            "ORDER BY o.created_at DESC LIMIT 1"
+        )).mappings().first()
+    if row is None:
+        raise SystemExit("No orders with a user and pickup code found; seed the database first")
+    return {key: str(value) for key, value in row.items()}
+
+
+# ===========================================
+# Capture and EXPLAIN
+# ===========================================
+
+def capture_statements(client: TestClient, case: PlanCase, sample: dict) -> List[tuple]:
+    """Run a case in a rolled-back transaction and return its (statement, parameters)"""
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if conn is connection and not executemany:
+            statements.append((statement, parameters))
+
+    def override_get_db():
+        yield session
+
+    event.listen(engine, "before_cursor_execute", record)
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        response = client.request(
+            case.method,
+            API + case.path.format(**sample),
+            params=case.params(sample) if case.params else None,
+            json=case.json_body(sample) if case.json_body else None,
+        )
+        if response.status_code >= 500:
+            raise RuntimeError(f"{case.name}: HTTP {response.status_code}")
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        event.remove(engine, "before_cursor_execute", record)
+        session.close()
+        transaction.rollback()
+        connection.close()
+    return statements
+
+
+def plan_nodes(plan: dict) -> List[str]:
+    """Relation access nodes of a plan tree, e.g. 'Index Scan users (users_pkey)'"""
+    nodes = []
+    relation = plan.get("Relation Name")
+    if relation:
+        node = f"{plan['Node Type']} {relation}"
+        if plan.get("Index Name"):
+            node += f" ({plan['Index Name']})"
+        elif plan["Node Type"] == "Bitmap Heap Scan":
+            node += f" ({', '.join(bitmap_indexes(plan))})"
+        nodes.append(node)
+    for child in plan.get("Plans", []):
+        nodes.extend(plan_nodes(child))
+    return nodes
+
+
+def bitmap_indexes(plan: dict) -> List[str]:
+    """Indexes under a bitmap heap scan (its Bitmap Index Scans, possibly ANDed/ORed)"""
+    names = [plan["Index Name"]] if plan.get("Index Name") else []
+    for child in plan.get("Plans", []):
+        names.extend(bitmap_indexes(child))
+    return names
+
+
+def explain_shape(statement: str, parameters) -> List[str]:
+    with engine.connect() as connection:
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        plan = connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {statement}", parameters
+        ).scalar()
+        connection.rollback()
+    return plan_nodes(plan[0]["Plan"])
+
+
+def snapshot_case(client: TestClient, case: PlanCase, sample: dict) -> Dict[str, List[str]]:
+    """Plan shapes of a case's statements keyed by normalized SQL"""
+    shapes = {}
+    for statement, parameters in capture_statements(client, case, sample):
+        if not statement.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE")):
+            continue
+        shapes[normalize_sql(statement)] = explain_shape(statement, parameters)
+    return shapes
+
+
+# ===========================================
+# Comparison
+# ===========================================
+
+def large_table_scans(actual: Dict[str, dict]) -> List[str]:
+    """Sequential scans of LARGE_TABLES by statements not in SEQ_SCAN_ALLOWLIST"""
+    findings = []
+    for name, shapes in actual.items():
+        for sql, nodes in shapes.items():
+            if sql in SEQ_SCAN_ALLOWLIST:
+                continue
+            for table in sorted({node.split(" ")[2] for node in nodes if node.startswith("Seq Scan ")}):
+                if table in LARGE_TABLES:
+                    findings.append(f"{name}: Seq Scan {table} (not allowlisted) in: {sql[:300]}")
+    return findings
+
+
+def compare(expected: Dict[str, dict], actual: Dict[str, dict]) -> List[str]:
+    """
+    Regressions, statement by statement
+
+    A statement in the snapshot regresses when it gains a sequential scan
+    or loses an index it was read through; a statement that isn't in the
+    snapshot (its SQL changed) regresses when it scans any table sequentially.
+    Scans of LARGE_TABLES are left to large_table_scans().
+    """
+    regressions = []
+    for name, shapes in actual.items():
+        if name not in expected:
+            continue
+        for sql, nodes in shapes.items():
+            before = expected[name].get(sql)
+            if before is None:
+                scans = sorted({node for node in nodes if _small_table_scan(node)})
+                problems = [f"new statement with {node}" for node in scans]
+            else:
+                problems = [f"new {node}" for node in nodes
+                            if _small_table_scan(node) and nodes.count(node) > before.count(node)]
+                problems += [f"lost {node}" for node in before
+                             if "(" in node and node not in nodes]
+            for problem in sorted(set(problems)):
+                regressions.append(f"{name}: {problem} in: {sql[:300]}")
+    return regressions
+
+
+def _small_table_scan(node: str) -> bool:
+    return node.startswith("Seq Scan ") and node.split(" ")[2] not in LARGE_TABLES
+
+
+def missing_indexes() -> List[str]:
+    """Indexes the migrations create that the database lacks"""
+    expected = set()
+    for path in sorted(glob.glob(os.path.join(MIGRATIONS_DIR, "*.sql"))):
+        with open(path, encoding="utf-8") as f:
+            sql = f.read()
+        expected |= set(_CREATE_INDEX.findall(sql))
+        expected -= set(_DROP_INDEX.findall(sql))
+    if not expected:
+        return []
+    with engine.connect() as connection:
+        existing = set(connection.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = 'public'"
+        )).scalars())
+    return sorted(expected - existing)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--update", action="store_true", help="Rewrite the snapshot file")
+    parser.add_argument("--case", action="append", help="Only run the named case(s)")
+    args = parser.parse_args()
+
+    missing = missing_indexes()
+    if missing:
+        # A snapshot taken without them would bless the sequential scans they prevent
+        print(f"Database lacks migration indexes: {', '.join(missing)}")
+        if args.update:
+            raise SystemExit("Apply every migration before updating the snapshot")
+
+    sample = load_sample()
+    cases = [case for case in CASES if not args.case or case.name in args.case]
+    actual = {}
+    with TestClient(app) as client:
+        for case in cases:
+            actual[case.name] = snapshot_case(client, case, sample)
+
+    large_scans = large_table_scans(actual)
+    if args.update:
+        if large_scans:
+            print("\n".join(large_scans))
+            raise SystemExit("Index these statements or allowlist them (SEQ_SCAN_ALLOWLIST) before updating")
+        with open(SNAPSHOT_PATH, "w") as f:
+            json.dump(actual, f, indent=2, ensure_ascii=False, sort_keys=True)
+            f.write("\n")
+        print(f"Wrote plan snapshots for {len(actual)} cases to {SNAPSHOT_PATH}")
+        return
+
+    with open(SNAPSHOT_PATH) as f:
+        expected = json.load(f)
+
+    for name in sorted(set(actual) - set(expected)):
+        print(f"new case (not in snapshot): {name}")
+    for name, shapes in actual.items():
+        if name in expected and shapes != expected[name]:
+            print(f"plan shape changed: {name}")
+
+    regressions = large_scans + compare(expected, actual)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print(f"{len(actual)} cases checked, no plan regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""
+Synthetic dataset generator
+Seeds clubs, members, staff, orders across all statuses, photos, ratings,
+notification logs and employee notifications at production volume, loaded
+with PostgreSQL COPY.
+
+Orders follow the gym-day attendance profile and move through the status
+flow with consistent timestamps: orders older than a few days are
+completed (a small share canceled), recent ones are spread over pending,
+in progress and ready for pickup according to their age.
+
+Clubs are generated and loaded by --jobs worker processes, each club in its
+own transaction. Seeded clubs have codes SD001..., members phones +7888...;
+--reset removes them (and everything referencing them) before seeding.
+
+Usage:
+    python -m app.tools.seed --clubs 50 --days 730 --orders-per-day 28
+    python -m app.tools.seed --clubs 2 --days 30 --reset
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Iterable, List, Sequence
+
+from ..core.database import engine
+from ..core.security import get_password_hash
+from .loadtest import GYM_DAY
+
+CLUB_PREFIX = "SD"
+PHONE_PREFIX = "+7888"
+
+STATUS_PENDING = 1
+STATUS_IN_PROGRESS = 2
+STATUS_READY_FOR_PICKUP = 3
+STATUS_COMPLETED = 4
+STATUS_CANCELED = 5
+
+USER_COLUMNS = (
+    "id", "username", "phone", "club_id", "subscription_id", "subscription_date",
+    "created_at", "updated_at", "pin_code", "pin_set_at", "notify_on_status_change",
+    "notify_on_pickup_ready", "role",
+)
+ORDER_COLUMNS = (
+    "id", "user_id", "price", "package_id", "club_id", "status_id", "created_at",
+    "updated_at", "pickup_code", "is_tariff_based", "tariff_price", "order_number",
+    "daily_sequence", "created_date", "locker_device_id", "locker_cell_id", "ready_at",
+)
+PHOTO_COLUMNS = ("id", "order_id", "uploaded_by", "photo_url", "photo_type", "created_at")
+RATING_COLUMNS = ("id", "order_id", "user_id", "rating", "comment", "created_at")
+LOG_COLUMNS = (
+    "id", "user_id", "order_id", "notification_type", "channel", "message",
+    "whatsapp_sent", "sent_at", "created_at",
+)
+EMPLOYEE_NOTIFICATION_COLUMNS = (
+    "id", "club_id", "order_id", "notification_type", "title", "message",
+    "is_read", "priority", "created_at", "read_at",
+)
+
+RATING_COMMENTS = [None, None, None, "Спасибо!", "Всё отлично", "Долго ждал", "Пятно осталось"]
+
+
+# ===========================================
+# COPY
+# ===========================================
+
+def copy_rows(cursor, table: str, columns: Sequence[str], rows: Iterable[tuple]) -> int:
+    """Load rows into a table with COPY ... FROM STDIN (psycopg 3 or psycopg2)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    if not count:
+        return 0
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    buffer.seek(0)
+    if hasattr(cursor, "copy_expert"):
+        cursor.copy_expert(sql, buffer)
+    else:
+        with cursor.copy(sql) as copy:
+            copy.write(buffer.getvalue())
+    return count
+
+
+# ===========================================
+# Generation
+# ===========================================
+
+def random_uuid(rng: random.Random) -> str:
+    """Version 4 UUID text from a seeded generator (much cheaper than uuid.uuid4())"""
+    value = rng.getrandbits(128)
+    value = (value & ~(0xF000 << 64)) | (0x4000 << 64)  # version 4
+    value = (value & ~(0xC000 << 48)) | (0x8000 << 48)  # RFC 4122 variant
+    return f"{value:032x}"
+
+
+class ClubSeed:
+    """Generated rows for one club"""
+
+    def __init__(self):
+        self.users: List[tuple] = []
+        self.orders: List[tuple] = []
+        self.photos: List[tuple] = []
+        self.ratings: List[tuple] = []
+        self.logs: List[tuple] = []
+        self.employee_notifications: List[tuple] = []
+
+
+def order_stage(age: timedelta, rng: random.Random) -> int:
+    """Status of an order of the given age"""
+    hours = age.total_seconds() / 3600
+    if hours > 96:
+        return STATUS_CANCELED if rng.random() < 0.02 else STATUS_COMPLETED
+    if hours < 10:
+        return STATUS_PENDING
+    if hours < 30:
+        return STATUS_IN_PROGRESS
+    return STATUS_READY_FOR_PICKUP if rng.random() < 0.6 else STATUS_COMPLETED
+
+
+def generate_club(club_number: int, club_id: int, code: str, args, pin_hash: str,
+                  subscription_ids: List[int], now: datetime) -> ClubSeed:
+    rng = random.Random(args.seed * 100003 + club_number)  # independent of generation order
+    seed = ClubSeed()
+    start = now - timedelta(days=args.days)
+
+    staff_id = random_uuid(rng)
+    seed.users.append((
+        staff_id, f"staff-{code.lower()}", None, club_id, None, None,
+        start, start, pin_hash, start, False, False, "laundry",
+    ))
+
+    members = []
+    for i in range(args.members):
+        joined = start + timedelta(seconds=rng.uniform(0, args.days * 86400 * 0.8))
+        user_id = random_uuid(rng)
+        phone = f"{PHONE_PREFIX}{club_number:03d}{i:04d}"
+        subscription_id = rng.choice(subscription_ids) if subscription_ids and rng.random() < 0.7 else None
+        subscription_date = (
+            now - timedelta(days=rng.uniform(0, 60)) if subscription_id else None
+        )
+        seed.users.append((
+            user_id, f"member-{code.lower()}-{i}", phone, club_id, subscription_id,
+            subscription_date, joined, joined, pin_hash, joined, True, True, "client",
+        ))
+        members.append(user_id)
+
+    hour_weights = GYM_DAY
+    for day in range(args.days + 1):
+        day_start = (start + timedelta(days=day)).replace(hour=0, minute=0, second=0, microsecond=0)
+        volume = max(0, int(rng.gauss(args.orders_per_day, args.orders_per_day * 0.2)))
+        hours = sorted(rng.choices(range(24), weights=hour_weights, k=volume))
+        for sequence, hour in enumerate(hours, start=1):
+            created_at = day_start + timedelta(hours=hour, seconds=rng.uniform(0, 3600))
+            if created_at > now:
+                break
+            user_id = rng.choice(members)
+            add_order(seed, code, club_id, staff_id, user_id, created_at, sequence, now, rng)
+    return seed
+
+
+def add_order(seed: ClubSeed, code: str, club_id: int, staff_id, user_id, created_at: datetime,
+              sequence: int, now: datetime, rng: random.Random):
+    order_id = random_uuid(rng)
+    status_id = order_stage(now - created_at, rng)
+    received_at = created_at + timedelta(hours=rng.uniform(3, 9))
+    washed_at = received_at + timedelta(hours=rng.uniform(4, 10))
+    ready_at = washed_at + timedelta(hours=rng.uniform(2, 8))
+    completed_at = min(ready_at + timedelta(hours=rng.uniform(1, 48)), now)
+
+    updated_at = {
+        STATUS_PENDING: created_at,
+        STATUS_IN_PROGRESS: received_at,
+        STATUS_READY_FOR_PICKUP: ready_at,
+        STATUS_COMPLETED: completed_at,
+        STATUS_CANCELED: created_at + timedelta(hours=1),
+    }[status_id]
+
+    order_number = f"{created_at:%Y%m%d}-{code}-{sequence:03d}"
+    in_locker = status_id in (STATUS_PENDING, STATUS_READY_FOR_PICKUP)
+    is_tariff_based = rng.random() < 0.3
+    price = float(rng.choice((1500, 2000, 2500, 3000)))
+    seed.orders.append((
+        order_id, user_id, 0.0 if is_tariff_based else price, f"{code}-{rng.randint(1, 9999):04d}", club_id, status_id,
+        created_at, updated_at, f"{rng.randint(0, 9999):04d}", is_tariff_based,
+        price if is_tariff_based else None, order_number,
+        sequence, created_at.date(), f"locker-{club_id}" if in_locker else None,
+        str(rng.randint(1, 40)) if in_locker else None,
+        ready_at if status_id in (STATUS_READY_FOR_PICKUP, STATUS_COMPLETED) else None,
+    ))
+
+    seed.logs.append((
+        random_uuid(rng), user_id, order_id, "order_accepted", "whatsapp",
+        f"Заказ {order_number} принят", True, created_at, created_at,
+    ))
+    if status_id == STATUS_CANCELED:
+        return
+
+    if status_id != STATUS_PENDING:
+        seed.photos.append((random_uuid(rng), order_id, staff_id,
+                            f"https://storage.example.com/{order_id}/received.jpg", "received", received_at))
+        seed.logs.append((random_uuid(rng), user_id, order_id, "order_received", "whatsapp",
+                          f"Заказ {order_number} получен прачечной", True, received_at, received_at))
+    if status_id != STATUS_PENDING and washed_at <= now:
+        seed.photos.append((random_uuid(rng), order_id, staff_id,
+                            f"https://storage.example.com/{order_id}/processed.jpg", "processed", washed_at))
+    if status_id in (STATUS_READY_FOR_PICKUP, STATUS_COMPLETED):
+        seed.photos.append((random_uuid(rng), order_id, staff_id,
+                            f"https://storage.example.com/{order_id}/ready.jpg", "ready", ready_at))
+        seed.logs.append((random_uuid(rng), user_id, order_id, "order_ready", "whatsapp",
+                          f"Заказ {order_number} готов к выдаче", True, ready_at, ready_at))
+        seed.employee_notifications.append((
+            random_uuid(rng), club_id, order_id, "order_ready", "Заказ готов",
+            f"Заказ {code}-{sequence:03d} готов к выдаче", status_id == STATUS_COMPLETED,
+            "medium", ready_at, completed_at if status_id == STATUS_COMPLETED else None,
+        ))
+    if status_id == STATUS_COMPLETED:
+        seed.logs.append((random_uuid(rng), user_id, order_id, "order_completed", "whatsapp",
+                          f"Заказ {order_number} выдан", True, completed_at, completed_at))
+        if rng.random() < 0.3:
+            rated_at = completed_at + timedelta(minutes=rng.uniform(1, 30))
+            seed.ratings.append((
+                random_uuid(rng), order_id, user_id, rng.choices((1, 2, 3, 4, 5), (2, 3, 8, 30, 57))[0],
+                rng.choice(RATING_COMMENTS), rated_at,
+            ))
+
+
+# ===========================================
+# Entry point
+# ===========================================
+
+def reset(cursor):
+    """Delete previously seeded clubs and everything referencing them"""
+    cursor.execute("SELECT id FROM clubs WHERE code LIKE %s", (f"{CLUB_PREFIX}%",))
+    club_ids = [row[0] for row in cursor.fetchall()]
+    if not club_ids:
+        return
+    orders = "SELECT id FROM orders WHERE club_id = ANY(%s)"
+    users = "SELECT id FROM users WHERE club_id = ANY(%s)"
+    for statement in (
+        f"DELETE FROM order_photos WHERE order_id IN ({orders})",
+        f"DELETE FROM client_ratings WHERE order_id IN ({orders})",
+        f"DELETE FROM notification_logs WHERE user_id IN ({users})",
+        "DELETE FROM employee_notifications WHERE club_id = ANY(%s)",
+        "DELETE FROM orders WHERE club_id = ANY(%s)",
+        "DELETE FROM users WHERE club_id = ANY(%s)",
+        "DELETE FROM clubs WHERE id = ANY(%s)",
+    ):
+        cursor.execute(statement, (club_ids,))
+
+
+def seed_club(task: tuple) -> dict:
+    """Generate one club and COPY it in its own connection and transaction (worker process)"""
+    number, club_id, code, args, pin_hash, subscription_ids, now = task
+    engine.dispose(close=False)  # don't share the parent's pooled connections
+    seed = generate_club(number, club_id, code, args, pin_hash, subscription_ids, now)
+    counts = {}
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        if args.disable_triggers:
+            cursor.execute("SET session_replication_role = replica")
+        for table, columns, rows in (
+            ("users", USER_COLUMNS, seed.users),
+            ("orders", ORDER_COLUMNS, seed.orders),
+            ("order_photos", PHOTO_COLUMNS, seed.photos),
+            ("client_ratings", RATING_COLUMNS, seed.ratings),
+            ("notification_logs", LOG_COLUMNS, seed.logs),
+            ("employee_notifications", EMPLOYEE_NOTIFICATION_COLUMNS, seed.employee_notifications),
+        ):
+            counts[table] = copy_rows(cursor, table, columns, rows)
+        connection.commit()
+    finally:
+        connection.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clubs", type=int, default=5)
+    parser.add_argument("--days", type=int, default=365, help="History length")
+    parser.add_argument("--members", type=int, default=400, help="Members per club")
+    parser.add_argument("--orders-per-day", type=float, default=25.0,
+                        help="Mean orders per club and day")
+    parser.add_argument("--pin", default="1234", help="PIN set for every seeded user")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Clubs generated and loaded in parallel")
+    parser.add_argument("--reset", action="store_true", help="Delete previously seeded data first")
+    parser.add_argument("--disable-triggers", action="store_true",
+                        help="Skip table triggers and FK checks while loading (needs superuser)")
+    args = parser.parse_args()
+
+    now = datetime.now().replace(microsecond=0)
+    pin_hash = get_password_hash(args.pin)  # bcrypt once for all users
+    started = time.perf_counter()
+
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        if args.reset:
+            reset(cursor)
+        cursor.execute("SELECT id FROM dim_subscription_types ORDER BY id")
+        subscription_ids = [row[0] for row in cursor.fetchall()]
+        tasks = []
+        for number in range(1, args.clubs + 1):
+            code = f"{CLUB_PREFIX}{number:03d}"
+            cursor.execute(
+                "INSERT INTO clubs (code, name) VALUES (%s, %s) RETURNING id",
+                (code, f"Seed Club {number}"),
+            )
+            club_id = cursor.fetchone()[0]
+            tasks.append((number, club_id, code, args, pin_hash, subscription_ids, now))
+        connection.commit()
+    finally:
+        connection.close()
+
+    # Clubs are independent, so each is loaded by a worker in its own transaction
+    totals = {}
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        for task, counts in zip(tasks, pool.map(seed_club, tasks)):
+            for table, count in counts.items():
+                totals[table] = totals.get(table, 0) + count
+            print(f"club {task[2]}: {counts['orders']} orders ({time.perf_counter() - started:.1f}s)")
+
+    with engine.begin() as analyze_connection:
+        for table in totals:
+            analyze_connection.exec_driver_sql(f"ANALYZE {table}")
+
+    print(", ".join(f"{table}: {count}" for table, count in totals.items()))
+    print(f"Seeded {args.clubs} clubs in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+-- Latest-rating lookup for the order details listing
+-- (LATERAL ... WHERE order_id = ? ORDER BY created_at DESC LIMIT 1)
+
+CREATE INDEX IF NOT EXISTS idx_client_ratings_order_created ON client_ratings(order_id, created_at DESC);
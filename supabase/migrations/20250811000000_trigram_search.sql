@@ -0,0 +1,17 @@
+-- Trigram search for admin order and user lookup
+-- Substring searches (ILIKE '%term%') on order numbers, usernames and phones
+-- are served by GIN trigram indexes instead of sequential scans
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Phone number reduced to digits only, so "+7 (700) 123" and "7700123" match alike
+ALTER TABLE users
+  ADD COLUMN IF NOT EXISTS phone_digits text
+  GENERATED ALWAYS AS (regexp_replace(coalesce(phone, ''), '\D', '', 'g')) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_users_phone_digits_trgm ON users USING gin (phone_digits gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_users_username_trgm ON users USING gin (username gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_orders_order_number_trgm ON orders USING gin (order_number gin_trgm_ops);
+
+-- Orders of matched users are fetched by user_id
+CREATE INDEX IF NOT EXISTS idx_orders_user_id ON orders(user_id);
@@ -0,0 +1,27 @@
+-- Orders summary aggregated in the database
+-- Exposed over PostgREST as POST /rest/v1/rpc/orders_summary_by_status,
+-- so reports no longer download every order row to group them client-side
+
+CREATE OR REPLACE FUNCTION orders_summary_by_status(p_club_id bigint DEFAULT NULL)
+RETURNS TABLE (
+  status_id integer,
+  status_name text,
+  order_count bigint,
+  total_revenue double precision
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    o.status_id,
+    coalesce(s.name, 'Unknown') AS status_name,
+    count(*) AS order_count,
+    coalesce(sum(o.price), 0)::double precision AS total_revenue
+  FROM orders o
+  LEFT JOIN dim_status_types s ON s.id = o.status_id
+  WHERE p_club_id IS NULL OR o.club_id = p_club_id
+  GROUP BY o.status_id, s.name
+  ORDER BY o.status_id;
+$$;
+
+GRANT EXECUTE ON FUNCTION orders_summary_by_status(bigint) TO anon, authenticated, service_role;
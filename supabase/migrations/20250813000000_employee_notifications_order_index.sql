@@ -0,0 +1,4 @@
+-- Employee notifications of an order (/notifications/order/{id}) and the
+-- foreign-key check run for every deleted order
+
+CREATE INDEX IF NOT EXISTS idx_employee_notifications_order_id ON employee_notifications(order_id);
@@ -0,0 +1,38 @@
+-- Pickup reminders
+-- ready_at records when an order entered READY_FOR_PICKUP (status 3), so the
+-- reminder sweeper can range-scan (status_id, ready_at) instead of every order
+
+ALTER TABLE orders ADD COLUMN IF NOT EXISTS ready_at timestamptz;
+
+-- Orders already waiting in a locker start their reminder clock now (the
+-- schema has no record of when they became ready)
+UPDATE orders SET ready_at = now() WHERE status_id = 3 AND ready_at IS NULL;
+
+CREATE OR REPLACE FUNCTION set_order_ready_at()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF NEW.status_id = 3 AND NEW.status_id IS DISTINCT FROM
+      (CASE WHEN TG_OP = 'UPDATE' THEN OLD.status_id END) THEN
+    IF TG_OP = 'UPDATE' OR NEW.ready_at IS NULL THEN
+      NEW.ready_at := now();
+    END IF;
+  END IF;
+
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_set_order_ready_at ON orders;
+CREATE TRIGGER trigger_set_order_ready_at
+    BEFORE INSERT OR UPDATE OF status_id ON orders
+    FOR EACH ROW
+    EXECUTE FUNCTION set_order_ready_at();
+
+-- Keyset scan of ready orders by age
+CREATE INDEX IF NOT EXISTS idx_orders_status_ready_at ON orders(status_id, ready_at, id);
+
+-- One reminder of each kind per order, also under concurrent sweeps
+-- (claimed with INSERT ... ON CONFLICT DO NOTHING)
+CREATE UNIQUE INDEX IF NOT EXISTS uq_notification_logs_pickup_reminder
+  ON notification_logs(order_id, notification_type)
+  WHERE notification_type LIKE 'pickup_reminder_%';
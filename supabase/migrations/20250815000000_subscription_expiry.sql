@@ -0,0 +1,24 @@
+-- Subscription expiry notifications
+-- End of the current subscription period, derived from subscription_date and
+-- the subscription type (2 = weekly, 3 = monthly; 1 = none never expires), so
+-- the expiry sweep can range-scan an index instead of computing it per user
+
+ALTER TABLE users
+  ADD COLUMN IF NOT EXISTS subscription_expires_at timestamp
+  GENERATED ALWAYS AS (
+    CASE subscription_id
+      WHEN 2 THEN subscription_date + interval '7 days'
+      WHEN 3 THEN subscription_date + interval '1 month'
+    END
+  ) STORED;
+
+-- Keyset scan of upcoming expiries
+CREATE INDEX IF NOT EXISTS idx_users_subscription_expires_at
+  ON users(subscription_expires_at, id)
+  WHERE subscription_expires_at IS NOT NULL;
+
+-- One notice per user and subscription period (the type carries the expiry
+-- date, e.g. subscription_expiring:2026-03-01), also under concurrent sweeps
+CREATE UNIQUE INDEX IF NOT EXISTS uq_notification_logs_subscription_expiring
+  ON notification_logs(user_id, notification_type)
+  WHERE notification_type LIKE 'subscription_expiring:%';
@@ -0,0 +1,17 @@
+-- WhatsApp delivery tracking
+-- UltraMsg's message ID of a sent notification, so delivery acks from the
+-- webhook can be matched to its log row, and the latest acknowledged state
+-- (sent, delivered, read)
+
+ALTER TABLE notification_logs
+  ADD COLUMN IF NOT EXISTS provider_message_id text,
+  ADD COLUMN IF NOT EXISTS delivery_status varchar(20),
+  ADD COLUMN IF NOT EXISTS delivery_updated_at timestamp;
+
+CREATE INDEX IF NOT EXISTS idx_notification_logs_provider_message_id
+  ON notification_logs(provider_message_id)
+  WHERE provider_message_id IS NOT NULL;
+
+-- Exact phone lookup of clients replying on WhatsApp (the trigram index
+-- serves substring search)
+CREATE INDEX IF NOT EXISTS idx_users_phone_digits ON users(phone_digits);
@@ -0,0 +1,9 @@
+-- Hot kiosk and admin lookups that had no usable index (found by
+-- app.tools.plan_check): exact phone lookups (/users/phone/{phone},
+-- /tablet/check-phone; the trigram index is on phone_digits, not phone),
+-- a club's orders newest first (/orders/?club_id=) and per-club counts on
+-- the admin dashboard
+
+CREATE INDEX IF NOT EXISTS idx_users_phone ON users(phone);
+CREATE INDEX IF NOT EXISTS idx_users_club_id ON users(club_id);
+CREATE INDEX IF NOT EXISTS idx_orders_club_created ON orders(club_id, created_at DESC);